@@ -0,0 +1,48 @@
+"""
+지연 로딩 에이전트 레지스트리
+에이전트 모듈과 무거운 라이브러리(google.generativeai, smolagents)는 에이전트를
+처음 요청할 때 불러오고, 만든 에이전트는 프로세스 전체에서 재사용합니다.
+"""
+
+import importlib
+import threading
+
+# 에이전트 이름 -> create_agent()를 가진 모듈
+AGENT_MODULES = {
+    'calculator': 'simple_agent',
+    'search': 'web_search_agent',
+}
+
+_agents = {}
+_locks = {name: threading.Lock() for name in AGENT_MODULES}
+
+
+def create_agent(name):
+    """새 에이전트 인스턴스 생성 (캐시하지 않음)"""
+    if name not in AGENT_MODULES:
+        raise KeyError(f"알 수 없는 에이전트입니다: {name}")
+    module = importlib.import_module(AGENT_MODULES[name])
+    return module.create_agent()
+
+
+def get_agent(name):
+    """공유 에이전트 반환 (처음 요청할 때 한 번만 생성)"""
+    agent = _agents.get(name)
+    if agent is None:
+        if name not in AGENT_MODULES:
+            raise KeyError(f"알 수 없는 에이전트입니다: {name}")
+        with _locks[name]:
+            agent = _agents.get(name)
+            if agent is None:
+                agent = _agents[name] = create_agent(name)
+    return agent
+
+
+def loaded_agents():
+    """지금까지 만들어진 에이전트 이름 목록"""
+    return list(_agents)
+
+
+def reset():
+    """만들어 둔 에이전트를 모두 버림 (설정 변경 후 다시 만들 때 사용)"""
+    _agents.clear()
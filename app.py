@@ -1,8 +1,8 @@
 import streamlit as st
 import os
 from dotenv import load_dotenv
-from simple_agent import agent as calc_agent
-from web_search_agent import agent as search_agent
+import agent_registry
+from job_runner import JobRunner, QueueFullError, CANCELLED, FAILED
 
 # 환경 변수 로드
 load_dotenv()
@@ -14,6 +14,18 @@ st.set_page_config(
     layout="wide"
 )
 
+@st.cache_resource(show_spinner="🤖 에이전트를 준비하는 중...")
+def load_agent(name):
+    """선택한 에이전트만 처음 사용할 때 만들고 모든 세션에서 재사용"""
+    return agent_registry.get_agent(name)
+
+@st.cache_resource
+def get_job_runner():
+    """모든 세션이 함께 쓰는 백그라운드 에이전트 실행기"""
+    return JobRunner()
+
+job_runner = get_job_runner()
+
 # 사이드바
 st.sidebar.title("🤖 SmolAgents 데모")
 st.sidebar.markdown("---")
@@ -40,7 +52,7 @@ if agent_type == "계산 도우미":
     - "2 + 3 * 4를 계산해줘"
     - "이 텍스트에서 수학 표현식을 찾아줘: 5 + 10 그리고 3 * 7"
     """)
-    agent = calc_agent
+    agent_name = 'calculator'
 else:
     st.subheader("🔍 정보 검색 도우미")
     st.markdown("""
@@ -54,7 +66,10 @@ else:
     - "서울 날씨 알려줘"
     - "hello를 한국어로 번역해줘"
     """)
-    agent = search_agent
+    agent_name = 'search'
+
+# 선택한 에이전트를 미리 준비 (이후에는 캐시된 에이전트 사용)
+agent = load_agent(agent_name)
 
 # 채팅 인터페이스
 st.markdown("---")
@@ -63,30 +78,67 @@ st.subheader("💬 에이전트와 대화하기")
 # 세션 상태 초기화
 if "messages" not in st.session_state:
     st.session_state.messages = []
+if "job_id" not in st.session_state:
+    st.session_state.job_id = None
+if "agent_sessions" not in st.session_state:
+    st.session_state.agent_sessions = {}  # 에이전트 이름 -> 대화 세션
+
+def get_agent_session():
+    """선택한 에이전트의 대화 세션 (세션을 지원하지 않는 에이전트면 None)"""
+    if not hasattr(agent, 'start_session'):
+        return None
+    if agent_name not in st.session_state.agent_sessions:
+        st.session_state.agent_sessions[agent_name] = agent.start_session()
+    return st.session_state.agent_sessions[agent_name]
+
+def finish_job(job):
+    """끝난 작업의 결과를 대화 기록에 추가"""
+    if job.status == FAILED:
+        content = f"❌ {job.error}"
+    elif job.status == CANCELLED:
+        content = (job.text + "\n\n" if job.text else "") + "⏹️ 응답이 취소되었습니다."
+    else:
+        content = job.text
+    st.session_state.messages.append({"role": "assistant", "content": content})
+    st.session_state.job_id = None
+
+@st.fragment(run_every=0.5)
+def show_job_progress():
+    """진행 중인 작업을 주기적으로 확인하여 생성된 부분까지 표시"""
+    job = job_runner.get(st.session_state.job_id)
+    if job is None or job.finished:
+        if job is not None:
+            finish_job(job)
+        else:
+            st.session_state.job_id = None
+        st.rerun()
+    
+    with st.chat_message("assistant"):
+        st.markdown(job.text + " ▌" if job.text else "🤖 에이전트가 생각 중...")
+        if st.button("⏹️ 응답 취소", key=f"cancel_{job.id}"):
+            job.cancel()
 
 # 이전 메시지들 표시
 for message in st.session_state.messages:
     with st.chat_message(message["role"]):
         st.markdown(message["content"])
 
+# 진행 중인 작업 (페이지를 다시 실행해도 같은 작업을 이어서 표시)
+if st.session_state.job_id:
+    show_job_progress()
+
 # 사용자 입력
-if prompt := st.chat_input("질문을 입력하세요..."):
+if prompt := st.chat_input("질문을 입력하세요...", disabled=bool(st.session_state.job_id)):
     # 사용자 메시지 추가
     st.session_state.messages.append({"role": "user", "content": prompt})
-    with st.chat_message("user"):
-        st.markdown(prompt)
-
-    # 에이전트 응답
-    with st.chat_message("assistant"):
-        with st.spinner("🤖 에이전트가 생각 중..."):
-            try:
-                response = agent.run(prompt)
-                st.markdown(response)
-                st.session_state.messages.append({"role": "assistant", "content": response})
-            except Exception as e:
-                error_msg = f"❌ 오류가 발생했습니다: {str(e)}"
-                st.error(error_msg)
-                st.session_state.messages.append({"role": "assistant", "content": error_msg})
+    
+    # 에이전트 실행은 백그라운드 작업으로 맡기고 진행 상황은 위에서 표시
+    try:
+        job = job_runner.submit(agent_name, prompt, session=get_agent_session())
+        st.session_state.job_id = job.id
+    except QueueFullError:
+        st.session_state.messages.append({"role": "assistant", "content": "❌ 요청이 많아 잠시 후 다시 시도해주세요."})
+    st.rerun()
 
 # 사이드바에 추가 정보
 st.sidebar.markdown("---")
@@ -109,7 +161,11 @@ st.sidebar.markdown("""
 
 # 대화 기록 초기화 버튼
 if st.sidebar.button("🗑️ 대화 기록 초기화"):
+    if st.session_state.job_id:
+        job_runner.cancel(st.session_state.job_id)
+        st.session_state.job_id = None
     st.session_state.messages = []
+    st.session_state.agent_sessions = {}
     st.rerun()
 
 # 푸터
@@ -0,0 +1,101 @@
+"""
+에이전트 비동기 실행 도우미
+여러 질문을 동시에 처리하면서 결과는 입력 순서대로 돌려줍니다.
+"""
+
+import asyncio
+
+DEFAULT_CONCURRENCY = 8
+
+
+def timeout_message(timeout):
+    return f"오류가 발생했습니다: {timeout}초 안에 응답을 받지 못했습니다."
+
+
+async def arun(agent, prompt, timeout=None):
+    """에이전트 한 번 실행 (arun이 있으면 사용, 없으면 스레드에서 run 실행)
+
+    스레드에서 실행한 run은 timeout이 지나도 중단되지 않고 결과만 버려집니다.
+    """
+    if hasattr(agent, 'arun'):
+        return await agent.arun(prompt, timeout=timeout)
+    try:
+        return await asyncio.wait_for(asyncio.to_thread(agent.run, prompt), timeout)
+    except asyncio.TimeoutError:
+        return timeout_message(timeout)
+    except Exception as e:
+        return f"오류가 발생했습니다: {str(e)}"
+
+
+class AgentPool:
+    """동시에 실행할 수 없는 에이전트(CodeAgent 등)를 필요한 만큼 만들어 돌려 쓰는 풀"""
+    
+    def __init__(self, agent_factory=None, size=1, agents=()):
+        self.agent_factory = agent_factory
+        self.size = size
+        self._created = 0
+        self._idle = asyncio.Queue()
+        for agent in agents:
+            self.release(agent)
+    
+    async def acquire(self):
+        if self._idle.empty() and self.agent_factory and self._created < self.size:
+            self._created += 1
+            try:
+                return await asyncio.to_thread(self.agent_factory)
+            except BaseException:
+                # 만들지 못한 자리는 다음 acquire에서 다시 만들 수 있도록 되돌림
+                self._created -= 1
+                raise
+        return await self._idle.get()
+    
+    def release(self, agent):
+        self._idle.put_nowait(agent)
+    
+    async def run(self, prompt, timeout=None):
+        """풀에서 에이전트를 빌려 실행
+
+        시간 초과된 실행은 스레드에서 계속 돌고 있으므로,
+        해당 에이전트는 실행이 실제로 끝난 뒤에 풀로 돌아옵니다.
+        """
+        try:
+            # 에이전트를 만들다 실패해도 이 질문만 오류로 끝나고 나머지 질문은 계속 실행
+            agent = await self.acquire()
+            task = asyncio.ensure_future(asyncio.to_thread(agent.run, prompt))
+            task.add_done_callback(lambda _: self.release(agent))
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            return timeout_message(timeout)
+        except Exception as e:
+            return f"오류가 발생했습니다: {str(e)}"
+
+
+async def run_many(agent, prompts, concurrency=DEFAULT_CONCURRENCY, timeout=None, agent_factory=None):
+    """여러 질문을 최대 concurrency개씩 동시에 실행하고 입력 순서대로 결과 반환
+
+    Args:
+        agent: arun을 지원하는 에이전트(GeminiAgent) 또는 run만 있는 에이전트(CodeAgent)
+        prompts: 질문 목록
+        concurrency: 동시에 실행할 최대 개수
+        timeout: 질문 하나당 제한 시간(초), None이면 제한 없음
+        agent_factory: run만 있는 에이전트를 동시에 여러 개 돌릴 때 새 인스턴스를 만드는 함수.
+            CodeAgent는 실행 중 메모리(대화 단계)를 인스턴스에 저장하므로
+            factory가 없으면 같은 인스턴스로 한 번에 하나씩만 실행합니다.
+    """
+    if concurrency <= 0:
+        raise ValueError("concurrency는 1 이상이어야 합니다.")
+    
+    if hasattr(agent, 'arun'):
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def run_one(prompt):
+            async with semaphore:
+                return await agent.arun(prompt, timeout=timeout)
+    else:
+        # 풀에 들어 있는 에이전트 수가 곧 동시 실행 수의 상한
+        pool = AgentPool(agent_factory, size=concurrency - 1, agents=[agent])
+        
+        async def run_one(prompt):
+            return await pool.run(prompt, timeout=timeout)
+    
+    return await asyncio.gather(*(run_one(prompt) for prompt in prompts))
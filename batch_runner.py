@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+JSONL 일괄 실행기
+입력 JSONL의 질문을 스트리밍으로 읽어 선택한 에이전트로 여러 개씩 동시에 실행하고,
+결과를 입력 순서대로 출력 JSONL에 한 줄씩 바로 기록합니다.
+출력 파일이 곧 체크포인트이므로 중간에 멈춘 실행은 같은 명령을 다시 실행하면 이어서 진행합니다.
+시간 초과/실패/취소된 질문은 다시 실행할 때 다시 시도합니다.
+
+    python batch_runner.py prompts.jsonl results.jsonl --agent calculator --workers 8
+
+입력 줄 형식: {"id": "q1", "prompt": "2 + 3 * 4를 계산해줘"} 또는 "2 + 3 * 4를 계산해줘"
+(id가 없으면 줄 번호를 id로 사용)
+출력 줄 형식: {"id": ..., "prompt": ..., "status": "done", "result": ..., "latency": 1.23}
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+
+import agent_registry
+from config import Config
+from job_runner import JobRunner, DONE
+
+INVALID = 'invalid'
+TIMEOUT = 'timeout'
+# 다시 실행해도 결과가 같은 상태 (나머지는 다음 실행에서 다시 시도)
+FINAL_STATUSES = frozenset({DONE, INVALID})
+
+
+def percentile(sorted_values, p):
+    """정렬된 값 목록의 p 백분위수 (nearest-rank)"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def read_prompts(path):
+    """(id, 질문, 오류) 를 한 줄씩 반환 (잘못된 줄은 질문 대신 오류 메시지)"""
+    with open(path, encoding='utf-8') as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                yield line_no, None, "JSON 형식이 아닙니다."
+                continue
+            if isinstance(item, str):
+                yield line_no, item, None
+            elif isinstance(item, dict) and isinstance(item.get('prompt'), str):
+                yield item.get('id', line_no), item['prompt'], None
+            else:
+                yield line_no, None, "prompt 문자열이 필요합니다."
+
+
+def load_checkpoint(path):
+    """출력 파일에서 이미 끝난 id 집합 반환
+
+    done/invalid 기록만 끝난 것으로 보고, 시간 초과/실패/취소 기록은 파일에서 지워
+    다음 실행에서 다시 시도합니다 (한 id에 한 줄만 남도록).
+    마지막 줄이 기록 도중 잘렸으면 그 줄도 지워 다음 기록이 이어지게 합니다.
+    """
+    finished = set()
+    if not os.path.exists(path):
+        return finished
+    kept = []
+    rewrite = False
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                rewrite = True
+                break
+            try:
+                record = json.loads(line)
+                key = _id_key(record['id'])
+            except (ValueError, KeyError, TypeError):
+                rewrite = True
+                break
+            if record.get('status') in FINAL_STATUSES:
+                finished.add(key)
+                kept.append(line)
+            else:
+                rewrite = True
+    if rewrite:
+        # 임시 파일에 쓴 뒤 바꿔 넣어 중간에 멈춰도 기존 결과를 잃지 않음
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.writelines(kept)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    return finished
+
+
+def _id_key(record_id):
+    # 1과 "1"처럼 JSON 타입만 다른 id를 구분하기 위해 직렬화한 값을 키로 사용
+    return json.dumps(record_id, ensure_ascii=False)
+
+
+class BatchRunner:
+    """입력 JSONL을 에이전트로 실행하고 결과를 출력 JSONL에 이어 쓰는 실행기"""
+    
+    def __init__(self, agent_name, workers=None, timeout=None, window=None, sync_every=50):
+        if agent_name not in agent_registry.AGENT_MODULES:
+            raise KeyError(f"알 수 없는 에이전트입니다: {agent_name}")
+        self.agent_name = agent_name
+        self.workers = workers or Config.JOB_WORKERS
+        self.timeout = timeout
+        # 결과는 입력 순서대로 쓰므로, 느린 질문 하나가 워커를 놀리지 않도록 워커 수보다 넉넉히 미리 제출
+        self.window = window or self.workers * 4
+        self.sync_every = sync_every
+        self.counts = {}
+        self.latencies = []
+        self.skipped = 0
+        self.elapsed = 0.0
+    
+    def run(self, input_path, output_path):
+        done_ids = load_checkpoint(output_path)
+        runner = JobRunner(max_workers=self.workers, max_pending=0, retention=0)
+        in_flight = deque()
+        start = time.perf_counter()
+        try:
+            with open(output_path, 'a', encoding='utf-8') as out:
+                for record_id, prompt, error in read_prompts(input_path):
+                    if _id_key(record_id) in done_ids:
+                        self.skipped += 1
+                        continue
+                    job = runner.submit(self.agent_name, prompt) if error is None else None
+                    in_flight.append((record_id, prompt, error, job))
+                    if len(in_flight) >= self.window:
+                        self._write(out, *in_flight.popleft())
+                while in_flight:
+                    self._write(out, *in_flight.popleft())
+                out.flush()
+                os.fsync(out.fileno())
+        finally:
+            # 중단된 경우 아직 기록하지 않은 작업은 취소 (다음 실행에서 다시 처리)
+            for _, _, _, job in in_flight:
+                if job is not None:
+                    job.cancel()
+            runner.shutdown(wait=False)
+            self.elapsed = time.perf_counter() - start
+    
+    def _write(self, out, record_id, prompt, error, job):
+        record = {'id': record_id, 'prompt': prompt}
+        if job is None:
+            record.update(status=INVALID, error=error)
+        elif not self._wait(job):
+            record.update(status=TIMEOUT, error=f"{self.timeout}초 안에 응답을 받지 못했습니다.")
+        elif job.status == DONE:
+            latency = job.finished_at - job.started_at
+            self.latencies.append(latency)
+            record.update(status=DONE, result=job.text, latency=round(latency, 4))
+        else:
+            record.update(status=job.status, error=job.error)
+        
+        out.write(json.dumps(record, ensure_ascii=False) + '\n')
+        out.flush()
+        self.counts[record['status']] = self.counts.get(record['status'], 0) + 1
+        if self.sync_every and self.processed % self.sync_every == 0:
+            os.fsync(out.fileno())
+    
+    def _wait(self, job):
+        """작업이 끝나면 True, 시작한 지 timeout초가 지나면 취소하고 False
+
+        job.cancel()은 결과만 버릴 뿐 워커를 바로 풀어 주지 않습니다.
+        스트리밍하지 않는 에이전트 호출은 돌아올 때까지 워커 하나를 계속 차지합니다.
+        """
+        if self.timeout is None:
+            job.wait()
+            return True
+        while not job.wait(0.05):
+            if job.started_at is not None and time.time() - job.started_at > self.timeout:
+                job.cancel()
+                return job.finished and job.status == DONE
+        return True
+    
+    @property
+    def processed(self):
+        return sum(self.counts.values())
+    
+    def summary(self):
+        """처리량과 지연 시간 백분위수 통계"""
+        latencies = sorted(self.latencies)
+        return {
+            'processed': self.processed,
+            'skipped': self.skipped,
+            'counts': dict(self.counts),
+            'elapsed': self.elapsed,
+            'throughput': self.processed / self.elapsed if self.elapsed else 0.0,
+            'p50': percentile(latencies, 50),
+            'p90': percentile(latencies, 90),
+            'p99': percentile(latencies, 99),
+            'max': latencies[-1] if latencies else None,
+        }
+
+
+def print_summary(summary):
+    print("\n📊 실행 결과")
+    print(f"  처리: {summary['processed']}개 (이전 실행에서 완료되어 건너뜀: {summary['skipped']}개)")
+    print("  상태별: " + ", ".join(f"{status} {count}" for status, count in sorted(summary['counts'].items())))
+    print(f"  소요 시간: {summary['elapsed']:.1f}초, 처리량: {summary['throughput']:.2f}개/초")
+    if summary['p50'] is not None:
+        print(f"  지연 시간(초): p50 {summary['p50']:.3f}, p90 {summary['p90']:.3f}, "
+              f"p99 {summary['p99']:.3f}, 최대 {summary['max']:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSONL 질문을 에이전트로 일괄 실행")
+    parser.add_argument('input', help="입력 JSONL 파일")
+    parser.add_argument('output', help="출력 JSONL 파일 (이미 있으면 이어서 실행)")
+    parser.add_argument('--agent', choices=list(agent_registry.AGENT_MODULES), default='calculator')
+    parser.add_argument('--workers', type=int, default=Config.JOB_WORKERS, help="동시에 실행할 질문 수")
+    parser.add_argument('--timeout', type=float, default=None, help="질문 하나당 제한 시간(초)")
+    parser.add_argument('--restart', action='store_true', help="기존 출력 파일을 지우고 처음부터 실행")
+    args = parser.parse_args()
+    
+    if args.restart and os.path.exists(args.output):
+        os.remove(args.output)
+    
+    batch = BatchRunner(args.agent, workers=args.workers, timeout=args.timeout)
+    try:
+        batch.run(args.input, args.output)
+    except KeyboardInterrupt:
+        print("\n⏸️ 중단되었습니다. 같은 명령을 다시 실행하면 이어서 진행합니다.")
+        print_summary(batch.summary())
+        sys.exit(130)
+    print_summary(batch.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""
+오프라인 벤치마크 모음
+저장소 루트에서 `python -m benchmarks.<이름>` 형태로 실행합니다.
+"""
@@ -0,0 +1,200 @@
+"""
+오프라인 에이전트 벤치마크
+가짜 LLM(benchmarks.fake_llm)과 로컬 스텁 HTTP 서버로 GeminiAgent와 smolagents CodeAgent 경로를
+단계별로 실행하고 처리량, p50/p95/p99 지연 시간, 호출당 메모리 할당량을 보고합니다.
+API 키나 네트워크 없이 실행되므로 릴리스마다 같은 조건으로 비교할 수 있습니다.
+
+    python -m benchmarks.agents --iterations 200 --llm-latency 0.05 --token-rate 500
+    python -m benchmarks.agents --stage gemini --json results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import time
+import tracemalloc
+
+from batch_runner import percentile
+from benchmarks.fake_llm import FakeGeminiModel, default_responder, make_fake_code_model
+from benchmarks.stub_server import start_stub_server
+from config import Config
+from tool_selector import ToolSelector
+
+
+class Stage:
+    """측정할 단계 (op(i)를 한 번 호출하면 items개를 처리)"""
+    
+    def __init__(self, name, op, items=1):
+        self.name = name
+        self.op = op
+        self.items = items
+
+
+def measure(stage, iterations, warmup, alloc_samples):
+    for i in range(warmup):
+        stage.op(i)
+    
+    latencies = []
+    start = time.perf_counter()
+    for i in range(warmup, warmup + iterations):
+        op_start = time.perf_counter()
+        stage.op(i)
+        latencies.append(time.perf_counter() - op_start)
+    elapsed = time.perf_counter() - start
+    
+    # tracemalloc은 실행을 느리게 하므로 시간 측정과 따로 실행하고, 호출 중 최대 추가 할당량을 기록
+    allocations = []
+    tracemalloc.start()
+    try:
+        for i in range(warmup + iterations, warmup + iterations + alloc_samples):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            stage.op(i)
+            allocations.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    
+    latencies.sort()
+    return {
+        'stage': stage.name,
+        'iterations': iterations,
+        'throughput': iterations * stage.items / elapsed,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'alloc_kb': sum(allocations) / len(allocations) / 1024 if allocations else None,
+    }
+
+
+def build_stages(args):
+    import simple_agent
+    import web_search_agent
+    from gemini_agent import GeminiAgent
+    from prerouter import create_prerouter
+    from provider_router import ProviderRouter
+    
+    model = FakeGeminiModel(latency=args.llm_latency, tokens_per_second=args.token_rate)
+    # 가끔 지연이 튀는 주 제공자와 보조 제공자 (헤지 요청의 꼬리 지연 개선 측정)
+    spiky = FakeGeminiModel(latency=args.llm_latency, tokens_per_second=args.token_rate, model_name='fake-primary',
+                            spike_every=args.spike_every, spike_latency=args.spike_latency)
+    hedged = ProviderRouter([
+        ('primary', FakeGeminiModel(latency=args.llm_latency, tokens_per_second=args.token_rate,
+                                    spike_every=args.spike_every, spike_latency=args.spike_latency)),
+        ('secondary', FakeGeminiModel(latency=args.llm_latency, tokens_per_second=args.token_rate)),
+    ], hedge_delay=args.hedge_delay)
+    spiky_agent = GeminiAgent(tools=simple_agent.tools, cache=None, model=spiky)
+    hedged_agent = GeminiAgent(tools=simple_agent.tools, cache=None, model=hedged)
+    calc_agent = GeminiAgent(tools=simple_agent.tools, cache=None, model=model)
+    search_agent = GeminiAgent(tools=web_search_agent.tools, cache=None, model=model)
+    if search_agent._selector is None:
+        # 도구 선택은 기본으로 꺼져 있으므로 측정용으로 직접 켬
+        search_agent._selector = ToolSelector(search_agent._registry.tools, top_k=2,
+                                              min_score=Config.TOOL_SELECTION_MIN_SCORE)
+    routed_agent = GeminiAgent(tools=simple_agent.tools, cache=None, model=model,
+                               prerouter=create_prerouter(simple_agent.tools))
+    # 도구 호출 뒤에 설명 문장을 덧붙이는 모델
+    chatty = FakeGeminiModel(
+        responder=lambda question: default_responder(question) + "\n검색 결과를 확인한 뒤 핵심만 정리해 드리겠습니다." * 3,
+        latency=args.llm_latency, tokens_per_second=args.token_rate,
+    )
+    early_agent = GeminiAgent(tools=web_search_agent.tools, cache=None, model=chatty)
+    late_agent = GeminiAgent(tools=web_search_agent.tools, cache=None, model=chatty)
+    late_agent.early_dispatch = False
+    registry = search_agent._registry
+    plain_reply = model.responder("파이썬이란 무엇인가요?")
+    tool_reply = model.responder("calculate: 2 + 3 * 4")
+    
+    def run_many(i):
+        prompts = [f"calculate: {i} + {n} * 2" for n in range(args.concurrency)]
+        asyncio.run(calc_agent.run_many(prompts, concurrency=args.concurrency))
+    
+    # 검색어/도시 이름을 매번 바꿔 캐시가 아닌 HTTP 경로를 측정
+    stages = [
+        Stage('prompt.build', lambda i: search_agent._build_contents(registry, f"질문 {i}")),
+        Stage('tool.select', lambda i: search_agent._select_tools(registry, f"도시 {i} 날씨 알려줘")),
+        Stage('response.parse', lambda i: search_agent._handle_response(plain_reply, registry)),
+        Stage('response.tool_dispatch', lambda i: calc_agent._handle_response(tool_reply, calc_agent._registry)),
+        Stage('tool.calculate', lambda i: simple_agent.calculate(f"({i} + 3) * 4 / 2")),
+        Stage('tool.search_web (http)', lambda i: web_search_agent.search_web(f"python {i}")),
+        Stage('tool.get_weather_info (http)', lambda i: web_search_agent.get_weather_info(f"city-{i}")),
+        Stage('gemini.run (text)', lambda i: calc_agent.run(f"질문 {i}")),
+        Stage('gemini.run (calculate)', lambda i: calc_agent.run(f"calculate: {i} + 3 * 4")),
+        Stage('gemini.run (search_web)', lambda i: search_agent.run(f"search_web: bench {i}")),
+        # 도구 세 개를 한 응답에서 동시에 실행 (HTTP 지연이 있을 때 search_web 하나와 비슷해야 함)
+        Stage('gemini.run (3 tools, parallel)', lambda i: search_agent.run(
+            f"search_web: bench {i} ; get_weather_info: city-{i} ; search_web: other {i}")),
+        # 도구 호출 뒤에 설명이 이어지는 응답: 응답이 끝난 뒤 실행 vs INPUT 줄이 끝나자마자 실행
+        # (--token-rate, --http-latency를 주면 도구 I/O와 나머지 생성이 겹치는 만큼 빨라짐)
+        Stage('gemini.run (tool + text, after response)', lambda i: late_agent.run(f"search_web: late {i}")),
+        Stage('gemini.run (tool + text, early dispatch)', lambda i: early_agent.run(f"search_web: early {i}")),
+        Stage('gemini.run (prerouted calculate)', lambda i: routed_agent.run(f"{i} + 3 * 4를 계산해줘")),
+        Stage('gemini.run_stream (text)', lambda i: list(calc_agent.run_stream(f"질문 {i}"))),
+        Stage('gemini.run (spiky provider)', lambda i: spiky_agent.run(f"질문 {i}")),
+        Stage('gemini.run (hedged)', lambda i: hedged_agent.run(f"질문 {i}")),
+        Stage(f'gemini.run_many (x{args.concurrency})', run_many, items=args.concurrency),
+    ]
+    
+    if not args.skip_code_agent:
+        from smolagents import CodeAgent, tool
+        from smolagents.monitoring import LogLevel
+        code_agent = CodeAgent(
+            tools=[tool(function) for function in simple_agent.tools],
+            model=make_fake_code_model(latency=args.llm_latency, tokens_per_second=args.token_rate),
+            verbosity_level=LogLevel.OFF,
+        )
+        stages.append(Stage('code_agent.run (calculate)', lambda i: code_agent.run(f"calculate: {i} + 3 * 4")))
+    
+    return [stage for stage in stages if not args.stage or any(s in stage.name for s in args.stage)]
+
+
+def print_results(results):
+    print(f"{'단계':<40} {'처리량(/s)':>12} {'p50(ms)':>10} {'p95(ms)':>10} {'p99(ms)':>10} {'할당(KB)':>10}")
+    print('-' * 98)
+    for r in results:
+        alloc = f"{r['alloc_kb']:10.1f}" if r['alloc_kb'] is not None else f"{'-':>10}"
+        print(f"{r['stage']:<40} {r['throughput']:12.1f} {r['p50_ms']:10.3f} {r['p95_ms']:10.3f} "
+              f"{r['p99_ms']:10.3f} {alloc}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오프라인 에이전트 벤치마크 (가짜 LLM + 스텁 서버)")
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--alloc-samples', type=int, default=20, help="할당량 측정 반복 수 (0이면 생략)")
+    parser.add_argument('--llm-latency', type=float, default=0.0, help="가짜 LLM 첫 토큰 지연(초)")
+    parser.add_argument('--token-rate', type=float, default=0.0, help="가짜 LLM 초당 토큰 수 (0이면 즉시)")
+    parser.add_argument('--http-latency', type=float, default=0.0, help="스텁 서버 응답 지연(초)")
+    parser.add_argument('--spike-every', type=int, default=10, help="주 제공자 지연이 튀는 호출 간격 (0이면 없음)")
+    parser.add_argument('--spike-latency', type=float, default=0.2, help="튀는 호출에 더할 지연(초)")
+    parser.add_argument('--hedge-delay', type=float, default=0.02, help="보조 제공자에 헤지 요청을 보내기까지 기다릴 시간(초)")
+    parser.add_argument('--concurrency', type=int, default=8, help="run_many 동시 실행 수")
+    parser.add_argument('--stage', action='append', help="이름에 이 문자열이 들어간 단계만 실행 (여러 번 지정 가능)")
+    parser.add_argument('--skip-code-agent', action='store_true', help="smolagents CodeAgent 단계 생략")
+    parser.add_argument('--json', help="결과를 JSON 파일로 저장 (릴리스 간 비교용)")
+    args = parser.parse_args()
+    
+    server = start_stub_server(latency=args.http_latency)
+    Config.SEARCH_API_URL = server.url + '/'
+    Config.WEATHER_API_URL = server.url + '/data/2.5/weather'
+    os.environ['OPENWEATHER_API_KEY'] = 'benchmark'
+    try:
+        results = [measure(stage, args.iterations, args.warmup, args.alloc_samples) for stage in build_stages(args)]
+    finally:
+        server.shutdown()
+    
+    print_results(results)
+    if args.json:
+        report = {
+            'python': platform.python_version(),
+            'settings': {key: value for key, value in vars(args).items() if key != 'json'},
+            'results': results,
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 결과를 {args.json}에 저장했습니다.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+벤치마크용 로컬 가짜 LLM
+실제 Gemini/OpenAI를 호출하지 않고, 정해진 첫 토큰 지연과 토큰 생성 속도로
+미리 정한 응답(TOOL_USE 도구 호출 포함)을 돌려줍니다.
+
+질문이 "도구이름: 입력" 형태이면 그 도구를 호출하는 응답을, 아니면 일반 텍스트 응답을 만듭니다.
+    "calculate: 2 + 3 * 4"  ->  "TOOL_USE: calculate\\nINPUT: 2 + 3 * 4"
+    "search_web: a ; search_web: b"  ->  도구 호출 두 개
+"""
+
+import asyncio
+import re
+import time
+
+_TOOL_PROMPT_RE = re.compile(r'^\s*(?P<tool>[A-Za-z_]\w*)\s*:\s*(?P<input>.+?)\s*$', re.DOTALL)
+_TASK_RE = re.compile(r'사용자 질문: (?P<question>.*)$', re.DOTALL)
+
+
+def default_responder(question):
+    """질문에서 응답 텍스트를 만드는 기본 규칙 (" ; "로 나누면 도구 호출 여러 개)"""
+    matches = [_TOOL_PROMPT_RE.match(part) for part in question.split(' ; ')]
+    if all(matches):
+        calls = ''.join(f"\nTOOL_USE: {match.group('tool')}\nINPUT: {match.group('input')}" for match in matches)
+        return f"{', '.join(match.group('tool') for match in matches)} 도구를 사용하겠습니다.{calls}"
+    return f"'{question}'에 대한 가짜 모델의 답변입니다. " + "벤치마크용 응답 문장입니다. " * 8
+
+
+def split_tokens(text):
+    """공백을 포함한 단어 단위 토큰 (이어 붙이면 원문과 같음)"""
+    return re.findall(r'\S+\s*|\s+', text)
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """google.generativeai.GenerativeModel 대신 GeminiAgent(model=...)에 넣는 가짜 모델
+
+    Args:
+        responder: 질문 문자열 -> 응답 문자열 함수 (기본: default_responder)
+        latency: 첫 토큰까지 걸리는 시간(초)
+        tokens_per_second: 토큰 생성 속도 (0이면 생성 시간 없음)
+        chunk_tokens: 스트리밍할 때 조각 하나에 담을 토큰 수
+        spike_every, spike_latency: spike_every번째 호출마다 첫 토큰 지연에 spike_latency초를 더함 (꼬리 지연 재현)
+        model_name: 모델 이름 (가짜 제공자 여러 개를 구분할 때 사용)
+    """
+    
+    model_name = 'fake-gemini'
+    
+    def __init__(self, responder=None, latency=0.0, tokens_per_second=0.0, chunk_tokens=4,
+                 spike_every=0, spike_latency=0.0, model_name=None):
+        self.responder = responder or default_responder
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.chunk_tokens = chunk_tokens
+        self.spike_every = spike_every
+        self.spike_latency = spike_latency
+        if model_name:
+            self.model_name = model_name
+        self.calls = 0
+    
+    def _first_token_latency(self):
+        if self.spike_every and self.calls % self.spike_every == 0:
+            return self.latency + self.spike_latency
+        return self.latency
+    
+    def _respond(self, contents):
+        self.calls += 1
+        prompt = contents[-1] if isinstance(contents, (list, tuple)) else contents
+        match = _TASK_RE.search(prompt)
+        return split_tokens(self.responder(match.group('question') if match else prompt))
+    
+    def _generation_time(self, token_count):
+        return token_count / self.tokens_per_second if self.tokens_per_second else 0.0
+    
+    def generate_content(self, contents, stream=False):
+        tokens = self._respond(contents)
+        latency = self._first_token_latency()
+        if stream:
+            return self._stream(tokens, latency)
+        time.sleep(latency + self._generation_time(len(tokens)))
+        return FakeResponse(''.join(tokens))
+    
+    def _stream(self, tokens, latency):
+        time.sleep(latency)
+        for start in range(0, len(tokens), self.chunk_tokens):
+            chunk = tokens[start:start + self.chunk_tokens]
+            time.sleep(self._generation_time(len(chunk)))
+            yield FakeResponse(''.join(chunk))
+    
+    async def generate_content_async(self, contents):
+        tokens = self._respond(contents)
+        await asyncio.sleep(self._first_token_latency() + self._generation_time(len(tokens)))
+        return FakeResponse(''.join(tokens))
+
+
+def make_fake_code_model(latency=0.0, tokens_per_second=0.0):
+    """smolagents CodeAgent용 가짜 모델 생성
+
+    질문이 "도구이름: 입력"이면 그 도구를 호출한 결과를 final_answer로 돌려주는 코드를,
+    아니면 질문을 그대로 final_answer로 돌려주는 코드를 생성합니다.
+    """
+    from smolagents.models import ChatMessage, MessageRole, Model
+    
+    class FakeCodeModel(Model):
+        def __init__(self):
+            super().__init__(model_id='fake-code-model')
+            self.latency = latency
+            self.tokens_per_second = tokens_per_second
+            self.calls = 0
+        
+        def generate(self, messages, stop_sequences=None, response_format=None, tools_to_call_from=None, **kwargs):
+            self.calls += 1
+            question = _last_task(messages)
+            match = _TOOL_PROMPT_RE.match(question)
+            if match:
+                code = f"result = {match.group('tool')}({match.group('input')!r})\nfinal_answer(result)"
+            else:
+                code = f"final_answer({question!r})"
+            text = f"Thought: 도구를 호출합니다.\n<code>\n{code}\n</code>"
+            token_count = len(split_tokens(text))
+            time.sleep(self.latency + (token_count / self.tokens_per_second if self.tokens_per_second else 0.0))
+            return ChatMessage(role=MessageRole.ASSISTANT, content=text)
+    
+    return FakeCodeModel()
+
+
+def _last_task(messages):
+    """smolagents 메시지 목록에서 마지막 작업(질문) 텍스트"""
+    for message in reversed(messages):
+        content = message.content if hasattr(message, 'content') else message.get('content')
+        if isinstance(content, list):
+            content = ''.join(part.get('text', '') for part in content if isinstance(part, dict))
+        if content and 'New task:' in content:
+            return content.rsplit('New task:', 1)[1].strip()
+    return ''
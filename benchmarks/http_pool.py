@@ -0,0 +1,49 @@
+"""
+HTTP 커넥션 풀 벤치마크
+매번 새 연결을 여는 requests.get과 공유 HTTPClient(keep-alive)의 호출당 시간을 비교합니다.
+
+    python -m benchmarks.http_pool --calls 500 --threads 8
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.stub_server import start_stub_server
+from http_client import HTTPClient
+
+
+def measure(label, get, url, calls, threads):
+    params = {'q': 'python', 'format': 'json'}
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda _: get(url, params=params).json(), range(calls)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {calls / elapsed:8.1f} req/s   {elapsed / calls * 1000 * threads:7.3f} ms/call")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP 커넥션 풀 벤치마크")
+    parser.add_argument('--calls', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.0, help="스텁 서버 응답 지연(초)")
+    args = parser.parse_args()
+    
+    server = start_stub_server(latency=args.latency)
+    url = server.url + '/'
+    try:
+        bare = measure("requests.get (매번 연결)", lambda u, params: requests.get(u, params=params, timeout=10),
+                       url, args.calls, args.threads)
+        client = HTTPClient(pool_size=args.threads)
+        pooled = measure("HTTPClient (keep-alive)", client.get, url, args.calls, args.threads)
+        client.close()
+        print(f"\n호출당 오버헤드 감소: {(1 - pooled / bare) * 100:.1f}%")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+시작 시간 벤치마크
+구성 요소마다 새 파이썬 프로세스를 띄워 import 비용과 에이전트 생성 비용을 측정합니다.
+
+    python -m benchmarks.startup --repeat 5
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (이름, 미리 실행할 코드, 측정할 코드)
+COMPONENTS = [
+    ("import config", "", "import config"),
+    ("import google.generativeai", "", "import google.generativeai"),
+    ("import smolagents", "", "import smolagents"),
+    ("import streamlit", "", "import streamlit"),
+    ("import gemini_agent", "", "import gemini_agent"),
+    ("import simple_agent", "", "import simple_agent"),
+    ("import web_search_agent", "", "import web_search_agent"),
+    ("계산 에이전트 생성", "import agent_registry", "agent_registry.get_agent('calculator')"),
+    ("검색 에이전트 생성", "import agent_registry", "agent_registry.get_agent('search')"),
+    ("두 에이전트 생성", "import agent_registry",
+     "agent_registry.get_agent('calculator'); agent_registry.get_agent('search')"),
+]
+
+_SCRIPT = """
+import time, warnings
+warnings.simplefilter('ignore')
+{setup}
+_start = time.perf_counter()
+{code}
+print(time.perf_counter() - _start)
+"""
+
+
+def measure(setup, code):
+    """새 프로세스에서 code 실행 시간(초) 측정"""
+    result = subprocess.run(
+        [sys.executable, '-c', _SCRIPT.format(setup=setup, code=code)],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else "실행 실패")
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="import / 에이전트 생성 시간 측정")
+    parser.add_argument('--repeat', type=int, default=3, help="구성 요소당 반복 횟수 (중앙값 사용)")
+    args = parser.parse_args()
+    
+    print(f"{'구성 요소':<28} {'중앙값(ms)':>10} {'최소(ms)':>10}")
+    print("-" * 52)
+    for name, setup, code in COMPONENTS:
+        try:
+            samples = [measure(setup, code) * 1000 for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{name:<28} 실패: {e}")
+            continue
+        print(f"{name:<28} {statistics.median(samples):>10.1f} {min(samples):>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+벤치마크용 로컬 스텁 HTTP 서버
+DuckDuckGo / OpenWeatherMap과 비슷한 JSON을 돌려주며, keep-alive(HTTP/1.1)를 지원합니다.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+        if server.latency:
+            time.sleep(server.latency)
+        
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path.startswith('/data/2.5/weather'):
+            body = {
+                'name': params.get('q', ''),
+                'main': {'temp': 21.5, 'humidity': 40},
+                'weather': [{'description': '맑음'}],
+            }
+        else:
+            body = {'Abstract': f"{params.get('q', '')}에 대한 스텁 검색 결과", 'Answer': '', 'RelatedTopics': []}
+        
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0):
+        super().__init__((host, port), StubHandler)
+        self.latency = latency
+        self.request_count = 0
+        self.lock = threading.Lock()
+    
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_stub_server(latency=0.0):
+    """백그라운드 스레드에서 스텁 서버를 띄우고 반환 (종료: server.shutdown())"""
+    server = StubServer(latency=latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,233 @@
+"""
+LRU + TTL 캐시
+에이전트 응답처럼 반복되는 결과를 메모리(및 선택적으로 SQLite 파일)에 보관합니다.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def make_cache_key(*parts):
+    """여러 값을 묶어 고정 길이 캐시 키 생성"""
+    digest = hashlib.sha256()
+    for part in parts:
+        data = str(part).encode('utf-8')
+        # 길이를 함께 넣어 ("ab", "c")와 ("a", "bc")가 충돌하지 않도록 함
+        digest.update(len(data).to_bytes(8, 'big'))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class SQLiteStore:
+    """프로세스 재시작 후에도 유지되는 SQLite 캐시 저장소"""
+    
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+    
+    def get(self, key):
+        """값 반환 (없거나 만료되었으면 None)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= time.time():
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+        return json.loads(row[0]), row[1]
+    
+    def set(self, key, value, expires_at):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at),
+            )
+            self._conn.commit()
+    
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._conn.commit()
+    
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class LRUTTLCache:
+    """크기 제한(LRU)과 항목별 만료 시간(TTL)을 가진 스레드 안전 캐시
+
+    persist_path를 지정하면 SQLite 2차 저장소를 함께 사용하여
+    메모리에서 밀려나거나 프로세스가 재시작된 뒤에도 항목을 되살립니다.
+    2차 저장소에 넣는 값은 JSON으로 직렬화할 수 있어야 합니다.
+    keep_stale=True이면 만료된 항목도 LRU로 밀려날 때까지 메모리에 남겨 두어
+    get_stale()로 꺼낼 수 있습니다 (업스트림 장애 시 대체 값으로 사용).
+    """
+    
+    def __init__(self, maxsize=256, ttl=300, persist_path=None, keep_stale=False):
+        if maxsize <= 0:
+            raise ValueError("maxsize는 1 이상이어야 합니다.")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.keep_stale = keep_stale
+        self._data = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._store = SQLiteStore(persist_path) if persist_path else None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, key, default=None):
+        """캐시 조회 (최근 사용 순서 갱신)"""
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                if not self.keep_stale:
+                    del self._data[key]
+                self.expirations += 1
+        
+        if self._store is not None:
+            stored = self._store.get(key)
+            if stored is not None:
+                value, expires_at = stored
+                with self._lock:
+                    self._put(key, value, expires_at)
+                    self.hits += 1
+                return value
+        
+        with self._lock:
+            self.misses += 1
+        return default
+    
+    def peek(self, key):
+        """통계와 LRU 순서를 바꾸지 않고 메모리에 있는 유효한 값만 확인"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] > time.time():
+                return entry[0]
+        return None
+    
+    def get_stale(self, key):
+        """만료 여부와 관계없이 메모리에 남아 있는 값 반환 (keep_stale=True일 때 의미 있음)"""
+        with self._lock:
+            entry = self._data.get(key)
+            return entry[0] if entry is not None else None
+    
+    def set(self, key, value, ttl=None):
+        """캐시 저장 (ttl을 생략하면 기본 TTL 사용)"""
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._put(key, value, expires_at)
+        if self._store is not None:
+            self._store.set(key, value, expires_at)
+    
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+        if self._store is not None:
+            self._store.delete(key)
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+        if self._store is not None:
+            self._store.clear()
+    
+    def stats(self):
+        """히트/미스 등 캐시 통계 반환"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+    
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+    
+    def _put(self, key, value, expires_at):
+        # 호출 측에서 self._lock을 잡고 있어야 함
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """같은 키로 동시에 들어온 호출을 하나로 합치는 도우미
+
+    먼저 들어온 호출만 실제로 함수를 실행하고, 실행 중에 같은 키로 들어온
+    호출들은 그 결과(또는 예외)를 함께 받습니다.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executions = 0
+        self.coalesced = 0
+    
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+                leader = True
+        
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
@@ -0,0 +1,141 @@
+"""
+여러 턴 대화 세션
+최근 대화는 토큰 예산 안에서 그대로 유지하고, 예산을 넘는 오래된 대화는 요약으로 압축합니다.
+요약도 정해진 길이를 넘지 않으므로 대화가 길어져도 턴마다 보내는 프롬프트 크기(지연 시간, 비용)는 일정합니다.
+"""
+
+import threading
+from collections import deque
+
+from config import Config
+from tool_selector import estimate_tokens
+
+ERROR_PREFIX = "오류가 발생했습니다"
+
+
+def _shorten(text, limit):
+    text = ' '.join(str(text).split())
+    return text if len(text) <= limit else text[:limit - 1] + '…'
+
+
+def summarize_turns(summary, turns, max_tokens):
+    """기본 요약: 턴마다 질문과 답의 앞부분만 한 줄로 남기고, 예산을 넘으면 오래된 줄부터 버림
+
+    LLM을 호출하지 않으므로 압축이 일어나는 턴도 지연 시간이 늘지 않습니다.
+    """
+    lines = summary.split('\n') if summary else []
+    for user, assistant in turns:
+        lines.append(f"- 사용자: {_shorten(user, 80)} / 답변: {_shorten(assistant, 120)}")
+    while lines and estimate_tokens('\n'.join(lines)) > max_tokens:
+        lines.pop(0)
+    return '\n'.join(lines)
+
+
+def make_llm_summarizer(model):
+    """모델(generate_content)로 요약하는 summarizer 생성 (실패하면 기본 요약 사용)
+
+    압축이 일어나는 턴에만 LLM 호출이 한 번 더 생깁니다.
+    """
+    def summarize(summary, turns, max_tokens):
+        conversation = '\n'.join(f"사용자: {user}\n어시스턴트: {assistant}" for user, assistant in turns)
+        prompt = (
+            f"다음 대화를 이후 질문에 필요한 사실 위주로 {max_tokens * 2}자 이내로 요약하세요.\n\n"
+            f"기존 요약:\n{summary or '(없음)'}\n\n새 대화:\n{conversation}"
+        )
+        try:
+            text = model.generate_content(prompt).text.strip()
+        except Exception:
+            return summarize_turns(summary, turns, max_tokens)
+        return summarize_turns(text, [], max_tokens)
+    return summarize
+
+
+class AgentSession:
+    """GeminiAgent 위의 대화 세션 (run / run_stream / arun은 에이전트와 같은 방식으로 사용)
+
+    Args:
+        agent: GeminiAgent (run, run_stream, arun이 context 인자를 받는 에이전트)
+        history_tokens: 그대로 보낼 최근 대화의 최대 토큰 수
+        summary_tokens: 오래된 대화 요약의 최대 토큰 수
+        summarizer: (기존 요약, [(질문, 답)], 최대 토큰) -> 새 요약 함수 (기본: summarize_turns)
+    """
+    
+    def __init__(self, agent, history_tokens=None, summary_tokens=None, summarizer=None):
+        self.agent = agent
+        self.history_tokens = history_tokens or Config.SESSION_HISTORY_TOKENS
+        self.summary_tokens = summary_tokens or Config.SESSION_SUMMARY_TOKENS
+        self.summarizer = summarizer or summarize_turns
+        self.summary = ''
+        self.turns = deque()   # 최근 (질문, 답) 목록
+        self.turn_count = 0
+        self.compactions = 0
+        self._turn_tokens = deque()
+        self._history_size = 0
+        # 같은 세션의 턴은 앞 턴의 답을 알아야 하므로 한 번에 하나씩만 실행
+        self._lock = threading.Lock()
+    
+    def context(self):
+        """다음 질문 앞에 넣을 이전 대화 문자열 목록"""
+        context = []
+        if self.summary:
+            context.append(f"이전 대화 요약:\n{self.summary}")
+        if self.turns:
+            context.append("최근 대화:\n" + '\n'.join(
+                f"사용자: {user}\n어시스턴트: {assistant}" for user, assistant in self.turns
+            ))
+        return context
+    
+    def run(self, prompt):
+        with self._lock:
+            result = self.agent.run(prompt, context=self.context())
+            self._record(prompt, result)
+            return result
+    
+    def run_stream(self, prompt):
+        with self._lock:
+            chunks = []
+            for chunk in self.agent.run_stream(prompt, context=self.context()):
+                chunks.append(chunk)
+                yield chunk
+            self._record(prompt, ''.join(chunks))
+    
+    async def arun(self, prompt, timeout=None):
+        # asyncio 안에서 threading.Lock으로 기다리지 않도록 턴 순서는 호출 측이 보장
+        result = await self.agent.arun(prompt, timeout=timeout, context=self.context())
+        self._record(prompt, result)
+        return result
+    
+    def reset(self):
+        """대화 기록 삭제"""
+        self.summary = ''
+        self.turns.clear()
+        self._turn_tokens.clear()
+        self._history_size = 0
+    
+    def stats(self):
+        return {
+            'turns': self.turn_count,
+            'recent_turns': len(self.turns),
+            'history_tokens': self._history_size,
+            'summary_tokens': estimate_tokens(self.summary),
+            'compactions': self.compactions,
+        }
+    
+    def _record(self, prompt, result):
+        if str(result).startswith(ERROR_PREFIX):
+            return  # 실패한 턴은 다음 질문의 맥락으로 쓰지 않음
+        result = str(result)
+        tokens = estimate_tokens(prompt) + estimate_tokens(result)
+        self.turns.append((prompt, result))
+        self._turn_tokens.append(tokens)
+        self._history_size += tokens
+        self.turn_count += 1
+        
+        if self._history_size > self.history_tokens:
+            # 예산 안으로 들어올 때까지 오래된 턴을 떼어 요약에 합침
+            old_turns = []
+            while self.turns and self._history_size > self.history_tokens:
+                old_turns.append(self.turns.popleft())
+                self._history_size -= self._turn_tokens.popleft()
+            self.summary = self.summarizer(self.summary, old_turns, self.summary_tokens)
+            self.compactions += 1
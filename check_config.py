@@ -3,67 +3,69 @@
 설정 확인 및 테스트 스크립트
 """
 
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from config import Config
-import google.generativeai as genai
 
-def test_gemini_connection():
-    """Gemini API 연결 테스트"""
-    try:
-        config = Config.get_model_config()
-        if not config or config['provider'] != 'gemini':
-            print("❌ Gemini가 기본 모델로 설정되지 않았습니다.")
-            return False
-        
-        # Gemini API 설정
-        genai.configure(api_key=config['api_key'])
-        model = genai.GenerativeModel(config['model'])
-        
-        # 간단한 테스트 요청
-        response = model.generate_content("안녕하세요! 간단한 테스트입니다.")
-        
-        if response.text:
-            print("✅ Gemini API 연결 성공!")
-            print(f"테스트 응답: {response.text[:100]}...")
-            return True
-        else:
-            print("❌ Gemini API 응답이 비어있습니다.")
-            return False
-            
-    except Exception as e:
-        print(f"❌ Gemini API 연결 실패: {str(e)}")
-        return False
+TEST_PROMPT = "안녕하세요! 간단한 테스트입니다."
+TEST_TIMEOUT = 20  # 키 하나를 테스트할 때 기다릴 최대 시간(초)
 
-def test_openai_connection():
-    """OpenAI API 연결 테스트"""
-    try:
-        import openai
-        from openai import OpenAI
-        
-        config = Config.get_model_config()
-        if not config or config['provider'] != 'openai':
-            print("❌ OpenAI가 기본 모델로 설정되지 않았습니다.")
-            return False
-        
-        client = OpenAI(api_key=config['api_key'])
-        
-        # 간단한 테스트 요청
-        response = client.chat.completions.create(
-            model=config['model'],
-            messages=[{"role": "user", "content": "안녕하세요! 간단한 테스트입니다."}],
-            max_tokens=50
-        )
-        
-        if response.choices[0].message.content:
-            print("✅ OpenAI API 연결 성공!")
-            print(f"테스트 응답: {response.choices[0].message.content[:100]}...")
-            return True
-        else:
-            print("❌ OpenAI API 응답이 비어있습니다.")
-            return False
-            
-    except Exception as e:
-        print(f"❌ OpenAI API 연결 실패: {str(e)}")
+def test_gemini_connection(api_key, model_name):
+    """Gemini API 키 하나로 테스트 요청 (응답 텍스트 반환, 실패하면 예외)"""
+    from provider_router import GeminiKeyModel
+    
+    model = GeminiKeyModel(model_name, api_key)
+    response = model.generate_content(TEST_PROMPT, request_options={'timeout': TEST_TIMEOUT, 'retry': None})
+    if not response.text:
+        raise ValueError("응답이 비어있습니다.")
+    return response.text
+
+def test_openai_connection(api_key, model_name):
+    """OpenAI API 키 하나로 테스트 요청 (응답 텍스트 반환, 실패하면 예외)"""
+    from openai import OpenAI
+    
+    client = OpenAI(api_key=api_key)
+    response = client.chat.completions.create(
+        model=model_name,
+        messages=[{"role": "user", "content": TEST_PROMPT}],
+        max_tokens=50,
+        timeout=TEST_TIMEOUT
+    )
+    if not response.choices[0].message.content:
+        raise ValueError("응답이 비어있습니다.")
+    return response.choices[0].message.content
+
+def test_all_keys():
+    """설정된 모든 API 키를 동시에 테스트하고 결과 출력 (모두 성공하면 True)"""
+    checks = [
+        ('Gemini', key, test_gemini_connection, Config.GEMINI_MODEL) for key in Config.GEMINI_API_KEYS
+    ] + [
+        ('OpenAI', key, test_openai_connection, Config.OPENAI_MODEL) for key in Config.OPENAI_API_KEYS
+    ]
+    if not checks:
+        print("❌ 테스트할 API 키가 없습니다.")
         return False
+    
+    def run_check(check):
+        provider, key, test, model_name = check
+        start = time.perf_counter()
+        try:
+            return True, test(key, model_name), time.perf_counter() - start
+        except Exception as e:
+            return False, str(e), time.perf_counter() - start
+    
+    # 키마다 순서대로 기다리지 않도록 모든 키를 한꺼번에 요청
+    with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+        results = list(executor.map(run_check, checks))
+    
+    for (provider, key, _, _), (success, message, elapsed) in zip(checks, results):
+        masked_key = Config._mask_api_key(key)
+        if success:
+            print(f"✅ {provider} {masked_key} 연결 성공 ({elapsed:.2f}초): {message[:60]}...")
+        else:
+            print(f"❌ {provider} {masked_key} 연결 실패 ({elapsed:.2f}초): {message}")
+    return all(success for success, _, _ in results)
 
 def main():
     """메인 함수"""
@@ -85,14 +87,9 @@ def main():
     print("✅ 설정 유효성 검사 통과!")
     print()
     
-    # API 연결 테스트
-    config = Config.get_model_config()
-    if config['provider'] == 'gemini':
-        print("🧪 Gemini API 연결 테스트 중...")
-        test_gemini_connection()
-    elif config['provider'] == 'openai':
-        print("🧪 OpenAI API 연결 테스트 중...")
-        test_openai_connection()
+    # 설정된 모든 API 키 연결 테스트
+    print("🧪 API 키 연결 테스트 중...")
+    test_all_keys()
     
     print("\n" + "=" * 50)
     print("🎉 설정 확인 완료!")
@@ -9,23 +9,121 @@ from dotenv import load_dotenv
 # 환경 변수 로드
 load_dotenv()
 
+def _api_keys(list_name, single_name):
+    """쉼표로 구분한 키 목록 환경 변수(없으면 키 하나짜리 환경 변수)에서 API 키 목록 생성"""
+    keys = [key.strip() for key in os.getenv(list_name, '').split(',') if key.strip()]
+    if not keys and os.getenv(single_name):
+        keys = [os.getenv(single_name)]
+    return keys
+
 class Config:
     """설정 클래스"""
     
-    # OpenAI 설정
-    OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+    # OpenAI 설정 (OPENAI_API_KEYS에 쉼표로 여러 키를 주면 키 풀로 나눠 사용)
+    OPENAI_API_KEYS = _api_keys('OPENAI_API_KEYS', 'OPENAI_API_KEY')
+    OPENAI_API_KEY = OPENAI_API_KEYS[0] if OPENAI_API_KEYS else None
     OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
     
-    # Google Gemini 설정
-    GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+    # Google Gemini 설정 (GEMINI_API_KEYS에 쉼표로 여러 키를 주면 키 풀로 나눠 사용)
+    GEMINI_API_KEYS = _api_keys('GEMINI_API_KEYS', 'GEMINI_API_KEY')
+    GEMINI_API_KEY = GEMINI_API_KEYS[0] if GEMINI_API_KEYS else None
     GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-1.5-flash')
     
     # OpenWeatherMap 설정 (선택적)
     OPENWEATHER_API_KEY = os.getenv('OPENWEATHER_API_KEY')
+    WEATHER_CACHE_SIZE = int(os.getenv('WEATHER_CACHE_SIZE', '512'))
+    WEATHER_CACHE_TTL = float(os.getenv('WEATHER_CACHE_TTL', '300'))  # 도시별 날씨 유지 시간(초)
+    WEATHER_MAX_WORKERS = int(os.getenv('WEATHER_MAX_WORKERS', '8'))  # 여러 도시 동시 조회 수
     
     # 기본 모델 설정
     DEFAULT_MODEL = os.getenv('DEFAULT_MODEL', 'gemini')  # 'openai' 또는 'gemini'
     
+    # 보조 LLM 제공자 (provider_router.py): 'openai' 또는 'gemini:<모델 이름>', 비우면 사용 안 함
+    FALLBACK_MODEL = os.getenv('FALLBACK_MODEL', '')
+    HEDGE_DELAY = float(os.getenv('HEDGE_DELAY', '2.0'))  # 이 시간(초) 안에 응답이 없으면 보조 제공자에도 요청 (음수면 장애 조치만)
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))  # 연속 실패 시 제공자 차단
+    CIRCUIT_RESET_TIMEOUT = float(os.getenv('CIRCUIT_RESET_TIMEOUT', '30'))  # 차단 후 다시 시도하기까지 시간(초)
+    
+    # LLM 제공자별 할당량과 동시 실행 제어 (rate_limit.py, 키 하나당 값, 0이면 제한 없음)
+    GEMINI_RPM = int(os.getenv('GEMINI_RPM', '0'))  # 분당 요청 수
+    GEMINI_TPM = int(os.getenv('GEMINI_TPM', '0'))  # 분당 토큰 수
+    OPENAI_RPM = int(os.getenv('OPENAI_RPM', '0'))
+    OPENAI_TPM = int(os.getenv('OPENAI_TPM', '0'))
+    LLM_MIN_CONCURRENCY = int(os.getenv('LLM_MIN_CONCURRENCY', '1'))  # 429가 계속되어도 유지할 동시 호출 수
+    LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '16'))  # 동시 호출 수 상한 (처음 값)
+    LLM_RATE_LIMIT_RETRIES = int(os.getenv('LLM_RATE_LIMIT_RETRIES', '5'))  # 429/타임아웃 재시도 횟수
+    LLM_OUTPUT_TOKENS = int(os.getenv('LLM_OUTPUT_TOKENS', '256'))  # TPM 예약에 쓰는 예상 출력 토큰 수
+    API_KEY_COOLDOWN = float(os.getenv('API_KEY_COOLDOWN', '30'))  # 429를 받은 키를 쉬게 할 시간(초)
+    
+    # 응답 캐시 설정 (RESPONSE_CACHE_SIZE=0이면 비활성화)
+    RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '256'))
+    RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', '300'))
+    RESPONSE_CACHE_PATH = os.getenv('RESPONSE_CACHE_PATH')  # 지정 시 SQLite 파일에 영구 저장
+    
+    # 비슷한 질문 응답 캐시 (semantic_cache.py, SEMANTIC_CACHE_SIZE=0이면 비활성화)
+    SEMANTIC_CACHE_SIZE = int(os.getenv('SEMANTIC_CACHE_SIZE', '512'))
+    SEMANTIC_CACHE_TTL = float(os.getenv('SEMANTIC_CACHE_TTL', '300'))
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.85'))  # 같은 질문으로 볼 유사도
+    SEMANTIC_CACHE_AUDIT_RATE = float(os.getenv('SEMANTIC_CACHE_AUDIT_RATE', '0.05'))  # 적중 중 새로 실행해 비교할 비율
+    SEMANTIC_CACHE_AUDIT_MIN_SIMILARITY = float(os.getenv('SEMANTIC_CACHE_AUDIT_MIN_SIMILARITY', '0.5'))  # 이보다 다르면 잘못된 적중
+    
+    # 질문별 도구 선택 (도구가 TOP_K개보다 많으면 관련 도구만 시스템 프롬프트에 포함, 기본값 0은 비활성화)
+    TOOL_SELECTION_TOP_K = int(os.getenv('TOOL_SELECTION_TOP_K', '0'))
+    TOOL_SELECTION_MIN_SCORE = float(os.getenv('TOOL_SELECTION_MIN_SCORE', '0.1'))  # 이보다 낮으면 전체 도구 사용
+    
+    # 한 응답의 여러 도구 호출 (동시에 실행)
+    TOOL_MAX_CALLS = int(os.getenv('TOOL_MAX_CALLS', '8'))  # 응답 하나에서 실행할 최대 도구 호출 수
+    TOOL_MAX_WORKERS = int(os.getenv('TOOL_MAX_WORKERS', '16'))  # 도구 동시 실행 스레드 수 (모든 에이전트 공유)
+    TOOL_TIMEOUT = float(os.getenv('TOOL_TIMEOUT', '30'))  # 도구 호출 하나를 기다릴 최대 시간(초)
+    # 응답을 스트리밍으로 받으며 완성된 도구 호출은 응답이 끝나기 전에 실행 시작
+    TOOL_EARLY_DISPATCH = os.getenv('TOOL_EARLY_DISPATCH', 'true').lower() in ('1', 'true', 'yes')
+    
+    # LLM을 거치지 않는 빠른 경로 (prerouter.py)
+    PREROUTE_ENABLED = os.getenv('PREROUTE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    PREROUTE_MIN_CONFIDENCE = float(os.getenv('PREROUTE_MIN_CONFIDENCE', '0.9'))  # 규칙 확신도 기준
+    
+    # 여러 턴 대화 세션 (chat_session.py)
+    SESSION_HISTORY_TOKENS = int(os.getenv('SESSION_HISTORY_TOKENS', '1000'))  # 그대로 보낼 최근 대화 토큰 수
+    SESSION_SUMMARY_TOKENS = int(os.getenv('SESSION_SUMMARY_TOKENS', '300'))  # 오래된 대화 요약 토큰 수
+    
+    # 백그라운드 에이전트 실행 설정
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', '8'))  # 동시에 실행할 에이전트 작업 수
+    JOB_MAX_PENDING = int(os.getenv('JOB_MAX_PENDING', '100'))  # 대기 작업 최대 개수 (0이면 제한 없음)
+    JOB_RETENTION = float(os.getenv('JOB_RETENTION', '600'))  # 끝난 작업을 보관할 시간(초)
+    
+    # HTTP 서버 설정 (server.py)
+    SERVER_HOST = os.getenv('SERVER_HOST', '127.0.0.1')
+    SERVER_PORT = int(os.getenv('SERVER_PORT', '8000'))
+    SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', '8'))  # 동시에 실행할 에이전트 작업 수
+    SERVER_MAX_QUEUE = int(os.getenv('SERVER_MAX_QUEUE', '100'))  # 대기 작업 최대 개수 (넘으면 429)
+    SERVER_TIMEOUT = float(os.getenv('SERVER_TIMEOUT', '60'))  # 요청당 최대 대기 시간(초)
+    SERVER_MAX_BATCH = int(os.getenv('SERVER_MAX_BATCH', '50'))  # 배치 요청 하나의 최대 질문 수
+    SERVER_MAX_BODY = int(os.getenv('SERVER_MAX_BODY', str(1 << 20)))  # 요청 본문 최대 크기(바이트)
+    
+    # 도구 HTTP 클라이언트 설정
+    HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '10'))  # 호스트당 유지할 연결 수
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3.05'))
+    HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '10'))
+    HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '2'))
+    HTTP_BACKOFF = float(os.getenv('HTTP_BACKOFF', '0.5'))  # 재시도 대기 시간 기준(초)
+    
+    # 번역 용어집 (SQLite 파일, 지정하지 않으면 기본 항목만 있는 메모리 용어집 사용)
+    GLOSSARY_PATH = os.getenv('GLOSSARY_PATH')
+    
+    # 웹 검색 결과 캐시 설정
+    SEARCH_CACHE_SIZE = int(os.getenv('SEARCH_CACHE_SIZE', '1024'))
+    SEARCH_CACHE_TTL = float(os.getenv('SEARCH_CACHE_TTL', '600'))
+    SEARCH_NEGATIVE_CACHE_TTL = float(os.getenv('SEARCH_NEGATIVE_CACHE_TTL', '60'))  # 결과 없음 캐시 시간
+    
+    # 도구가 호출하는 외부 API 주소 (프록시나 로컬 스텁 서버로 바꿀 때 사용)
+    SEARCH_API_URL = os.getenv('SEARCH_API_URL', 'https://api.duckduckgo.com/')
+    WEATHER_API_URL = os.getenv('WEATHER_API_URL', 'http://api.openweathermap.org/data/2.5/weather')
+    
+    # 실행 단계별 시간 측정과 지표 (metrics.py)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    METRICS_LOG_PATH = os.getenv('METRICS_LOG_PATH')  # 구간 기록을 JSON 로그로 쓸 파일 ('-'이면 stderr)
+    METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))  # Prometheus /metrics 포트 (0이면 사용 안 함)
+    
     @classmethod
     def get_model_config(cls):
         """현재 설정된 모델 정보 반환"""
@@ -33,13 +131,36 @@ class Config:
             return {
                 'provider': 'gemini',
                 'model': cls.GEMINI_MODEL,
-                'api_key': cls.GEMINI_API_KEY
+                'api_key': cls.GEMINI_API_KEY,
+                'api_keys': cls.GEMINI_API_KEYS
             }
         elif cls.OPENAI_API_KEY:
             return {
                 'provider': 'openai',
                 'model': cls.OPENAI_MODEL,
-                'api_key': cls.OPENAI_API_KEY
+                'api_key': cls.OPENAI_API_KEY,
+                'api_keys': cls.OPENAI_API_KEYS
+            }
+        else:
+            return None
+    
+    @classmethod
+    def get_fallback_model_config(cls):
+        """보조 제공자 모델 정보 반환 (설정되지 않았거나 API 키가 없으면 None)"""
+        provider, _, model = cls.FALLBACK_MODEL.partition(':')
+        if provider == 'gemini' and cls.GEMINI_API_KEY:
+            return {
+                'provider': 'gemini',
+                'model': model or cls.GEMINI_MODEL,
+                'api_key': cls.GEMINI_API_KEY,
+                'api_keys': cls.GEMINI_API_KEYS
+            }
+        elif provider == 'openai' and cls.OPENAI_API_KEY:
+            return {
+                'provider': 'openai',
+                'model': model or cls.OPENAI_MODEL,
+                'api_key': cls.OPENAI_API_KEY,
+                'api_keys': cls.OPENAI_API_KEYS
             }
         else:
             return None
@@ -56,6 +177,9 @@ class Config:
             if not cls.OPENAI_API_KEY:
                 errors.append("OPENAI_API_KEY가 설정되지 않았습니다.")
         
+        if cls.FALLBACK_MODEL and cls.get_fallback_model_config() is None:
+            errors.append(f"FALLBACK_MODEL({cls.FALLBACK_MODEL})의 API 키가 없거나 형식이 잘못되었습니다.")
+        
         return errors
     
     @classmethod
@@ -63,17 +187,19 @@ class Config:
         """현재 설정 출력"""
         print("🔧 현재 설정:")
         print(f"  기본 모델: {cls.DEFAULT_MODEL}")
+        if cls.FALLBACK_MODEL:
+            print(f"  보조 제공자: {cls.FALLBACK_MODEL} (헤지 지연 {cls.HEDGE_DELAY}초)")
         
         if cls.GEMINI_API_KEY:
-            masked_key = cls._mask_api_key(cls.GEMINI_API_KEY)
-            print(f"  Gemini API 키: {masked_key}")
+            masked_key = ', '.join(cls._mask_api_key(key) for key in cls.GEMINI_API_KEYS)
+            print(f"  Gemini API 키 ({len(cls.GEMINI_API_KEYS)}개): {masked_key}")
             print(f"  Gemini 모델: {cls.GEMINI_MODEL}")
         else:
             print("  Gemini API 키: 설정되지 않음")
         
         if cls.OPENAI_API_KEY:
-            masked_key = cls._mask_api_key(cls.OPENAI_API_KEY)
-            print(f"  OpenAI API 키: {masked_key}")
+            masked_key = ', '.join(cls._mask_api_key(key) for key in cls.OPENAI_API_KEYS)
+            print(f"  OpenAI API 키 ({len(cls.OPENAI_API_KEYS)}개): {masked_key}")
             print(f"  OpenAI 모델: {cls.OPENAI_MODEL}")
         else:
             print("  OpenAI API 키: 설정되지 않음")
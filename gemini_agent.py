@@ -2,87 +2,460 @@
 Google Gemini API를 사용하는 간단한 에이전트
 """
 
-import google.generativeai as genai
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from config import Config
+import async_runner
+import metrics
+from cache import LRUTTLCache, make_cache_key
+from chat_session import AgentSession
+from provider_router import create_model, with_fallback
+from semantic_cache import create_semantic_cache
+from tool_registry import ToolRegistry, get_tool_name
+from tool_selector import ToolSelector, estimate_tokens
+
+TOOL_USE_MARK = "TOOL_USE:"
+# 도구가 실패했을 때 결과에 들어가는 문구 (일시적인 실패가 캐시에서 다시 나오지 않도록 이런 결과는 캐시하지 않음)
+TOOL_FAILURE_MARKERS = (
+    "오류가 발생했습니다", "가져올 수 없습니다", "API 키가 필요합니다", "찾을 수 없습니다",
+    "실행 시간이", "Error:", "계산 오류",
+)
 
 class GeminiAgent:
     """Gemini API를 사용하는 에이전트 클래스"""
     
-    def __init__(self, tools=None):
+    def __init__(self, tools=None, cache=None, model=None, prerouter=None, semantic_cache=None):
         self.tools = tools or []
+        # 응답 캐시 (get/set 메서드를 가진 객체면 무엇이든 사용 가능, None이면 비활성화)
+        self.cache = cache
+        # 표현만 다른 비슷한 질문의 응답 캐시 (semantic_cache.SemanticCache, None이면 비활성화)
+        self.semantic_cache = semantic_cache
+        # 도구로 바로 답할 수 있는 질문은 LLM을 거치지 않음 (prerouter.PreRouter, None이면 비활성화)
+        self.prerouter = prerouter
+        # 응답을 스트리밍으로 받으며 INPUT 줄이 끝난 도구 호출은 생성이 끝나기 전에 실행 시작
+        self.early_dispatch = Config.TOOL_EARLY_DISPATCH
+        
+        if model is not None:
+            # generate_content / generate_content_async를 가진 모델 객체 직접 사용 (벤치마크용 가짜 모델 등)
+            self.model_name = getattr(model, 'model_name', type(model).__name__)
+            self.model = model
+            return
         
         # Gemini API 설정
         config = Config.get_model_config()
         if config and config['provider'] == 'gemini':
-            genai.configure(api_key=config['api_key'])
-            self.model = genai.GenerativeModel(config['model'])
+            self.model_name = config['model']
+            # FALLBACK_MODEL이 있으면 보조 제공자로 헤지 요청/장애 조치하는 라우터 사용
+            self.model = with_fallback(create_model(config), config)
         else:
             raise ValueError("Gemini API 키가 설정되지 않았습니다.")
     
-    def run(self, prompt):
-        """에이전트 실행"""
-        try:
-            # 도구 설명을 포함한 시스템 프롬프트 생성
-            system_prompt = f"""
-당신은 도움이 되는 AI 어시스턴트입니다.
+    @property
+    def tools(self):
+        return self._registry.tools
+    
+    @tools.setter
+    def tools(self, tools):
+        # 도구 목록이 바뀔 때만 레지스트리(호출 매핑, 시스템 프롬프트)를 다시 만듦
+        self._registry = ToolRegistry(tools)
+        # 도구가 top_k개보다 많을 때만 질문별로 관련 도구를 골라 시스템 프롬프트를 줄임
+        top_k = Config.TOOL_SELECTION_TOP_K
+        if top_k > 0 and len(self._registry) > top_k:
+            self._selector = ToolSelector(self._registry.tools, top_k=top_k, min_score=Config.TOOL_SELECTION_MIN_SCORE)
+        else:
+            self._selector = None
+        self._selected_registries = {}  # 고른 도구 이름 조합 -> 레지스트리
+    
+    def add_tool(self, tool):
+        """도구 추가"""
+        self.tools = self.tools + (tool,)
+    
+    def remove_tool(self, name):
+        """이름으로 도구 제거"""
+        self.tools = [tool for tool in self.tools if get_tool_name(tool) != name]
+    
+    def run(self, prompt, context=None):
+        """에이전트 실행
 
-사용 가능한 도구들:
-"""
+        context: 질문 앞에 넣을 이전 대화 문자열 목록 (AgentSession이 사용)
+        """
+        with metrics.span('agent.run', model=self.model_name) as span:
+            metrics.incr('agent_runs', model=self.model_name)
+            try:
+                if self.prerouter is not None:
+                    routed = self.prerouter.route(prompt)
+                    if routed is not None:
+                        return routed
+                
+                registry = self._registry
+                
+                # 동일한 (모델, 시스템 프롬프트, 질문)에 대한 응답은 캐시에서 바로 반환
+                lookup, cached = self._cache_lookup(registry, prompt, context)
+                if cached is not None:
+                    return cached
+                
+                # Gemini 모델에 요청
+                contents = self._build_contents(self._select_tools(registry, prompt), prompt, context)
+                dispatched = {}
+                with metrics.span('llm.generate', model=self.model_name):
+                    if self.early_dispatch:
+                        response_text = self._generate_and_dispatch(contents, registry, dispatched)
+                    else:
+                        response_text = self.model.generate_content(contents).text
+                metrics.observe('response_chars', len(response_text), model=self.model_name)
+                
+                result = self._handle_response(response_text, registry, dispatched)
+                self._cache_store(lookup, prompt, result)
+                return result
             
-            for tool in self.tools:
-                # tool이 @tool 데코레이터로 만들어진 경우 name 속성 확인
-                tool_name = getattr(tool, 'name', tool.__name__)
-                tool_desc = getattr(tool, 'description', tool.__doc__ or '설명 없음')
-                system_prompt += f"- {tool_name}: {tool_desc}\n"
+            except Exception as e:
+                span.fail(str(e))
+                metrics.incr('agent_errors', model=self.model_name)
+                return f"오류가 발생했습니다: {str(e)}"
+    
+    def run_stream(self, prompt, context=None):
+        """에이전트 실행 결과를 생성되는 대로 조각(문자열) 단위로 반환하는 제너레이터
+        
+        "TOOL_USE:"로 시작하는 줄이 나오면 그 뒤의 텍스트는 보여주지 않고,
+        응답이 끝난 뒤 도구 실행 결과를 마지막 조각으로 반환합니다.
+        """
+        span = metrics.span('agent.run_stream', model=self.model_name)
+        span.__enter__()
+        metrics.incr('agent_runs', model=self.model_name)
+        try:
+            if self.prerouter is not None:
+                routed = self.prerouter.route(prompt)
+                if routed is not None:
+                    yield routed
+                    return
             
-            system_prompt += """
-사용자의 질문에 답변할 때, 필요하면 적절한 도구를 사용하세요.
-도구를 사용해야 할 때는 다음 형식으로 답변하세요:
-TOOL_USE: tool_name
-INPUT: 도구에 전달할 입력
-
-그렇지 않으면 직접 답변하세요.
-"""
+            registry = self._registry
             
-            # Gemini 모델에 요청
-            response = self.model.generate_content([
-                system_prompt,
-                f"사용자 질문: {prompt}"
-            ])
+            lookup, cached = self._cache_lookup(registry, prompt, context)
+            if cached is not None:
+                yield cached
+                return
             
-            response_text = response.text
+            contents = self._build_contents(self._select_tools(registry, prompt), prompt, context)
+            response = self.model.generate_content(contents, stream=True)
+            parser = ToolCallParser()
+            dispatched = {}
             
-            # 도구 사용이 필요한지 확인
-            if "TOOL_USE:" in response_text:
-                lines = response_text.split('\n')
-                tool_name = None
-                tool_input = None
+            full_text = ''
+            emitted = 0       # full_text[:emitted]까지 내보냄
+            line_start = 0    # 현재 줄의 시작 위치
+            line_ok = False   # 현재 줄이 도구 호출이 아님이 확인되었는지
+            tool_call = False
+            for chunk in response:
+                full_text += chunk.text
+                if self.early_dispatch:
+                    dispatch_tool_calls(registry, parser.feed(chunk.text), dispatched)
+                if tool_call:
+                    continue
                 
-                for line in lines:
-                    if line.startswith("TOOL_USE:"):
-                        tool_name = line.replace("TOOL_USE:", "").strip()
-                    elif line.startswith("INPUT:"):
-                        tool_input = line.replace("INPUT:", "").strip()
+                while True:
+                    newline = full_text.find('\n', line_start)
+                    if not line_ok:
+                        head = full_text[line_start:line_start + len(TOOL_USE_MARK)]
+                        if head == TOOL_USE_MARK:
+                            tool_call = True
+                            break
+                        if newline == -1 and TOOL_USE_MARK.startswith(head):
+                            # 도구 호출 줄인지 아직 알 수 없으므로 보류
+                            break
+                        line_ok = True
+                    if newline == -1:
+                        break
+                    line_start = newline + 1
+                    line_ok = False
                 
-                if tool_name and tool_input:
-                    # 도구 실행
-                    for tool in self.tools:
-                        current_tool_name = getattr(tool, 'name', tool.__name__)
-                        if current_tool_name == tool_name:
-                            # @tool 데코레이터로 만들어진 도구는 직접 호출
-                            if hasattr(tool, 'forward'):
-                                tool_result = tool.forward(tool_input)
-                            else:
-                                tool_result = tool(tool_input)
-                            return f"도구 '{tool_name}' 실행 결과:\n{tool_result}"
-                    
-                    return f"도구 '{tool_name}'을 찾을 수 없습니다."
+                visible_end = line_start if (tool_call or not line_ok) else len(full_text)
+                if visible_end > emitted:
+                    yield full_text[emitted:visible_end]
+                    emitted = visible_end
             
-            return response_text
+            if self.early_dispatch:
+                dispatch_tool_calls(registry, parser.close(), dispatched)
+            metrics.observe('response_chars', len(full_text), model=self.model_name)
             
+            result = self._handle_response(full_text, registry, dispatched)
+            tail = full_text[emitted:] if result == full_text else result
+            if tail:
+                yield tail
+            # run과 같은 값을 저장해야 어느 쪽이 먼저 실행되었는지와 관계없이 캐시된 응답이 같음
+            self._cache_store(lookup, prompt, result)
+        
         except Exception as e:
-            return f"오류가 발생했습니다: {str(e)}"
+            span.fail(str(e))
+            metrics.incr('agent_errors', model=self.model_name)
+            yield f"오류가 발생했습니다: {str(e)}"
+        finally:
+            # yield가 들어 있는 긴 블록이라 with 대신 직접 열고 닫음
+            span.__exit__(None, None, None)
+    
+    async def arun(self, prompt, timeout=None, context=None):
+        """비동기 에이전트 실행 (timeout 초 안에 끝나지 않으면 오류 메시지 반환)"""
+        with metrics.span('agent.arun', model=self.model_name) as span:
+            metrics.incr('agent_runs', model=self.model_name)
+            try:
+                return await asyncio.wait_for(self._arun(prompt, context), timeout)
+            except asyncio.TimeoutError:
+                span.fail("timeout")
+                metrics.incr('agent_errors', model=self.model_name)
+                return async_runner.timeout_message(timeout)
+            except Exception as e:
+                span.fail(str(e))
+                metrics.incr('agent_errors', model=self.model_name)
+                return f"오류가 발생했습니다: {str(e)}"
+    
+    async def _arun(self, prompt, context=None):
+        if self.prerouter is not None:
+            # 도구(HTTP 요청 등)는 블로킹 함수이므로 스레드에서 실행
+            routed = await asyncio.to_thread(self.prerouter.route, prompt)
+            if routed is not None:
+                return routed
+        
+        registry = self._registry
+        
+        lookup, cached = self._cache_lookup(registry, prompt, context)
+        if cached is not None:
+            return cached
+        
+        contents = self._build_contents(self._select_tools(registry, prompt), prompt, context)
+        with metrics.span('llm.generate', model=self.model_name):
+            response = await self.model.generate_content_async(contents)
+        
+        response_text = response.text
+        metrics.observe('response_chars', len(response_text), model=self.model_name)
+        if "TOOL_USE:" in response_text:
+            # 도구(HTTP 요청 등)는 블로킹 함수이므로 스레드에서 실행
+            result = await asyncio.to_thread(self._handle_response, response_text, registry)
+        else:
+            result = response_text
+        self._cache_store(lookup, prompt, result)
+        return result
+    
+    async def run_many(self, prompts, concurrency=async_runner.DEFAULT_CONCURRENCY, timeout=None):
+        """여러 질문을 동시에 실행하고 입력 순서대로 결과 반환"""
+        return await async_runner.run_many(self, prompts, concurrency=concurrency, timeout=timeout)
+    
+    def start_session(self, history_tokens=None, summary_tokens=None, summarizer=None):
+        """이전 대화를 기억하는 대화 세션 시작 (chat_session.AgentSession)"""
+        return AgentSession(self, history_tokens=history_tokens, summary_tokens=summary_tokens,
+                            summarizer=summarizer)
+    
+    def _generate_and_dispatch(self, contents, registry, dispatched):
+        """응답을 스트리밍으로 받으면서 완성된 도구 호출을 바로 실행 시작하고 전체 응답 텍스트 반환
+
+        도구 I/O(검색 요청 등)가 나머지 응답 생성과 겹치므로 응답이 끝난 뒤에 도구를 실행할 때보다 빨리 끝납니다.
+        """
+        parser = ToolCallParser()
+        parts = []
+        for chunk in self.model.generate_content(contents, stream=True):
+            parts.append(chunk.text)
+            dispatch_tool_calls(registry, parser.feed(chunk.text), dispatched)
+        dispatch_tool_calls(registry, parser.close(), dispatched)
+        return ''.join(parts)
+    
+    def _select_tools(self, registry, prompt):
+        """시스템 프롬프트에 넣을 도구만 담은 레지스트리 반환 (도구 실행은 항상 전체 레지스트리로 함)"""
+        selector = self._selector
+        if selector is None:
+            return registry
+        with metrics.span('tool.select'):
+            tools, confident = selector.select(prompt)
+        if not confident:
+            metrics.incr('tool_selection', result='fallback')
+            return registry
+        
+        names = tuple(get_tool_name(tool) for tool in tools)
+        selected = self._selected_registries.get(names)
+        if selected is None:
+            selected = self._selected_registries[names] = ToolRegistry(tools)
+        metrics.incr('tool_selection', result='pruned')
+        if metrics.enabled():
+            saved = estimate_tokens(registry.system_prompt) - estimate_tokens(selected.system_prompt)
+            metrics.observe('prompt_tokens_saved', saved, model=self.model_name)
+        return selected
+    
+    def _build_contents(self, registry, prompt, context=None):
+        with metrics.span('prompt.build'):
+            contents = [
+                registry.system_prompt,
+                *(context or ()),
+                f"사용자 질문: {prompt}"
+            ]
+        metrics.observe('prompt_chars', sum(len(part) for part in contents), model=self.model_name)
+        return contents
+    
+    def _cache_lookup(self, registry, prompt, context=None):
+        """(캐시 조회 정보, 캐시된 응답) 반환 (조회 정보는 응답을 만든 뒤 _cache_store에 넘김)
+
+        같은 질문은 응답 캐시에서, 표현만 다른 비슷한 질문은 semantic_cache에서 찾습니다.
+        """
+        cache_key = scope = hit = None
+        if self.cache is not None:
+            # 이전 대화가 다르면 같은 질문이라도 다른 응답이므로 키에 포함
+            cache_key = make_cache_key(self.model_name, registry.fingerprint, prompt, *(context or ()))
+            cached = self.cache.get(cache_key)
+            metrics.incr('cache_requests', cache='response', result='miss' if cached is None else 'hit')
+            if cached is not None:
+                return (cache_key, scope, hit), cached
+        if self.semantic_cache is not None:
+            scope = make_cache_key(self.model_name, registry.fingerprint, *(context or ()))
+            hit = self.semantic_cache.lookup(prompt, scope)
+            if hit is not None and not hit.audit:
+                return (cache_key, scope, hit), hit.answer
+        return (cache_key, scope, hit), None
+    
+    def _cache_store(self, lookup, prompt, result):
+        """새로 만든 응답을 캐시에 저장 (확인 대상 적중이었으면 캐시된 응답과 비교)"""
+        cache_key, scope, hit = lookup
+        if is_failed_tool_result(result):
+            metrics.incr('cache_skips', reason='tool_failure')
+            return
+        if cache_key is not None:
+            self.cache.set(cache_key, result)
+        if scope is not None:
+            if hit is not None:
+                self.semantic_cache.audit(hit, prompt, result, scope)
+            else:
+                self.semantic_cache.set(prompt, result, scope)
+    
+    def _handle_response(self, response_text, registry, dispatched=None):
+        """모델 응답을 해석하여 필요하면 도구를 실행 (도구 호출이 여러 개면 동시에 실행)
+
+        dispatched: 스트리밍 중에 미리 시작한 도구 호출 {(도구 이름, 입력): Future}
+        """
+        with metrics.span('response.handle'):
+            # 도구 사용이 필요한지 확인
+            if "TOOL_USE:" in response_text:
+                calls = parse_tool_calls(response_text)
+                if calls:
+                    # 호출이 하나여도 TOOL_TIMEOUT을 지키도록 같은 경로로 실행
+                    return '\n\n'.join(run_tool_calls(registry, calls, dispatched=dispatched))
+            
+            return response_text
+
+def is_failed_tool_result(result):
+    """도구 실행 결과(여러 개면 이어 붙인 문자열)에 실패한 도구가 있는지 확인"""
+    return result.startswith("도구 '") and any(marker in result for marker in TOOL_FAILURE_MARKERS)
+
+class ToolCallParser:
+    """응답을 한 줄씩 해석하여 TOOL_USE 줄과 그다음 INPUT 줄을 (도구 이름, 입력)으로 짝짓는 파서
+
+    스트리밍 응답 조각을 feed로 넣으면 INPUT 줄이 끝나는 즉시 그 호출을 돌려줍니다.
+    """
+    
+    def __init__(self):
+        self.calls = []
+        self._tool_name = None
+        self._line = ''  # 아직 끝나지 않은 줄
+    
+    def feed(self, text):
+        """응답 조각을 넣고 새로 완성된 호출 목록 반환"""
+        if '\n' not in text:
+            self._line += text
+            return []
+        *lines, self._line = (self._line + text).split('\n')
+        return [call for call in map(self._parse_line, lines) if call is not None]
+    
+    def close(self):
+        """응답이 끝났을 때 줄바꿈 없이 끝난 마지막 줄 처리"""
+        line, self._line = self._line, ''
+        call = self._parse_line(line)
+        return [] if call is None else [call]
+    
+    def _parse_line(self, line):
+        if line.startswith("TOOL_USE:"):
+            self._tool_name = line.replace("TOOL_USE:", "").strip()
+        elif line.startswith("INPUT:") and self._tool_name:
+            tool_input = line.replace("INPUT:", "").strip()
+            tool_name, self._tool_name = self._tool_name, None
+            # 한 응답에서 너무 많은 도구를 부르지 않도록 제한
+            if tool_input and len(self.calls) < Config.TOOL_MAX_CALLS:
+                self.calls.append((tool_name, tool_input))
+                return tool_name, tool_input
+        return None
+
+def parse_tool_calls(response_text):
+    """응답에서 (도구 이름, 입력) 목록 추출"""
+    parser = ToolCallParser()
+    parser.feed(response_text)
+    parser.close()
+    return parser.calls
+
+_tool_executor = None
+_tool_executor_lock = threading.Lock()
+
+def _get_tool_executor():
+    global _tool_executor
+    if _tool_executor is None:
+        with _tool_executor_lock:
+            if _tool_executor is None:
+                _tool_executor = ThreadPoolExecutor(max_workers=Config.TOOL_MAX_WORKERS, thread_name_prefix='tool-call')
+    return _tool_executor
+
+def dispatch_tool_calls(registry, calls, dispatched):
+    """아직 시작하지 않은 도구 호출을 스레드 풀에서 실행 시작하고 dispatched({호출: Future})에 추가"""
+    for call in calls:
+        if call in dispatched:
+            continue
+        tool_call = registry.get(call[0])
+        if tool_call is not None:
+            # 측정 구간이 이어지도록 현재 컨텍스트에서 실행
+            dispatched[call] = _get_tool_executor().submit(contextvars.copy_context().run, tool_call, call[1])
+    return dispatched
+
+def run_tool_calls(registry, calls, timeout=None, dispatched=None):
+    """도구 호출 여러 개를 스레드 풀에서 동시에 실행하고 호출 순서대로 결과 문자열 목록 반환
+
+    같은 (도구, 입력) 호출은 한 번만 실행하고, dispatched에 있는 호출은 이미 시작한 것을 기다립니다.
+    한 도구가 실패하거나 timeout초(기본 TOOL_TIMEOUT)를 넘겨도 나머지 결과는 그대로 돌려주며,
+    시간을 넘긴 도구는 결과만 버립니다.
+    """
+    timeout = Config.TOOL_TIMEOUT if timeout is None else timeout
+    with metrics.span('tool.call_many', calls=len(calls)):
+        futures = dispatch_tool_calls(registry, calls, dict(dispatched or {}))
+        
+        deadline = time.monotonic() + timeout
+        results = []
+        for tool_name, tool_input in calls:
+            future = futures.get((tool_name, tool_input))
+            if future is None:
+                results.append(f"도구 '{tool_name}'을 찾을 수 없습니다.")
+                continue
+            try:
+                # 모든 도구가 동시에 시작했으므로 남은 시간만 기다림
+                tool_result = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeoutError:
+                future.cancel()
+                metrics.incr('tool_timeouts', tool=tool_name)
+                results.append(f"도구 '{tool_name}' 실행 시간이 {timeout}초를 넘었습니다.")
+                continue
+            except Exception as e:
+                results.append(f"도구 '{tool_name}' 오류가 발생했습니다: {str(e)}")
+                continue
+            results.append(f"도구 '{tool_name}' 실행 결과:\n{tool_result}")
+        return results
+
+def create_response_cache():
+    """Config 설정에 따라 응답 캐시 생성 (크기가 0이면 None)"""
+    if Config.RESPONSE_CACHE_SIZE <= 0:
+        return None
+    return LRUTTLCache(
+        maxsize=Config.RESPONSE_CACHE_SIZE,
+        ttl=Config.RESPONSE_CACHE_TTL,
+        persist_path=Config.RESPONSE_CACHE_PATH,
+    )
 
-def create_gemini_agent(tools):
+def create_gemini_agent(tools, cache=None, prerouter=None, semantic_cache=None):
     """Gemini 에이전트 생성 헬퍼 함수"""
-    return GeminiAgent(tools=tools) 
\ No newline at end of file
+    if cache is None:
+        cache = create_response_cache()
+    if semantic_cache is None:
+        semantic_cache = create_semantic_cache()
+    return GeminiAgent(tools=tools, cache=cache, prerouter=prerouter, semantic_cache=semantic_cache)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+번역 용어집(glossary) 백엔드
+(원문 구절, 목표 언어)로 색인된 SQLite 용어집을 처음 사용할 때 열고,
+문장을 단어 단위로 한 번 훑으면서 용어집에 있는 가장 긴 구절을 찾아 번역합니다.
+용어집 전체를 메모리에 올리지 않으므로 항목이 수십만 개여도 프로세스당 메모리는 일정합니다.
+
+용어집 가져오기 (탭으로 구분된 "원문<TAB>목표언어<TAB>번역" 파일):
+    python glossary.py import terms.tsv --db glossary.sqlite3
+"""
+
+import argparse
+import csv
+import re
+import sqlite3
+import threading
+from functools import lru_cache
+
+from config import Config
+
+# 기존 번역 도구가 지원하던 기본 항목
+BUILTIN_ENTRIES = [
+    ('hello', 'ko', '안녕하세요'),
+    ('goodbye', 'ko', '안녕히 가세요'),
+    ('thank you', 'ko', '감사합니다'),
+    ('how are you', 'ko', '어떻게 지내세요'),
+    ('안녕하세요', 'en', 'hello'),
+    ('감사합니다', 'en', 'thank you'),
+]
+
+# 한글과 그 밖의 문자, 숫자를 서로 다른 단어로 나눔 ("hello를" -> "hello", "를")
+_WORD_RE = re.compile(r"[^\W\d_가-힣]+(?:'[^\W\d_가-힣]+)*|[가-힣]+|[0-9]+")
+_HANGUL_RE = re.compile(r'[가-힣]')
+
+
+def split_words(text):
+    """(정규화된 단어, 시작, 끝) 목록"""
+    return [(match.group().casefold(), match.start(), match.end()) for match in _WORD_RE.finditer(text)]
+
+
+def normalize_phrase(phrase):
+    return ' '.join(word for word, _, _ in split_words(phrase))
+
+
+def detect_target_lang(text):
+    """'auto'일 때 목표 언어 결정 (한글이 있으면 영어로, 없으면 한국어로)"""
+    return 'en' if _HANGUL_RE.search(text) else 'ko'
+
+
+class Glossary:
+    """SQLite 기반 용어집 (path가 None이면 메모리 DB)"""
+    
+    def __init__(self, path=None, cache_size=4096):
+        self.path = path or ':memory:'
+        self._conn = None
+        self._lock = threading.Lock()
+        # 자주 쓰이는 단어/구절의 조회 결과만 메모리에 유지
+        self._phrase_lengths = lru_cache(maxsize=cache_size)(self._query_phrase_lengths)
+        self._target = lru_cache(maxsize=cache_size)(self._query_target)
+    
+    def _connect(self):
+        # 처음 사용할 때 연결하고 스키마와 기본 항목을 준비
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    conn = sqlite3.connect(self.path, check_same_thread=False)
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS glossary ("
+                        "source TEXT NOT NULL, target_lang TEXT NOT NULL, target TEXT NOT NULL, "
+                        "first_word TEXT NOT NULL, word_count INTEGER NOT NULL, "
+                        "PRIMARY KEY (source, target_lang))"
+                    )
+                    conn.execute(
+                        "CREATE INDEX IF NOT EXISTS glossary_first_word "
+                        "ON glossary (target_lang, first_word)"
+                    )
+                    self._insert(conn, BUILTIN_ENTRIES, replace=False)
+                    conn.commit()
+                    self._conn = conn
+        return self._conn
+    
+    @staticmethod
+    def _insert(conn, entries, replace=True):
+        rows = []
+        for source, target_lang, target in entries:
+            words = normalize_phrase(source).split(' ')
+            if words == ['']:
+                continue
+            rows.append((' '.join(words), target_lang.lower(), target, words[0], len(words)))
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        conn.executemany(
+            f"{verb} INTO glossary (source, target_lang, target, first_word, word_count) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        return len(rows)
+    
+    def add_entries(self, entries):
+        """(원문, 목표 언어, 번역) 항목들을 추가하거나 덮어씀"""
+        conn = self._connect()
+        with self._lock:
+            count = self._insert(conn, entries)
+            conn.commit()
+        self._phrase_lengths.cache_clear()
+        self._target.cache_clear()
+        return count
+    
+    def _query_phrase_lengths(self, target_lang, first_word):
+        """first_word로 시작하는 구절들의 단어 수 (긴 것부터)"""
+        conn = self._connect()
+        with self._lock:
+            rows = conn.execute(
+                "SELECT DISTINCT word_count FROM glossary "
+                "WHERE target_lang = ? AND first_word = ? ORDER BY word_count DESC",
+                (target_lang, first_word),
+            ).fetchall()
+        return tuple(row[0] for row in rows)
+    
+    def _query_target(self, source, target_lang):
+        conn = self._connect()
+        with self._lock:
+            row = conn.execute(
+                "SELECT target FROM glossary WHERE source = ? AND target_lang = ?",
+                (source, target_lang),
+            ).fetchone()
+        return row[0] if row else None
+    
+    def lookup(self, phrase, target_lang):
+        """구절 전체에 해당하는 번역 반환 (없으면 None)"""
+        return self._target(normalize_phrase(phrase), target_lang.lower())
+    
+    def translate(self, text, target_lang):
+        """문장 안의 용어집 구절을 번역하고 (번역된 문장, 번역한 구절 수) 반환
+        
+        단어 위치마다 그 단어로 시작하는 구절 길이 목록(첫 단어 색인)을 보고
+        가장 긴 구절부터 정확히 일치하는지 확인합니다. 일치하면 구절 뒤로 건너뛰므로
+        문장을 한 번만 훑고, 후보 구절 전체를 메모리에 올리지 않습니다.
+        """
+        target_lang = target_lang.lower()
+        words = split_words(text)
+        parts = []
+        last_end = 0
+        matched = 0
+        i = 0
+        while i < len(words):
+            match = None
+            for size in self._phrase_lengths(target_lang, words[i][0]):
+                if i + size > len(words):
+                    continue
+                target = self._target(' '.join(w for w, _, _ in words[i:i + size]), target_lang)
+                if target is not None:
+                    match = (size, target)
+                    break
+            if match is None:
+                i += 1
+                continue
+            size, target = match
+            parts.append(text[last_end:words[i][1]])
+            parts.append(target)
+            last_end = words[i + size - 1][2]
+            matched += 1
+            i += size
+        parts.append(text[last_end:])
+        return ''.join(parts), matched
+    
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_glossary = None
+_glossary_lock = threading.Lock()
+
+
+def get_glossary():
+    """Config.GLOSSARY_PATH의 용어집 (프로세스 전체에서 공유, 실제 연결은 처음 사용할 때)"""
+    global _glossary
+    if _glossary is None:
+        with _glossary_lock:
+            if _glossary is None:
+                _glossary = Glossary(Config.GLOSSARY_PATH)
+    return _glossary
+
+
+def import_tsv(path, db_path, batch_size=10000):
+    """탭 구분 파일(원문, 목표 언어, 번역)을 용어집 DB로 가져오기"""
+    glossary = Glossary(db_path)
+    total = 0
+    with open(path, encoding='utf-8', newline='') as f:
+        batch = []
+        for row in csv.reader(f, delimiter='\t'):
+            if len(row) < 3 or row[0].startswith('#'):
+                continue
+            batch.append(row[:3])
+            if len(batch) >= batch_size:
+                total += glossary.add_entries(batch)
+                batch = []
+        if batch:
+            total += glossary.add_entries(batch)
+    glossary.close()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="번역 용어집 관리")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    import_parser = subparsers.add_parser('import', help="탭 구분 파일을 용어집 DB로 가져오기")
+    import_parser.add_argument('tsv')
+    import_parser.add_argument('--db', default=Config.GLOSSARY_PATH, required=Config.GLOSSARY_PATH is None)
+    args = parser.parse_args()
+    
+    if args.command == 'import':
+        count = import_tsv(args.tsv, args.db)
+        print(f"✅ {count}개 항목을 {args.db}에 가져왔습니다.")
+
+
+if __name__ == "__main__":
+    main()
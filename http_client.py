@@ -0,0 +1,122 @@
+"""
+도구용 공유 HTTP 클라이언트
+호스트별 커넥션 풀(keep-alive)을 재사용하고, 5xx/429 응답은 지터가 있는 지수 백오프로 재시도합니다.
+"""
+
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from config import Config
+
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class HTTPClient:
+    """스레드 안전한 keep-alive HTTP 클라이언트
+
+    requests.Session은 여러 스레드에서 함께 쓰기에 안전하지 않으므로 스레드마다
+    Session을 두고, 실제 커넥션 풀을 가진 HTTPAdapter만 모든 스레드가 공유합니다.
+    """
+    
+    def __init__(self, pool_size=None, max_retries=None, backoff=None,
+                 connect_timeout=None, read_timeout=None):
+        self.pool_size = pool_size or Config.HTTP_POOL_SIZE
+        self.max_retries = Config.HTTP_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = Config.HTTP_BACKOFF if backoff is None else backoff
+        self.timeout = (
+            connect_timeout or Config.HTTP_CONNECT_TIMEOUT,
+            read_timeout or Config.HTTP_READ_TIMEOUT,
+        )
+        # pool_connections: 풀을 유지할 호스트 수, pool_maxsize: 호스트당 유지할 연결 수
+        self._adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            max_retries=0,
+        )
+        self._local = threading.local()
+    
+    @property
+    def session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.mount('http://', self._adapter)
+            session.mount('https://', self._adapter)
+            self._local.session = session
+        return session
+    
+    def get(self, url, params=None, timeout=None, **kwargs):
+        """GET 요청 (연결 오류, 5xx/429 응답은 재시도)
+
+        재시도 횟수를 모두 쓰면 마지막 응답을 그대로 반환하거나 마지막 예외를 다시 발생시킵니다.
+        """
+        return self.request('GET', url, params=params, timeout=timeout, **kwargs)
+    
+    def request(self, method, url, timeout=None, **kwargs):
+        timeout = timeout or self.timeout
+        host = urlsplit(url).netloc
+        attempt = 0
+        with metrics.span('http.request', method=method, host=host) as span:
+            while True:
+                try:
+                    response = self.session.request(method, url, timeout=timeout, **kwargs)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    metrics.incr('http_requests', host=host, status=type(e).__name__)
+                    if attempt >= self.max_retries:
+                        raise
+                else:
+                    metrics.incr('http_requests', host=host, status=response.status_code)
+                    if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                        span.set('status', response.status_code)
+                        span.set('attempts', attempt + 1)
+                        if response.status_code >= 400:
+                            span.fail(f"HTTP {response.status_code}")
+                        return response
+                    retry_after = _retry_after_seconds(response)
+                    response.close()
+                    if retry_after is not None:
+                        time.sleep(retry_after)
+                        attempt += 1
+                        metrics.incr('http_retries', host=host)
+                        continue
+                time.sleep(self._backoff_delay(attempt))
+                attempt += 1
+                metrics.incr('http_retries', host=host)
+    
+    def close(self):
+        self._adapter.close()
+    
+    def _backoff_delay(self, attempt):
+        # Full jitter: 0 ~ backoff * 2^attempt 사이에서 무작위로 대기
+        return random.uniform(0, self.backoff * (2 ** attempt))
+
+
+def _retry_after_seconds(response, limit=30.0):
+    """Retry-After 헤더(초 단위)를 읽어 최대 limit초로 제한"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return min(max(float(value), 0.0), limit)
+    except ValueError:
+        return None
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """프로세스 전체에서 공유하는 HTTP 클라이언트 반환"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HTTPClient()
+    return _client
@@ -0,0 +1,228 @@
+"""
+백그라운드 에이전트 실행기
+에이전트 실행을 공유 스레드 풀에 맡기고 작업 핸들(Job)로 진행 상황 확인, 결과 조회, 취소를 합니다.
+Streamlit 세션이 다시 실행(rerun)되어도 작업은 계속 진행되므로 같은 요청을 다시 보내지 않아도 됩니다.
+"""
+
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import agent_registry
+from config import Config
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+FINISHED_STATES = frozenset({DONE, FAILED, CANCELLED})
+
+
+class QueueFullError(Exception):
+    """대기 중인 작업이 너무 많아 새 작업을 받을 수 없음"""
+
+
+class Job:
+    """에이전트 실행 작업 핸들"""
+    
+    def __init__(self, agent_name, prompt, session=None):
+        self.id = uuid.uuid4().hex
+        self.agent_name = agent_name
+        self.prompt = prompt
+        self.session = session  # 대화 세션 (있으면 에이전트 대신 세션으로 실행)
+        self.status = PENDING
+        self.chunks = []        # 스트리밍 에이전트가 지금까지 만든 응답 조각
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel_event = threading.Event()
+        self._done_event = threading.Event()
+        # 호출 측 스레드(cancel)와 워커 스레드(_start, _finish)가 함께 바꾸는 상태를 보호
+        self._state_lock = threading.Lock()
+    
+    @property
+    def text(self):
+        """지금까지 생성된 응답 (완료되면 최종 결과)"""
+        if self.result is not None:
+            return str(self.result)
+        return ''.join(self.chunks)
+    
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+    
+    @property
+    def cancel_requested(self):
+        return self._cancel_event.is_set()
+    
+    def cancel(self):
+        """작업 취소 요청
+
+        대기 중인 작업은 실행되지 않고, 스트리밍 중인 작업은 다음 조각에서 멈춥니다.
+        스트리밍하지 않는 에이전트는 실행을 중간에 멈출 수 없으므로 결과만 버립니다.
+        """
+        with self._state_lock:
+            self._cancel_event.set()
+            if self.status == PENDING:
+                self._set_finished(CANCELLED)
+    
+    def wait(self, timeout=None):
+        """작업이 끝날 때까지 대기 (끝났으면 True)"""
+        return self._done_event.wait(timeout)
+    
+    def _start(self):
+        """실행 시작 상태로 바꿈 (이미 끝났거나 취소 요청이 있으면 False)"""
+        with self._state_lock:
+            if self.finished or self.cancel_requested:
+                return False
+            self.status = RUNNING
+            self.started_at = time.time()
+            return True
+    
+    def _finish(self, status, result=None, error=None):
+        """최종 상태 기록 (취소 요청이 먼저 왔으면 결과를 버리고 CANCELLED로 끝냄)"""
+        with self._state_lock:
+            if self.finished:
+                return
+            if self.cancel_requested:
+                status = CANCELLED
+            else:
+                self.result = result
+                self.error = error
+            self._set_finished(status)
+    
+    def _set_finished(self, status):
+        # 호출 측에서 self._state_lock을 잡고 있어야 함
+        self.status = status
+        self.finished_at = time.time()
+        self._done_event.set()
+
+
+class JobRunner:
+    """여러 세션이 함께 쓰는 에이전트 실행 스레드 풀
+
+    GeminiAgent처럼 동시에 실행해도 되는 에이전트(arun 지원)는 하나를 공유하고,
+    실행 상태를 인스턴스에 저장하는 CodeAgent는 작업마다 풀에서 빌려 씁니다.
+    """
+    
+    def __init__(self, max_workers=None, max_pending=None, retention=None):
+        self.max_workers = max_workers or Config.JOB_WORKERS
+        self.max_pending = Config.JOB_MAX_PENDING if max_pending is None else max_pending
+        self.retention = Config.JOB_RETENTION if retention is None else retention
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='agent-job')
+        self._jobs = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._agent_pools = {}  # 에이전트 이름 -> 쉬고 있는 CodeAgent 인스턴스 큐
+    
+    def submit(self, agent_name, prompt, session=None):
+        """작업을 등록하고 Job 반환 (대기열이 가득 차면 QueueFullError)
+
+        session(chat_session.AgentSession)을 주면 이전 대화를 이어서 실행합니다.
+        """
+        return self.submit_many(agent_name, [prompt], session=session)[0]
+    
+    def submit_many(self, agent_name, prompts, session=None):
+        """여러 작업을 한꺼번에 등록하고 Job 목록 반환
+
+        대기열에 모두 들어갈 자리가 없으면 하나도 등록하지 않고 QueueFullError를 냅니다.
+        같은 세션의 작업은 세션 안에서 차례로 실행됩니다.
+        """
+        jobs = [Job(agent_name, prompt, session) for prompt in prompts]
+        with self._lock:
+            if self.max_pending and self._pending + len(jobs) > self.max_pending:
+                raise QueueFullError(f"대기 중인 작업이 {self.max_pending}개를 넘었습니다.")
+            self._prune()
+            for job in jobs:
+                self._jobs[job.id] = job
+            self._pending += len(jobs)
+        for job in jobs:
+            self._executor.submit(self._run, job)
+        return jobs
+    
+    def get(self, job_id):
+        """작업 ID로 Job 반환 (없으면 None)"""
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
+    
+    def stats(self):
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job.status == RUNNING)
+            return {
+                'workers': self.max_workers,
+                'pending': self._pending,
+                'running': running,
+                'tracked_jobs': len(self._jobs),
+            }
+    
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+    
+    def _prune(self):
+        # 호출 측에서 self._lock을 잡고 있어야 함
+        cutoff = time.time() - self.retention
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+    
+    def _run(self, job):
+        with self._lock:
+            self._pending -= 1
+        if not job._start():  # 시작 전에 취소됨
+            job._finish(CANCELLED)
+            return
+        
+        try:
+            if job.session is not None:
+                agent, release = job.session, lambda: None
+            else:
+                agent, release = self._checkout(job.agent_name)
+            try:
+                if hasattr(agent, 'run_stream'):
+                    stream = agent.run_stream(job.prompt)
+                    try:
+                        for chunk in stream:
+                            if job.cancel_requested:
+                                break
+                            job.chunks.append(chunk)
+                    finally:
+                        stream.close()
+                    result = ''.join(job.chunks)
+                else:
+                    result = agent.run(job.prompt)
+            finally:
+                release()
+        except Exception as e:
+            job._finish(FAILED, error=f"오류가 발생했습니다: {str(e)}")
+            return
+        job._finish(DONE, result=result)
+    
+    def _checkout(self, agent_name):
+        """(에이전트, 반납 함수) 반환"""
+        agent = agent_registry.get_agent(agent_name)
+        if hasattr(agent, 'arun'):
+            return agent, lambda: None
+        
+        with self._lock:
+            pool = self._agent_pools.get(agent_name)
+            if pool is None:
+                pool = self._agent_pools[agent_name] = queue.SimpleQueue()
+                pool.put(agent)
+        try:
+            agent = pool.get_nowait()
+        except queue.Empty:
+            # 워커 수만큼만 동시에 실행되므로 인스턴스도 최대 워커 수까지만 생김
+            agent = agent_registry.create_agent(agent_name)
+        return agent, lambda: pool.put(agent)
@@ -0,0 +1,172 @@
+"""
+제공자별 API 키 풀
+키가 여러 개면 진행 중인 요청이 가장 적은 키에 요청을 보내(같으면 돌아가며) 키들의 할당량을 함께 쓰고,
+429를 받은 키는 잠시 빼 두었다가(연속으로 받으면 더 오래) 다시 사용합니다.
+인증에 실패한 키는 다시 쓰지 않습니다.
+"""
+
+import itertools
+import threading
+import time
+
+import metrics
+from config import Config
+from rate_limit import is_overload
+
+# 잘못된 키로 보는 예외 이름
+AUTH_ERRORS = frozenset({'PermissionDenied', 'Unauthenticated', 'AuthenticationError', 'PermissionDeniedError'})
+
+
+def is_auth_error(error):
+    if type(error).__name__ in AUTH_ERRORS or 'API key not valid' in str(error):
+        return True
+    status = getattr(error, 'status_code', None) or getattr(error, 'code', None)
+    return status in (401, 403)
+
+
+class KeyState:
+    """키 하나의 사용 현황"""
+    
+    def __init__(self, key):
+        self.key = key
+        self.label = Config._mask_api_key(key)
+        self.in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+        self.consecutive_throttles = 0
+        self.drained_until = 0.0
+        self.invalid = False
+
+
+class KeyPool:
+    """least-in-flight로 키를 고르고 429를 받은 키는 cooldown초 동안 빼는 키 풀"""
+    
+    def __init__(self, keys, cooldown=None):
+        if not keys:
+            raise ValueError("API 키가 하나 이상 필요합니다.")
+        self.cooldown = Config.API_KEY_COOLDOWN if cooldown is None else cooldown
+        self.keys = [KeyState(key) for key in keys]
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """요청에 쓸 키 (KeyState) 반환, 요청이 끝나면 release로 반납"""
+        with self._lock:
+            now = time.monotonic()
+            usable = [state for state in self.keys if not state.invalid]
+            if not usable:
+                raise ValueError("사용할 수 있는 API 키가 없습니다.")
+            ready = [state for state in usable if state.drained_until <= now]
+            if not ready:
+                # 모두 쉬는 중이면 가장 먼저 돌아올 키 사용 (대기는 rate_limit의 동시 실행 창이 맡음)
+                ready = [min(usable, key=lambda state: state.drained_until)]
+            # 진행 중인 요청이 같으면 돌아가며 고르도록 시작 위치를 바꿈
+            start = next(self._turn) % len(ready)
+            rotated = ready[start:] + ready[:start]
+            state = min(rotated, key=lambda state: state.in_flight)
+            state.in_flight += 1
+            state.requests += 1
+            return state
+    
+    def release(self, state, error=None):
+        with self._lock:
+            state.in_flight -= 1
+            if error is None:
+                state.consecutive_throttles = 0
+                result = 'success'
+            elif is_auth_error(error):
+                state.invalid = True
+                result = 'invalid'
+            elif is_overload(error):
+                state.throttled += 1
+                state.consecutive_throttles += 1
+                # 연속으로 429를 받으면 쉬는 시간을 두 배씩 늘림 (최대 16배)
+                backoff = 2 ** min(state.consecutive_throttles - 1, 4)
+                state.drained_until = time.monotonic() + self.cooldown * backoff
+                result = 'throttled'
+            else:
+                result = 'error'
+        metrics.incr('api_key_requests', key=state.label, result=result)
+    
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            return [
+                {
+                    'key': state.label,
+                    'in_flight': state.in_flight,
+                    'requests': state.requests,
+                    'throttled': state.throttled,
+                    'drained_seconds': round(max(0.0, state.drained_until - now), 1),
+                    'invalid': state.invalid,
+                }
+                for state in self.keys
+            ]
+
+
+class KeyPoolModel:
+    """키별 모델({키: 모델})에 KeyPool로 요청을 나눠 보내는 모델 (generate_content / generate_content_async)"""
+    
+    def __init__(self, models, pool=None):
+        self.models = dict(models)
+        self.pool = pool or KeyPool(list(self.models))
+        first = next(iter(self.models.values()))
+        self.model_name = getattr(first, 'model_name', type(first).__name__)
+    
+    def generate_content(self, contents, stream=False):
+        if stream:
+            return self._stream(contents)
+        state = self.pool.acquire()
+        try:
+            result = self.models[state.key].generate_content(contents)
+        except Exception as e:
+            self.pool.release(state, e)
+            raise
+        except BaseException:
+            self.pool.release(state)
+            raise
+        self.pool.release(state)
+        return result
+    
+    def _stream(self, contents):
+        # 스트림을 다 읽을 때까지 키를 사용 중으로 둠
+        state = self.pool.acquire()
+        error = None
+        try:
+            yield from self.models[state.key].generate_content(contents, stream=True)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.pool.release(state, error)
+    
+    async def generate_content_async(self, contents):
+        state = self.pool.acquire()
+        try:
+            result = await self.models[state.key].generate_content_async(contents)
+        except Exception as e:
+            self.pool.release(state, e)
+            raise
+        except BaseException:
+            self.pool.release(state)
+            raise
+        self.pool.release(state)
+        return result
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_key_pool(provider, keys):
+    """프로세스 전체에서 공유하는 제공자별 키 풀 (같은 키를 쓰는 모든 모델이 사용 현황을 공유)"""
+    with _pools_lock:
+        pool = _pools.get(provider)
+        if pool is None or [state.key for state in pool.keys] != list(keys):
+            pool = _pools[provider] = KeyPool(keys)
+        return pool
+
+
+def key_pool_stats():
+    with _pools_lock:
+        return {provider: pool.stats() for provider, pool in _pools.items()}
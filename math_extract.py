@@ -0,0 +1,143 @@
+"""
+텍스트에서 수학 표현식 추출
+미리 컴파일한 토큰 정규식 하나로 텍스트를 한 번만 훑으면서, 괄호가 중첩된 식을 포함해
+연산자가 하나 이상 있는 가장 긴 식들을 모두 찾습니다.
+큰 파일은 조각(chunk) 단위로 읽어(경로는 mmap 사용) 메모리를 일정하게 유지합니다.
+"""
+
+import codecs
+import mmap
+import os
+import re
+
+DEFAULT_CHUNK_SIZE = 1 << 20  # 1MB
+MAX_DEPTH = 64                # 괄호 최대 중첩 깊이
+MAX_CARRY = 64 * 1024         # 조각 경계에서 다음 조각으로 넘길 최대 길이
+
+# 수식에 나올 수 있는 문자 (줄바꿈은 포함하지 않으므로 식은 줄을 넘지 않음)
+_EXPRESSION_CHARS = '0123456789.()+-*/% \t'
+
+_NUM, _OP, _LPAREN, _RPAREN, _OTHER = range(5)
+
+_TOKEN_RE = re.compile(
+    r'(?P<num>[0-9]+(?:\.[0-9]+)?)'
+    r'|(?P<op>\*\*|//|[-+*/%])'
+    r'|(?P<lparen>\()'
+    r'|(?P<rparen>\))'
+    r'|(?P<space>[ \t]+)'
+    r'|(?P<other>[^0-9()+\-*/% \t]+|.)',
+    re.DOTALL,
+)
+_KINDS = {'num': _NUM, 'op': _OP, 'lparen': _LPAREN, 'rparen': _RPAREN, 'other': _OTHER}
+
+
+def _tokenize(text):
+    return [
+        (_KINDS[match.lastgroup], match.start(), match.end(), match.group())
+        for match in _TOKEN_RE.finditer(text)
+        if match.lastgroup != 'space'
+    ]
+
+
+def _parse_operand(tokens, i, depth):
+    """[부호] (숫자 | '(' 식 ')') 를 읽고 (다음 위치, 연산자 수) 반환 (실패 시 None)"""
+    n = len(tokens)
+    if i < n and tokens[i][0] == _OP and tokens[i][3] in '+-':
+        i += 1
+    if i >= n:
+        return None
+    kind = tokens[i][0]
+    if kind == _NUM:
+        return i + 1, 0
+    if kind == _LPAREN and depth < MAX_DEPTH:
+        inner = _parse_expression(tokens, i + 1, depth + 1)
+        if inner is not None and inner[0] < n and tokens[inner[0]][0] == _RPAREN:
+            return inner[0] + 1, inner[1]
+    return None
+
+
+def _parse_expression(tokens, i, depth=0):
+    """피연산자 (연산자 피연산자)* 를 최대한 길게 읽고 (다음 위치, 연산자 수) 반환"""
+    operand = _parse_operand(tokens, i, depth)
+    if operand is None:
+        return None
+    j, ops = operand
+    while j < len(tokens) and tokens[j][0] == _OP:
+        operand = _parse_operand(tokens, j + 1, depth)
+        if operand is None:
+            break
+        j = operand[0]
+        ops += operand[1] + 1
+    return j, ops
+
+
+def find_math_expressions(text):
+    """텍스트에 있는 모든 (가장 긴) 수학 표현식 목록 반환"""
+    tokens = _tokenize(text)
+    expressions = []
+    i = 0
+    while i < len(tokens):
+        parsed = _parse_expression(tokens, i) if tokens[i][0] != _OTHER else None
+        if parsed is None:
+            i += 1
+            continue
+        j, ops = parsed
+        if ops:
+            expressions.append(text[tokens[i][1]:tokens[j - 1][2]])
+        i = j
+    return expressions
+
+
+def _split_tail(text):
+    """끝에서 수식 문자로만 이루어진 부분(다음 조각과 이어질 수 있음)의 시작 위치"""
+    cut = len(text)
+    while cut > 0 and text[cut - 1] in _EXPRESSION_CHARS:
+        cut -= 1
+    return cut
+
+
+def _iter_chunks(source, chunk_size, encoding):
+    """경로 또는 파일 객체에서 텍스트 조각을 차례로 반환"""
+    if isinstance(source, (str, bytes, os.PathLike)):
+        with open(source, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return
+            decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for start in range(0, size, chunk_size):
+                    yield decoder.decode(mm[start:start + chunk_size])
+            yield decoder.decode(b'', final=True)
+        return
+    
+    decoder = None
+    while True:
+        data = source.read(chunk_size)
+        if not data:
+            break
+        if isinstance(data, bytes):
+            decoder = decoder or codecs.getincrementaldecoder(encoding)(errors='replace')
+            data = decoder.decode(data)
+        yield data
+    if decoder is not None:
+        yield decoder.decode(b'', final=True)
+
+
+def iter_math_expressions(source, chunk_size=DEFAULT_CHUNK_SIZE, encoding='utf-8'):
+    """파일(경로 또는 파일 객체)을 조각 단위로 읽으며 수학 표현식을 차례로 반환
+
+    조각 경계에 걸친 식은 다음 조각과 이어 붙인 뒤 찾으므로 잘리지 않습니다.
+    문자열 자체를 넘기려면 io.StringIO로 감싸세요.
+    """
+    carry = ''
+    for chunk in _iter_chunks(source, chunk_size, encoding):
+        text = carry + chunk
+        cut = _split_tail(text)
+        # 수식 문자만 계속 이어져도 carry가 끝없이 커지지 않도록 제한
+        if len(text) - cut > MAX_CARRY:
+            cut = len(text)
+        yield from find_math_expressions(text[:cut])
+        carry = text[cut:]
+    if carry:
+        yield from find_math_expressions(carry)
+
@@ -0,0 +1,365 @@
+"""
+실행 단계별 시간 측정과 지표 내보내기
+에이전트 실행, LLM 호출, 응답 해석, 도구, HTTP 요청을 중첩된 구간(span)으로 기록하고
+호출 수, 오류 수, 캐시 적중, 프롬프트/응답 크기 같은 카운터를 모읍니다.
+
+기록은 sink로 전달되며(JSON 로그 등, add_sink로 추가), 모인 지표는 Prometheus 텍스트 형식으로
+내보낼 수 있습니다. 비활성화 상태에서는 전역 변수 하나만 확인하고 바로 돌아가므로 비용이 거의 없습니다.
+
+    METRICS_ENABLED=true METRICS_LOG_PATH=- METRICS_PORT=9100 python server.py
+"""
+
+import contextvars
+import functools
+import itertools
+import json
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import Config
+
+# 구간 시간 히스토그램 버킷 (초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PROMETHEUS_PREFIX = 'smolagents_toy'
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_enabled = False
+_sinks = []
+_current_span = contextvars.ContextVar('metrics_current_span', default=None)
+_span_ids = itertools.count(1)
+
+
+class MetricsRegistry:
+    """카운터, 합계(summary), 구간 시간 히스토그램 저장소"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}    # (이름, 레이블) -> 값
+        self._summaries = {}   # (이름, 레이블) -> [개수, 합계]
+        self._spans = {}       # 구간 이름 -> [버킷별 개수..., 합계, 개수, 오류 수]
+    
+    def incr(self, name, value=1, labels=()):
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+    
+    def observe(self, name, value, labels=()):
+        key = (name, labels)
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is None:
+                summary = self._summaries[key] = [0, 0.0]
+            summary[0] += 1
+            summary[1] += value
+    
+    def record_span(self, name, duration, error):
+        with self._lock:
+            data = self._spans.get(name)
+            if data is None:
+                data = self._spans[name] = [0] * (len(LATENCY_BUCKETS) + 3)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if duration <= bound:
+                    data[i] += 1
+            data[-3] += duration
+            data[-2] += 1
+            if error:
+                data[-1] += 1
+    
+    def snapshot(self):
+        """현재 지표를 dict로 반환"""
+        with self._lock:
+            return {
+                'counters': {_format_key(name, labels): value for (name, labels), value in self._counters.items()},
+                'summaries': {
+                    _format_key(name, labels): {'count': count, 'sum': total}
+                    for (name, labels), (count, total) in self._summaries.items()
+                },
+                'spans': {
+                    name: {'count': data[-2], 'errors': data[-1], 'total_seconds': data[-3]}
+                    for name, data in self._spans.items()
+                },
+            }
+    
+    def render_prometheus(self):
+        """Prometheus 텍스트 형식 (exposition format 0.0.4)"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            summaries = sorted(self._summaries.items())
+            spans = sorted((name, list(data)) for name, data in self._spans.items())
+        
+        lines = []
+        typed = set()
+        for (name, labels), value in counters:
+            metric = f"{PROMETHEUS_PREFIX}_{name}_total"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_format_labels(labels)} {value}")
+        for (name, labels), (count, total) in summaries:
+            metric = f"{PROMETHEUS_PREFIX}_{name}"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} summary")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {count}")
+        
+        if spans:
+            metric = f"{PROMETHEUS_PREFIX}_span_duration_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for name, data in spans:
+                for bound, count in zip(LATENCY_BUCKETS, data):
+                    lines.append(f"{metric}_bucket{_format_labels((('span', name), ('le', repr(bound))))} {count}")
+                lines.append(f"{metric}_bucket{_format_labels((('span', name), ('le', '+Inf')))} {data[-2]}")
+                lines.append(f"{metric}_sum{_format_labels((('span', name),))} {data[-3]}")
+                lines.append(f"{metric}_count{_format_labels((('span', name),))} {data[-2]}")
+            metric = f"{PROMETHEUS_PREFIX}_span_errors_total"
+            lines.append(f"# TYPE {metric} counter")
+            for name, data in spans:
+                lines.append(f"{metric}{_format_labels((('span', name),))} {data[-1]}")
+        return '\n'.join(lines) + '\n'
+    
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._summaries.clear()
+            self._spans.clear()
+
+
+def _format_key(name, labels):
+    if not labels:
+        return name
+    return name + '{' + ','.join(f"{key}={value}" for key, value in labels) + '}'
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+registry = MetricsRegistry()
+
+
+class Span:
+    """측정 구간 (with 문으로 사용, 안에서 연 구간은 자식 구간이 됨)"""
+    
+    __slots__ = ('name', 'attrs', 'error', 'trace_id', 'span_id', 'parent_id', 'start', '_t0', '_token')
+    
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.error = None
+    
+    def __enter__(self):
+        parent = _current_span.get()
+        self.trace_id = parent.trace_id if parent is not None else uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent is not None else None
+        self.span_id = format(next(_span_ids), 'x')
+        self._token = _current_span.set(self)
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._t0
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # 다른 컨텍스트에서 닫힌 경우 (다른 스레드에서 정리된 제너레이터 등)
+            pass
+        if exc_type is not None and self.error is None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        registry.record_span(self.name, duration, self.error is not None)
+        if _sinks:
+            event = {
+                'type': 'span',
+                'name': self.name,
+                'trace_id': self.trace_id,
+                'span_id': self.span_id,
+                'parent_id': self.parent_id,
+                'start': self.start,
+                'duration_ms': round(duration * 1000, 3),
+                'error': self.error,
+                'attrs': self.attrs,
+            }
+            for sink in list(_sinks):
+                sink(event)
+        return False
+    
+    def set(self, key, value):
+        """구간 속성 추가 (응답 크기 등)"""
+        self.attrs[key] = value
+    
+    def fail(self, message):
+        """예외 없이 실패한 경우(오류 문자열 반환 등) 오류로 기록"""
+        self.error = message
+
+
+class _NoopSpan:
+    """비활성화 상태에서 쓰는 아무것도 하지 않는 구간"""
+    
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+    
+    def set(self, key, value):
+        pass
+    
+    def fail(self, message):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def enabled():
+    return _enabled
+
+
+def span(name, **attrs):
+    """측정 구간 생성 (비활성화 상태면 공유 no-op 구간 반환)"""
+    if not _enabled:
+        return _NOOP_SPAN
+    return Span(name, attrs)
+
+
+def timed(name=None):
+    """함수 호출 전체를 구간으로 기록하는 데코레이터 (도구 함수 등)"""
+    def decorator(function):
+        span_name = name or function.__name__
+        
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with Span(span_name, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def incr(name, value=1, **labels):
+    """카운터 증가 (예: incr('cache_requests', cache='search', result='hit'))"""
+    if _enabled:
+        registry.incr(name, value, tuple(sorted(labels.items())))
+
+
+def observe(name, value, **labels):
+    """값 기록 (합계와 개수, 예: 프롬프트 길이)"""
+    if _enabled:
+        registry.observe(name, value, tuple(sorted(labels.items())))
+
+
+def add_sink(sink):
+    """구간이 끝날 때마다 호출할 함수(event dict를 받음) 추가"""
+    _sinks.append(sink)
+    return sink
+
+
+def remove_sink(sink):
+    if sink in _sinks:
+        _sinks.remove(sink)
+
+
+class JSONLogSink:
+    """구간 기록을 한 줄짜리 JSON 로그로 쓰는 sink (path가 '-' 또는 None이면 stderr)"""
+    
+    def __init__(self, path=None):
+        self._lock = threading.Lock()
+        if path in (None, '-'):
+            self._file = sys.stderr
+            self._owns_file = False
+        else:
+            self._file = open(path, 'a', encoding='utf-8')
+            self._owns_file = True
+    
+    def __call__(self, event):
+        line = json.dumps(event, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+    
+    def close(self):
+        if self._owns_file:
+            self._file.close()
+
+
+def enable(log_path=None):
+    """측정 시작 (log_path를 주면 JSON 로그 sink도 추가)"""
+    global _enabled
+    if log_path:
+        add_sink(JSONLogSink(log_path))
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def render_prometheus():
+    return registry.render_prometheus()
+
+
+def snapshot():
+    return registry.snapshot()
+
+
+def reset():
+    registry.reset()
+
+
+class _PrometheusHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        data = render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', PROMETHEUS_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port, host='127.0.0.1'):
+    """백그라운드 스레드에서 /metrics 엔드포인트 서버 시작 (종료: server.shutdown())
+
+    기본값은 로컬에서만 접속할 수 있는 주소이며, 외부에 열려면 host를 직접 지정합니다.
+    """
+    server = ThreadingHTTPServer((host, port), _PrometheusHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+_http_server = None
+
+
+def configure():
+    """Config 설정에 따라 측정을 켜고 /metrics 서버를 시작 (여러 번 호출해도 한 번만 적용)"""
+    global _http_server
+    if not Config.METRICS_ENABLED or _enabled:
+        return
+    enable(Config.METRICS_LOG_PATH)
+    if Config.METRICS_PORT and _http_server is None:
+        # 앱 서버(SERVER_HOST)와 같은 주소에서만 접속할 수 있게 함
+        _http_server = start_http_server(Config.METRICS_PORT, Config.SERVER_HOST)
+
+
+configure()
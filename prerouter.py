@@ -0,0 +1,224 @@
+"""
+LLM을 거치지 않는 빠른 경로 (pre-router)
+"2 + 3 * 4를 계산해줘", "서울 날씨"처럼 어떤 도구를 어떤 입력으로 부를지 분명한 질문은
+규칙(정규식 등)으로 알아보고 LLM 호출 없이 바로 도구를 실행합니다.
+규칙의 확신도가 기준보다 낮거나 도구 결과가 실패이면 원래대로 에이전트(LLM)에 맡깁니다.
+"""
+
+import re
+import threading
+
+import metrics
+from config import Config
+from math_extract import find_math_expressions
+from tool_registry import get_tool_name
+
+
+class Route:
+    """규칙이 찾은 도구 호출 (도구 이름, 위치 인자, 확신도)"""
+    
+    def __init__(self, tool_name, args, confidence):
+        self.tool_name = tool_name
+        self.args = tuple(args)
+        self.confidence = confidence
+
+
+class Rule:
+    """질문 -> Route 규칙
+
+    Args:
+        name: 통계에 쓰는 규칙 이름
+        tool_name: 호출할 도구 이름 (에이전트에 없는 도구면 규칙은 쓰이지 않음)
+        match: 질문 -> (위치 인자 튜플, 확신도) 또는 None
+        accept: 도구 결과 -> 그대로 돌려줄지 여부 (False면 에이전트에 맡김)
+    """
+    
+    def __init__(self, name, tool_name, match, accept=None):
+        self.name = name
+        self.tool_name = tool_name
+        self.match = match
+        self.accept = accept
+    
+    def __call__(self, prompt):
+        matched = self.match(prompt)
+        if matched is None:
+            return None
+        args, confidence = matched
+        return Route(self.tool_name, args, confidence)
+
+
+class PreRouter:
+    """규칙을 차례로 적용해 도구를 바로 실행하는 라우터
+
+    Args:
+        tools: 에이전트의 도구 목록 (규칙이 가리키는 도구를 찾는 데 사용)
+        rules: Rule 목록 (앞에 있는 규칙이 먼저 적용됨)
+        min_confidence: 이보다 확신도가 낮은 경로는 쓰지 않음
+    """
+    
+    def __init__(self, tools, rules=(), min_confidence=None):
+        self._tools = {get_tool_name(tool): tool for tool in tools}
+        self.rules = []
+        self.min_confidence = Config.PREROUTE_MIN_CONFIDENCE if min_confidence is None else min_confidence
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.rule_hits = {}
+        for rule in rules:
+            self.add_rule(rule)
+    
+    def add_rule(self, rule):
+        """규칙 추가 (도구가 없으면 무시하고 False 반환)"""
+        if rule.tool_name not in self._tools:
+            return False
+        self.rules.append(rule)
+        return True
+    
+    def route(self, prompt):
+        """바로 답할 수 있으면 도구 결과 문자열, 아니면 None"""
+        with metrics.span('preroute') as span:
+            for rule in self.rules:
+                route = rule(prompt)
+                if route is None or route.confidence < self.min_confidence:
+                    continue
+                tool = self._tools[route.tool_name]
+                call = tool.forward if hasattr(tool, 'forward') else tool
+                result = call(*route.args)
+                if rule.accept is not None and not rule.accept(result):
+                    continue
+                span.set('rule', rule.name)
+                self._record(rule.name)
+                # GeminiAgent가 도구를 실행했을 때와 같은 형식으로 반환
+                return f"도구 '{route.tool_name}' 실행 결과:\n{result}"
+            self._record(None)
+            return None
+    
+    def _record(self, rule_name):
+        with self._lock:
+            if rule_name is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.rule_hits[rule_name] = self.rule_hits.get(rule_name, 0) + 1
+        metrics.incr('preroute', rule=rule_name or '-', result='miss' if rule_name is None else 'hit')
+    
+    def stats(self):
+        """적중률 통계"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'rules': dict(self.rule_hits),
+            }
+
+
+class PreroutedAgent:
+    """run 앞에 PreRouter를 두는 에이전트 래퍼 (CodeAgent용, 나머지 속성은 원래 에이전트로 전달)"""
+    
+    def __init__(self, agent, prerouter):
+        self.agent = agent
+        self.prerouter = prerouter
+    
+    def run(self, prompt, *args, **kwargs):
+        result = self.prerouter.route(prompt)
+        if result is not None:
+            return result
+        return self.agent.run(prompt, *args, **kwargs)
+    
+    def __getattr__(self, name):
+        return getattr(self.agent, name)
+
+
+# --- 기본 규칙 ---
+
+_CALC_PREFIX_RE = re.compile(r'^(?:calculate|compute|what\s*is|what\'s|계산\s*(?:해\s*줘|해\s*주세요)?\s*:?)?$', re.IGNORECASE)
+_CALC_SUFFIX_RE = re.compile(
+    r'^(?:을|를|은|는|이|가|의)?\s*'
+    r'(?:계산\s*(?:해\s*줘|해\s*주세요|해\s*줄래|해|하면|결과는?)?|값은?|결과는?)?\s*'
+    r'(?:얼마(?:야|예요|에요|인가요|지)?)?\s*[=?.!]*$'
+)
+
+
+def match_calculation(prompt):
+    """수식 하나와 "계산해줘" 같은 말만 있는 질문"""
+    expressions = find_math_expressions(prompt)
+    if len(expressions) != 1:
+        return None
+    expression = expressions[0]
+    prefix, _, suffix = prompt.partition(expression)
+    if _CALC_PREFIX_RE.match(prefix.strip()) and _CALC_SUFFIX_RE.match(suffix.strip()):
+        return (expression,), 0.95
+    return None
+
+
+_WEATHER_RE = re.compile(
+    r'^\s*(?:(?:오늘|지금|현재)\s+)?(?P<cities>[가-힣A-Za-z][가-힣A-Za-z\s,·]*?)\s*(?:의\s*)?(?:현재\s*)?날씨\s*'
+    r'(?:는|가|좀)?\s*(?:어때(?:요)?|어떤가요|알려\s*(?:줘|주세요)|정보)?\s*[?.!]*\s*$'
+)
+_CITY_SPLIT_RE = re.compile(r'\s*(?:,|·|(?<=[가-힣])(?:와|과)\s|\s및\s|\s그리고\s)\s*')
+# 도시가 아니라 시점/장소를 가리키는 말 (예보나 위치 정보가 필요하므로 LLM에 맡김)
+_NOT_CITIES = frozenset({'오늘', '내일', '모레', '지금', '현재', '이번주', '주말', '여기', '우리', '우리 동네', '요즘'})
+# 도시 이름 안에 남은 접속 조사 ("서울이랑 부산"처럼 나누지 못한 목록은 LLM에 맡김)
+_CONJUNCTION_RE = re.compile(r'[가-힣](?:이랑|랑|하고|와|과)(?:\s|$)')
+
+
+def _match_cities(prompt):
+    match = _WEATHER_RE.match(prompt)
+    if match is None:
+        return None
+    cities = [city.strip() for city in _CITY_SPLIT_RE.split(match.group('cities')) if city.strip()]
+    if not cities or any(city in _NOT_CITIES or city.split()[0] in _NOT_CITIES for city in cities):
+        return None
+    if any(_CONJUNCTION_RE.search(city) for city in cities):
+        return None
+    return cities
+
+
+def match_weather(prompt):
+    """"<도시> 날씨" 형태의 질문"""
+    cities = _match_cities(prompt)
+    if cities is None or len(cities) != 1:
+        return None
+    return (cities[0],), 0.95
+
+
+def match_weather_many(prompt):
+    """"<도시>, <도시> 날씨" 형태의 질문"""
+    cities = _match_cities(prompt)
+    if cities is None or len(cities) < 2:
+        return None
+    return (', '.join(cities),), 0.9
+
+
+_TRANSLATE_RE = re.compile(
+    r'^\s*["\']?(?P<text>[^"\']+?)["\']?\s*(?:을|를)?\s*(?P<lang>한국어|영어)로\s*'
+    r'(?:번역|바꿔)\s*(?:해)?\s*(?:줘|주세요)?\s*[?.!]*\s*$'
+)
+
+
+def match_translation(prompt):
+    """"<문장>을 한국어로/영어로 번역해줘" 형태의 질문"""
+    match = _TRANSLATE_RE.match(prompt)
+    if match is None:
+        return None
+    return (match.group('text').strip(), 'ko' if match.group('lang') == '한국어' else 'en'), 0.9
+
+
+DEFAULT_RULES = [
+    Rule('calculate', 'calculate', match_calculation, accept=lambda result: result.startswith("계산 결과:")),
+    # 도시를 찾지 못했거나 API 키가 없는 등 날씨를 가져오지 못한 결과는 LLM에 맡김
+    Rule('weather', 'get_weather_info', match_weather, accept=lambda result: '의 날씨:' in result),
+    Rule('weather_many', 'get_weather_info_many', match_weather_many,
+         accept=lambda result: all('의 날씨:' in line for line in result.split('\n'))),
+    Rule('translate', 'translate_text', match_translation, accept=lambda result: result.startswith("번역 결과:")),
+]
+
+
+def create_prerouter(tools, rules=None):
+    """Config 설정에 따라 기본 규칙을 가진 PreRouter 생성 (꺼져 있거나 쓸 규칙이 없으면 None)"""
+    if not Config.PREROUTE_ENABLED:
+        return None
+    prerouter = PreRouter(tools, DEFAULT_RULES if rules is None else rules)
+    return prerouter if prerouter.rules else None
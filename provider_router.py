@@ -0,0 +1,412 @@
+"""
+LLM 제공자 라우터 (헤지 요청, 장애 조치, 서킷 브레이커)
+주 제공자가 hedge_delay 안에 답하지 않으면 보조 제공자(OpenAI 또는 다른 Gemini 모델)에도 같은 요청을 보내고
+먼저 온 응답을 사용합니다. 한쪽이 실패하면 다른 쪽으로 넘어가고, 연속으로 실패한 제공자는
+서킷 브레이커가 열려 reset_timeout 동안 건너뜁니다.
+
+ProviderRouter는 GenerativeModel과 같은 generate_content / generate_content_async를 제공하므로
+GeminiAgent(model=...)에 그대로 넣을 수 있습니다.
+"""
+
+import asyncio
+import contextvars
+import operator
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import metrics
+from config import Config
+from key_pool import KeyPoolModel, get_key_pool
+from rate_limit import RateLimitedModel, get_limiter
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class ProviderError(Exception):
+    """모든 제공자 호출이 실패했거나 서킷이 열려 있음"""
+
+
+class CircuitBreaker:
+    """제공자별 서킷 브레이커
+
+    연속 실패가 failure_threshold번이면 열림(OPEN) 상태가 되어 요청을 보내지 않고,
+    reset_timeout이 지나면 시험 요청 하나만 보내(HALF_OPEN) 성공하면 다시 닫습니다.
+    """
+    
+    def __init__(self, failure_threshold=None, reset_timeout=None):
+        self.failure_threshold = failure_threshold or Config.CIRCUIT_FAILURE_THRESHOLD
+        self.reset_timeout = Config.CIRCUIT_RESET_TIMEOUT if reset_timeout is None else reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+    
+    def allow(self):
+        """지금 요청을 보내도 되는지 (HALF_OPEN에서는 시험 요청 하나만 허용)"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+    
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+            self._probing = False
+    
+    def release(self):
+        """결과 없이 끝난 요청(취소됨)의 시험 요청 자리 반납"""
+        with self._lock:
+            self._probing = False
+
+
+class Provider:
+    """라우터가 쓰는 제공자 (이름, 모델, 서킷 브레이커)"""
+    
+    def __init__(self, name, model, breaker):
+        self.name = name
+        self.model = model
+        self.breaker = breaker
+
+
+class ProviderRouter:
+    """여러 LLM 제공자에 헤지 요청과 장애 조치를 하는 모델
+
+    Args:
+        providers: (이름, 모델) 목록 (앞에 있을수록 우선, 모델은 generate_content를 가진 객체)
+        hedge_delay: 응답이 없을 때 다음 제공자에도 요청을 보내기까지 기다릴 시간(초, None이면 헤지 없이 장애 조치만)
+        failure_threshold, reset_timeout: 제공자별 서킷 브레이커 설정
+        max_workers: 동기 호출에 쓰는 스레드 수
+    """
+    
+    def __init__(self, providers, hedge_delay=None, failure_threshold=None, reset_timeout=None, max_workers=32):
+        if not providers:
+            raise ValueError("제공자가 하나 이상 필요합니다.")
+        if hedge_delay is None and Config.HEDGE_DELAY >= 0:
+            hedge_delay = Config.HEDGE_DELAY
+        self.hedge_delay = hedge_delay
+        self.providers = [
+            Provider(name, model, CircuitBreaker(failure_threshold, reset_timeout))
+            for name, model in providers
+        ]
+        # 응답 캐시 키에는 주 모델 이름을 사용
+        self.model_name = getattr(self.providers[0].model, 'model_name', self.providers[0].name)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm-provider')
+        self._lock = threading.Lock()
+        self.wins = {provider.name: 0 for provider in self.providers}
+        self.hedges = 0
+    
+    def generate_content(self, contents, stream=False):
+        if stream:
+            return self._stream(contents)
+        result, _ = self._race(lambda provider: provider.model.generate_content(contents))
+        return result
+    
+    async def generate_content_async(self, contents):
+        pending = {}  # 태스크 -> 제공자
+        errors = []
+        remaining = iter(self.providers)
+        
+        def launch():
+            provider = self._next_provider(remaining, errors)
+            if provider is not None:
+                pending[asyncio.ensure_future(self._attempt_async(provider, contents))] = provider
+            return provider
+        
+        launch()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, timeout=self._wait_timeout(remaining),
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self._record_hedge(launch())
+                    continue
+                for task in done:
+                    provider = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        errors.append(f"{provider.name}: {e}")
+                        continue
+                    self._record_win(provider)
+                    return result
+                if not pending:
+                    launch()  # 실패한 제공자 대신 다음 제공자로 장애 조치
+        finally:
+            # 진 요청은 실제로 취소됨
+            for task in pending:
+                task.cancel()
+        raise ProviderError(_failure_message(errors))
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'hedges': self.hedges,
+                'wins': dict(self.wins),
+                'circuits': {
+                    provider.name: {'state': provider.breaker.state, 'failures': provider.breaker.failures}
+                    for provider in self.providers
+                },
+            }
+    
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _race(self, call):
+        """call(제공자)를 헤지/장애 조치하며 실행하고 (먼저 성공한 결과, 아직 실행 중인 진 Future 목록) 반환
+
+        스레드에서 실행 중인 동기 호출은 중간에 멈출 수 없으므로 진 요청의 결과는 버립니다.
+        """
+        pending = {}  # Future -> 제공자
+        errors = []
+        remaining = iter(self.providers)
+        
+        def launch():
+            provider = self._next_provider(remaining, errors)
+            if provider is not None:
+                # 측정 구간이 이어지도록 호출한 스레드의 컨텍스트에서 실행
+                context = contextvars.copy_context()
+                pending[self._executor.submit(context.run, self._attempt, provider, call)] = provider
+            return provider
+        
+        launch()
+        while pending:
+            done, _ = wait(pending, timeout=self._wait_timeout(remaining), return_when=FIRST_COMPLETED)
+            if not done:
+                self._record_hedge(launch())
+                continue
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors.append(f"{provider.name}: {e}")
+                    continue
+                self._record_win(provider)
+                losers = []
+                for loser, loser_provider in pending.items():
+                    if loser.cancel():
+                        loser_provider.breaker.release()
+                    else:
+                        losers.append(loser)
+                return result, losers
+            if not pending:
+                launch()
+        raise ProviderError(_failure_message(errors))
+    
+    def _stream(self, contents):
+        # 첫 조각이 먼저 온 제공자를 고르고 나머지 조각은 그 제공자에서만 받음
+        def open_stream(provider):
+            stream = iter(provider.model.generate_content(contents, stream=True))
+            return next(stream, None), stream
+        
+        (first, stream), losers = self._race(open_stream)
+        for loser in losers:
+            loser.add_done_callback(_close_stream)
+        if first is not None:
+            yield first
+        yield from stream
+    
+    def _attempt(self, provider, call):
+        with metrics.span('provider.call', provider=provider.name):
+            try:
+                result = call(provider)
+            except Exception:
+                provider.breaker.record_failure()
+                metrics.incr('provider_requests', provider=provider.name, result='error')
+                raise
+        provider.breaker.record_success()
+        metrics.incr('provider_requests', provider=provider.name, result='success')
+        return result
+    
+    async def _attempt_async(self, provider, contents):
+        with metrics.span('provider.call', provider=provider.name):
+            try:
+                result = await provider.model.generate_content_async(contents)
+            except asyncio.CancelledError:
+                provider.breaker.release()
+                metrics.incr('provider_requests', provider=provider.name, result='cancelled')
+                raise
+            except Exception:
+                provider.breaker.record_failure()
+                metrics.incr('provider_requests', provider=provider.name, result='error')
+                raise
+        provider.breaker.record_success()
+        metrics.incr('provider_requests', provider=provider.name, result='success')
+        return result
+    
+    def _next_provider(self, remaining, errors):
+        """서킷이 닫혀 있는 다음 제공자 (없으면 None)"""
+        for provider in remaining:
+            if provider.breaker.allow():
+                return provider
+            errors.append(f"{provider.name}: 서킷 열림")
+            metrics.incr('provider_requests', provider=provider.name, result='circuit_open')
+        return None
+    
+    def _wait_timeout(self, remaining):
+        # 헤지할 제공자가 남아 있을 때만 hedge_delay마다 깨어남
+        if self.hedge_delay is None or operator.length_hint(remaining) == 0:
+            return None
+        return self.hedge_delay
+    
+    def _record_hedge(self, provider):
+        if provider is None:
+            return
+        with self._lock:
+            self.hedges += 1
+        metrics.incr('provider_hedges', provider=provider.name)
+    
+    def _record_win(self, provider):
+        with self._lock:
+            self.wins[provider.name] += 1
+        metrics.incr('provider_wins', provider=provider.name)
+
+
+def _close_stream(future):
+    if future.cancelled() or future.exception() is not None:
+        return
+    _, stream = future.result()
+    close = getattr(stream, 'close', None)
+    if close is not None:
+        close()
+
+
+def _failure_message(errors):
+    return "모든 LLM 제공자 호출이 실패했습니다: " + '; '.join(errors or ["사용 가능한 제공자 없음"])
+
+
+class _TextResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class OpenAIChatModel:
+    """OpenAI Chat Completions를 GenerativeModel처럼(generate_content) 쓰는 어댑터
+
+    contents의 첫 항목은 system 메시지로, 나머지는 하나의 user 메시지로 보냅니다.
+    """
+    
+    def __init__(self, model, api_key):
+        from openai import AsyncOpenAI, OpenAI
+        self.model_name = model
+        self._client = OpenAI(api_key=api_key)
+        self._async_client = AsyncOpenAI(api_key=api_key)
+    
+    def _messages(self, contents):
+        if isinstance(contents, str):
+            return [{"role": "user", "content": contents}]
+        system, *rest = contents
+        return [
+            {"role": "system", "content": system},
+            {"role": "user", "content": '\n\n'.join(rest)},
+        ]
+    
+    def generate_content(self, contents, stream=False):
+        response = self._client.chat.completions.create(
+            model=self.model_name, messages=self._messages(contents), stream=stream
+        )
+        if stream:
+            return self._stream(response)
+        return _TextResponse(response.choices[0].message.content or '')
+    
+    def _stream(self, response):
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield _TextResponse(chunk.choices[0].delta.content)
+    
+    async def generate_content_async(self, contents):
+        response = await self._async_client.chat.completions.create(
+            model=self.model_name, messages=self._messages(contents)
+        )
+        return _TextResponse(response.choices[0].message.content or '')
+
+
+# GeminiKeyModel이 쓰는 google.generativeai 내부 속성 (requirements.txt의 0.8.x에서 확인)
+_GENAI_MODEL_ATTRS = ('_client', '_async_client')
+
+
+def _check_genai_internals(client, model):
+    """키별 클라이언트에 필요한 google.generativeai 내부 API가 있는지 확인 (없으면 첫 요청 전에 실패)"""
+    missing = [] if hasattr(client, '_ClientManager') else ['client._ClientManager']
+    missing += [f"GenerativeModel.{name}" for name in _GENAI_MODEL_ATTRS if not hasattr(model, name)]
+    if missing:
+        import google.generativeai as genai
+        raise RuntimeError(
+            f"google-generativeai {genai.__version__}에서 키별 클라이언트를 만들 수 없습니다 "
+            f"(없는 속성: {', '.join(missing)}). requirements.txt의 버전 범위로 설치하세요."
+        )
+
+
+class GeminiKeyModel:
+    """API 키 하나를 쓰는 Gemini 모델 (genai.configure는 프로세스 전체 설정이므로 키별 클라이언트를 직접 만듦)
+
+    공개 API로는 키별 클라이언트를 만들 수 없어 내부 속성을 쓰므로, 생성할 때
+    _check_genai_internals로 확인하고 requirements.txt에서 버전 범위를 고정합니다.
+    """
+    
+    def __init__(self, model_name, api_key):
+        # google.generativeai는 import 비용이 커서 필요할 때 불러옴
+        import google.generativeai as genai
+        from google.generativeai import client
+        self.model_name = model_name
+        self._model = genai.GenerativeModel(model_name)
+        _check_genai_internals(client, self._model)
+        self._clients = client._ClientManager()
+        self._clients.configure(api_key=api_key)
+        self._model._client = self._clients.get_default_client('generative')
+    
+    def generate_content(self, contents, stream=False, **kwargs):
+        return self._model.generate_content(contents, stream=stream, **kwargs)
+    
+    async def generate_content_async(self, contents):
+        if self._model._async_client is None:
+            # grpc 비동기 클라이언트는 이벤트 루프 안에서 만들어야 함
+            self._model._async_client = self._clients.get_default_client('generative_async')
+        return await self._model.generate_content_async(contents)
+
+
+def create_model(model_config):
+    """Config.get_model_config() 형식의 설정으로 제공자별 속도 제한이 걸린 모델 생성
+
+    API 키가 여러 개면 키 풀(key_pool.py)로 요청을 나눠 보냅니다.
+    """
+    provider = model_config['provider']
+    build = GeminiKeyModel if provider == 'gemini' else OpenAIChatModel
+    keys = model_config.get('api_keys') or [model_config['api_key']]
+    if len(keys) == 1:
+        model = build(model_config['model'], keys[0])
+    else:
+        models = {key: build(model_config['model'], key) for key in keys}
+        model = KeyPoolModel(models, get_key_pool(provider, keys))
+    # 같은 제공자를 쓰는 모든 에이전트가 할당량(RPM/TPM)과 동시 호출 창을 공유
+    return RateLimitedModel(model, get_limiter(provider))
+
+
+def with_fallback(model, model_config):
+    """Config.FALLBACK_MODEL이 설정되어 있으면 model을 주 제공자로 하는 ProviderRouter, 아니면 model 그대로"""
+    fallback = Config.get_fallback_model_config()
+    if fallback is None:
+        return model
+    return ProviderRouter([
+        (f"{model_config['provider']}:{model_config['model']}", model),
+        (f"{fallback['provider']}:{fallback['model']}", create_model(fallback)),
+    ])
@@ -0,0 +1,313 @@
+"""
+LLM 제공자별 요청 속도 제한과 적응형 동시 실행 제어
+분당 요청 수(RPM)/토큰 수(TPM) 토큰 버킷으로 설정된 할당량을 넘지 않게 호출 시작을 늦추고,
+동시에 실행할 호출 수는 AIMD(성공하면 조금씩 늘리고 429/타임아웃이면 절반으로 줄임)로 조절합니다.
+한도에 걸린 호출은 실패시키지 않고 대기열에서 기다렸다가 실행하며, 429 응답은 창을 줄인 뒤 다시 시도합니다.
+
+같은 제공자를 쓰는 모든 에이전트는 get_limiter(제공자)로 같은 제한기를 공유합니다.
+"""
+
+import asyncio
+import collections
+import random
+import threading
+import time
+
+import metrics
+from config import Config
+from tool_selector import estimate_tokens
+
+# 할당량 초과/과부하로 보는 예외 이름 (google.api_core, openai, requests 등을 import하지 않고 구분)
+OVERLOAD_ERRORS = frozenset({
+    'ResourceExhausted', 'TooManyRequests', 'RateLimitError', 'ServiceUnavailable',
+    'DeadlineExceeded', 'APITimeoutError', 'Timeout', 'TimeoutError', 'ReadTimeout',
+})
+
+
+def is_overload(error):
+    """429, 과부하, 타임아웃 오류인지 (창을 줄이고 다시 시도할 오류)"""
+    if type(error).__name__ in OVERLOAD_ERRORS:
+        return True
+    status = getattr(error, 'status_code', None) or getattr(error, 'code', None)
+    return status in (429, 503)
+
+
+class TokenBucket:
+    """분당 rate_per_minute만큼 채워지는 토큰 버킷 (capacity: 한 번에 몰아 쓸 수 있는 최대량)
+
+    reserve는 토큰을 먼저 빼고(모자라면 빚) 빚을 갚을 때까지 기다릴 시간을 돌려주므로
+    먼저 예약한 호출이 먼저 실행됩니다.
+    """
+    
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def reserve(self, amount=1):
+        """amount만큼 예약하고 실행 전에 기다려야 할 시간(초) 반환"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+
+class AdaptiveConcurrency:
+    """AIMD로 크기가 바뀌는 동시 실행 창 (스레드와 asyncio 양쪽에서 사용)
+
+    성공할 때마다 창을 1/limit씩 늘리고(창 하나 분량이 성공하면 +1),
+    과부하 오류가 나면 창을 절반으로 줄입니다. 같은 시점에 출발한 호출들의 오류로
+    여러 번 줄어들지 않도록 마지막으로 줄인 뒤에 시작한 호출의 오류만 반영합니다.
+    """
+    
+    def __init__(self, initial=None, minimum=None, maximum=None, decrease=0.5):
+        self.minimum = minimum or Config.LLM_MIN_CONCURRENCY
+        self.maximum = maximum or Config.LLM_MAX_CONCURRENCY
+        self.limit = float(min(max(initial or self.maximum, self.minimum), self.maximum))
+        self.decrease = decrease
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._waiters = collections.deque()  # threading.Event 또는 (이벤트 루프, asyncio.Future)
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        with self._lock:
+            if not self._waiters and self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+        waiter.wait()
+    
+    async def acquire_async(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if not self._waiters and self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return
+            waiter = loop.create_future()
+            self._waiters.append((loop, waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                if (loop, waiter) in self._waiters:
+                    self._waiters.remove((loop, waiter))
+                    raise
+            # 자리를 받은 뒤에 취소되었으면 반납
+            self.release()
+            raise
+    
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+            self._wake()
+    
+    def on_success(self):
+        with self._lock:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._wake()
+    
+    def on_overload(self, started_at):
+        """started_at(time.monotonic())에 시작한 호출이 과부하 오류로 끝남"""
+        with self._lock:
+            if started_at < self._last_decrease:
+                return
+            self.limit = max(self.minimum, self.limit * self.decrease)
+            self._last_decrease = time.monotonic()
+    
+    def _wake(self):
+        # 호출 측에서 self._lock을 잡고 있어야 함
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            self.in_flight += 1
+            if isinstance(waiter, threading.Event):
+                waiter.set()
+            else:
+                loop, future = waiter
+                loop.call_soon_threadsafe(_resolve, future)
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class ProviderLimiter:
+    """제공자 하나의 RPM/TPM 토큰 버킷 + AIMD 동시 실행 창
+
+    Args:
+        name: 제공자 이름 (지표 레이블)
+        requests_per_minute, tokens_per_minute: 할당량 (0이면 제한 없음)
+        max_retries: 과부하 오류를 다시 시도할 횟수
+    """
+    
+    def __init__(self, name, requests_per_minute=0, tokens_per_minute=0, max_retries=None, concurrency=None):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_retries = Config.LLM_RATE_LIMIT_RETRIES if max_retries is None else max_retries
+        self.concurrency = concurrency or AdaptiveConcurrency()
+        self.throttled = 0
+    
+    def _reserve(self, token_count):
+        delay = self.requests.reserve(1) if self.requests else 0.0
+        if self.tokens:
+            delay = max(delay, self.tokens.reserve(token_count))
+        if delay:
+            metrics.observe('rate_limit_wait_seconds', delay, provider=self.name)
+        return delay
+    
+    def _backoff(self, attempt):
+        return random.uniform(0, min(Config.HTTP_BACKOFF * (2 ** attempt), 30.0))
+    
+    def call(self, function, token_count=0):
+        """function()을 한도 안에서 실행 (과부하 오류는 창을 줄이고 다시 시도)"""
+        attempt = 0
+        while True:
+            delay = self._reserve(token_count)
+            if delay:
+                time.sleep(delay)
+            self.concurrency.acquire()
+            started_at = time.monotonic()
+            try:
+                result = function()
+            except Exception as e:
+                self.concurrency.release()
+                if not self._on_error(e, started_at, attempt):
+                    raise
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+            except BaseException:
+                self.concurrency.release()
+                raise
+            self.concurrency.on_success()
+            self.concurrency.release()
+            return result
+    
+    async def call_async(self, function, token_count=0):
+        """coroutine 함수 function()을 한도 안에서 실행"""
+        attempt = 0
+        while True:
+            delay = self._reserve(token_count)
+            if delay:
+                await asyncio.sleep(delay)
+            await self.concurrency.acquire_async()
+            started_at = time.monotonic()
+            try:
+                result = await function()
+            except Exception as e:
+                self.concurrency.release()
+                if not self._on_error(e, started_at, attempt):
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+            except BaseException:
+                self.concurrency.release()
+                raise
+            self.concurrency.on_success()
+            self.concurrency.release()
+            return result
+    
+    def stream(self, open_stream, token_count=0):
+        """open_stream()이 돌려준 스트림을 한도 안에서 끝까지 읽는 제너레이터 (읽는 동안 창 한 칸 사용)
+
+        첫 조각을 받기 전의 과부하 오류만 다시 시도합니다.
+        """
+        attempt = 0
+        while True:
+            delay = self._reserve(token_count)
+            if delay:
+                time.sleep(delay)
+            self.concurrency.acquire()
+            started_at = time.monotonic()
+            received = False
+            try:
+                for chunk in open_stream():
+                    received = True
+                    yield chunk
+            except Exception as e:
+                self.concurrency.release()
+                if received or not self._on_error(e, started_at, attempt):
+                    raise
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+            except BaseException:
+                # 읽는 중에 닫힌 경우 (GeneratorExit)
+                self.concurrency.release()
+                raise
+            self.concurrency.on_success()
+            self.concurrency.release()
+            return
+    
+    def _on_error(self, error, started_at, attempt):
+        """다시 시도할지 여부 (과부하 오류면 창을 줄임)"""
+        if not is_overload(error):
+            return False
+        self.concurrency.on_overload(started_at)
+        self.throttled += 1
+        metrics.incr('rate_limited', provider=self.name)
+        return attempt < self.max_retries
+    
+    def stats(self):
+        return {
+            'limit': round(self.concurrency.limit, 2),
+            'in_flight': self.concurrency.in_flight,
+            'queued': len(self.concurrency._waiters),
+            'throttled': self.throttled,
+        }
+
+
+class RateLimitedModel:
+    """generate_content / generate_content_async 호출을 ProviderLimiter로 감싸는 모델"""
+    
+    def __init__(self, model, limiter):
+        self.model = model
+        self.limiter = limiter
+        self.model_name = getattr(model, 'model_name', limiter.name)
+    
+    def _token_count(self, contents):
+        parts = [contents] if isinstance(contents, str) else contents
+        # 입력 토큰 + 예상 출력 토큰
+        return sum(estimate_tokens(str(part)) for part in parts) + Config.LLM_OUTPUT_TOKENS
+    
+    def generate_content(self, contents, stream=False):
+        token_count = self._token_count(contents)
+        if stream:
+            return self.limiter.stream(lambda: self.model.generate_content(contents, stream=True), token_count)
+        return self.limiter.call(lambda: self.model.generate_content(contents), token_count)
+    
+    async def generate_content_async(self, contents):
+        return await self.limiter.call_async(lambda: self.model.generate_content_async(contents),
+                                             self._token_count(contents))
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider):
+    """프로세스 전체에서 공유하는 제공자별 제한기 ('gemini' 또는 'openai', 키 풀 전체에 적용)"""
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            rpm, tpm, key_count = {
+                'gemini': (Config.GEMINI_RPM, Config.GEMINI_TPM, len(Config.GEMINI_API_KEYS)),
+                'openai': (Config.OPENAI_RPM, Config.OPENAI_TPM, len(Config.OPENAI_API_KEYS)),
+            }.get(provider, (0, 0, 1))
+            # 할당량은 키 하나당 값이므로 키 풀 전체의 할당량은 키 수만큼 늘어남
+            key_count = max(key_count, 1)
+            limiter = _limiters[provider] = ProviderLimiter(provider, rpm * key_count, tpm * key_count)
+        return limiter
+
+
+def limiter_stats():
+    with _limiters_lock:
+        return {name: limiter.stats() for name, limiter in _limiters.items()}
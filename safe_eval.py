@@ -0,0 +1,204 @@
+"""
+안전한 수학 표현식 계산기
+표현식을 AST로 한 번 해석해 계산 함수(plan)로 만들어 캐시하고,
+지수/자릿수/노드 수 제한으로 9**9**9 같은 입력이 CPU를 붙잡지 못하게 합니다.
+"""
+
+import ast
+import math
+import operator
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # numpy가 없으면 변수 바인딩 일괄 계산은 순수 파이썬으로 처리
+    np = None
+
+MAX_EXPRESSION_LENGTH = 2000   # 표현식 최대 길이(문자)
+MAX_NODES = 256                # AST 최대 노드 수
+MAX_DIGITS = 1000              # 숫자 리터럴과 정수 계산 결과의 최대 자릿수
+MAX_EXPONENT = 1000            # 거듭제곱 지수의 최대 절댓값
+PLAN_CACHE_SIZE = 4096
+
+_MAX_BITS = int(MAX_DIGITS * math.log2(10)) + 1
+
+
+class ExpressionError(ValueError):
+    """계산할 수 없는 표현식"""
+
+
+class UnsafeExpressionError(ExpressionError):
+    """허용되지 않은 문법(이름, 함수 호출, 속성 접근 등)이 포함된 표현식"""
+
+
+class ExpressionLimitError(ExpressionError):
+    """길이, 노드 수, 자릿수, 지수 제한을 넘는 표현식"""
+
+
+def _check_int(value):
+    if isinstance(value, int) and value.bit_length() > _MAX_BITS:
+        raise ExpressionLimitError(f"결과가 {MAX_DIGITS}자리를 넘습니다.")
+    return value
+
+
+def _checked(op):
+    def apply(left, right):
+        return _check_int(op(left, right))
+    return apply
+
+
+def _power(base, exponent):
+    if _is_array(base) or _is_array(exponent):
+        if np.any(np.abs(exponent) > MAX_EXPONENT):
+            raise ExpressionLimitError(f"지수는 절댓값 {MAX_EXPONENT} 이하여야 합니다.")
+        return np.power(base, exponent)
+    if abs(exponent) > MAX_EXPONENT:
+        raise ExpressionLimitError(f"지수는 절댓값 {MAX_EXPONENT} 이하여야 합니다.")
+    # 정수 거듭제곱은 계산하기 전에 결과 크기를 어림하여 거부
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0 and abs(base) > 1:
+        if (abs(base).bit_length() - 1) * exponent > _MAX_BITS:
+            raise ExpressionLimitError(f"결과가 {MAX_DIGITS}자리를 넘습니다.")
+    result = base ** exponent
+    # 음수의 분수 거듭제곱((-8) ** (1/3))은 복소수가 되므로 계산기 답으로 쓰지 않음
+    if isinstance(result, complex):
+        raise ExpressionError("결과가 실수가 아닙니다.")
+    return _check_int(result)
+
+
+def _is_array(value):
+    return np is not None and isinstance(value, np.ndarray)
+
+
+_BINARY_OPS = {
+    ast.Add: _checked(operator.add),
+    ast.Sub: _checked(operator.sub),
+    ast.Mult: _checked(operator.mul),
+    ast.Div: operator.truediv,
+    ast.FloorDiv: _checked(operator.floordiv),
+    ast.Mod: _checked(operator.mod),
+    ast.Pow: _power,
+}
+
+_UNARY_OPS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+
+def _build(node):
+    """AST 노드를 env(dict) -> 값 함수로 변환"""
+    if isinstance(node, ast.Expression):
+        return _build(node.body)
+    
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise UnsafeExpressionError(f"허용되지 않은 값입니다: {value!r}")
+        return lambda env: value
+    
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+        op = _BINARY_OPS[type(node.op)]
+        left, right = _build(node.left), _build(node.right)
+        return lambda env: op(left(env), right(env))
+    
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        op = _UNARY_OPS[type(node.op)]
+        operand = _build(node.operand)
+        return lambda env: op(operand(env))
+    
+    if isinstance(node, ast.Name):
+        name = node.id
+        
+        def lookup(env):
+            try:
+                return env[name]
+            except KeyError:
+                raise ExpressionError(f"값이 주어지지 않은 변수입니다: {name}") from None
+        return lookup
+    
+    raise UnsafeExpressionError(f"허용되지 않은 문법입니다: {type(node).__name__}")
+
+
+class Plan:
+    """한 번 컴파일해 둔 표현식 계산 함수"""
+    
+    def __init__(self, expression, evaluate, variables):
+        self.expression = expression
+        self.variables = variables
+        self._evaluate = evaluate
+    
+    def __call__(self, env=None):
+        return self._evaluate(env or {})
+
+
+@lru_cache(maxsize=PLAN_CACHE_SIZE)
+def compile_expression(expression):
+    """표현식을 검사하고 계산 계획(Plan)으로 변환 (같은 표현식은 캐시 재사용)"""
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionLimitError(f"표현식은 {MAX_EXPRESSION_LENGTH}자 이하여야 합니다.")
+    try:
+        tree = ast.parse(expression.strip(), mode='eval')
+    except SyntaxError as e:
+        raise ExpressionError(f"잘못된 표현식입니다: {e.msg}") from None
+    
+    variables = set()
+    for count, node in enumerate(ast.walk(tree), start=1):
+        if count > MAX_NODES:
+            raise ExpressionLimitError(f"표현식이 너무 복잡합니다 (노드 {MAX_NODES}개 초과).")
+        if isinstance(node, ast.Constant) and isinstance(node.value, int) and not isinstance(node.value, bool):
+            if node.value.bit_length() > _MAX_BITS:
+                raise ExpressionLimitError(f"숫자는 {MAX_DIGITS}자리 이하여야 합니다.")
+        elif isinstance(node, ast.Name):
+            variables.add(node.id)
+    
+    return Plan(expression, _build(tree), frozenset(variables))
+
+
+def evaluate(expression, variables=None):
+    """표현식 하나 계산"""
+    return compile_expression(expression)(variables)
+
+
+def evaluate_many(expressions, variables=None):
+    """여러 표현식을 한 번에 계산
+
+    실패한 표현식 자리에는 예외 객체(ExpressionError 등)가 들어갑니다.
+    """
+    results = []
+    for expression in expressions:
+        try:
+            results.append(evaluate(expression, variables))
+        except (ExpressionError, ArithmeticError) as e:
+            results.append(e)
+    return results
+
+
+def evaluate_vectorized(expression, bindings):
+    """변수마다 여러 값을 주고 표현식 하나를 한꺼번에 계산
+
+    Args:
+        expression: 변수가 들어간 표현식 (예: "x ** 2 + 3 * y")
+        bindings: 변수 이름 -> 값 목록 (모든 목록의 길이가 같아야 함)
+
+    Returns:
+        numpy가 있으면 float64 배열, 없으면 값 목록
+        (bindings가 비어 있으면 두 경우 모두 결과 하나만 든 길이 1짜리)
+    """
+    plan = compile_expression(expression)
+    missing = plan.variables - set(bindings)
+    if missing:
+        raise ExpressionError(f"값이 주어지지 않은 변수입니다: {', '.join(sorted(missing))}")
+    
+    if np is not None:
+        env = {name: np.asarray(values, dtype=np.float64) for name, values in bindings.items()}
+        with np.errstate(all='ignore'):
+            result = plan(env)
+        # 변수가 없는 표현식도 입력 길이에 맞춘 배열로 반환 (입력이 없으면 길이 1)
+        shape = np.broadcast_shapes(*(values.shape for values in env.values())) if env else (1,)
+        return np.broadcast_to(np.asarray(result, dtype=np.float64), shape)
+    
+    names = list(bindings)
+    if not names:
+        return [plan({})]
+    rows = zip(*(bindings[name] for name in names))
+    return [plan(dict(zip(names, row))) for row in rows]
@@ -0,0 +1,355 @@
+"""
+의미가 거의 같은 질문을 위한 응답 캐시 (semantic cache)
+"파이썬이 뭐야?"와 "파이썬이란 무엇인가요?"처럼 표현만 다른 질문에 저장된 응답을 돌려줍니다.
+질문을 정규화한 뒤 문자 n-gram 집합으로 바꾸고, MinHash 서명을 LSH 버킷에 넣어
+비슷한 후보만 빠르게 찾은 다음 실제 Jaccard 유사도가 기준 이상이고 두 질문에 함께 나오는
+단어의 순서가 같은 항목을 사용합니다 (n-gram 집합은 어순을 보지 못하므로).
+외부 모델 없이 CPU에서만 계산하며 조회 한 번은 1ms보다 짧게 걸립니다.
+
+잘못된 적중(false hit)을 확인하기 위해 적중 중 일부(audit_rate)는 캐시된 응답을 쓰지 않고
+새로 실행한 결과와 비교합니다. 결과가 많이 다르면 잘못된 적중으로 기록하고 새 결과를 저장합니다.
+"""
+
+import random
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+
+import metrics
+from config import Config
+
+# 질문의 뜻과 관계없는 표현 (단어 단위로 제거)
+FILLER_WORDS = frozenset({
+    '뭐야', '뭐예요', '뭐에요', '뭔가요', '뭐지', '뭐니', '뭔지', '뭘까', '뭘까요',
+    '무엇', '무엇인가요', '무엇인가', '무엇인지', '무엇입니까', '무엇이에요', '무엇이야',
+    '알려줘', '알려주세요', '알려줄래', '알려줄래요', '설명해줘', '설명해주세요', '설명해',
+    '대해', '대해서', '대한', '좀', '혹시', '간단히', '자세히',
+    'what', 'whats', 'is', 'are', 'the', 'a', 'an', 'tell', 'me', 'about', 'explain', 'please',
+})
+# 단어 끝에서 떼어 낼 조사/어미 (긴 것부터 검사)
+PARTICLE_SUFFIXES = ('이라는', '이라고', '이란', '에서', '에게', '라는', '라고', '란', '은', '는', '이', '가', '을', '를', '의', '에')
+
+_WORD_RE = re.compile(r'\w+')
+_NUMBER_RE = re.compile(r'\d+(?:\.\d+)?')
+# 부정 표현 ("안 돼요", "not fast"): 나머지가 같아도 반대 뜻이므로 유사도와 관계없이 버킷을 나눔
+_NEGATION_RE = re.compile(
+    r"\b(?:not|no|never|cannot)\b|n't|(?<!\w)(?:안|못)(?=\s|돼|되|해|하|가|와|나|먹|$)|않|없|아니"
+)
+
+# MinHash 해시 함수 계수 (프로세스마다 같은 값이 되도록 고정 시드 사용)
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _strip_particle(word):
+    # 두 글자 이하 단어는 조사를 떼면 뜻이 바뀌기 쉬우므로 그대로 둠 ("나이" -> "나")
+    if len(word) <= 2:
+        return word
+    for suffix in PARTICLE_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 2:
+            return word[:-len(suffix)]
+    return word
+
+
+def normalize_question(text):
+    """질문에서 대소문자, 문장 부호, 뜻과 관계없는 표현, 조사를 없앤 문자열"""
+    words = [word for word in _WORD_RE.findall(text.lower()) if word not in FILLER_WORDS]
+    return ' '.join(_strip_particle(word) for word in words)
+
+
+def shingles(text):
+    """앞뒤에 공백을 붙인 문자열의 문자 2-gram과 3-gram 집합"""
+    padded = f" {text} "
+    return frozenset(
+        padded[i:i + n]
+        for n in (2, 3)
+        for i in range(len(padded) - n + 1)
+    )
+
+
+def same_word_order(a, b):
+    """두 단어 목록에 함께 나오는 단어가 같은 순서로 나오는지 여부
+
+    "convert celsius to fahrenheit"와 "convert fahrenheit to celsius"처럼
+    단어만 바꾼 질문은 n-gram 유사도가 높아도 뜻이 다르므로 구별합니다.
+    """
+    common = set(a) & set(b)
+    return list(dict.fromkeys(w for w in a if w in common)) == list(dict.fromkeys(w for w in b if w in common))
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class SemanticHit:
+    """조회 결과
+
+    Attributes:
+        answer: 캐시된 응답
+        prompt: 캐시에 저장될 때의 질문
+        similarity: 두 질문의 Jaccard 유사도
+        audit: True면 응답을 그대로 쓰지 말고 새로 실행한 결과를 SemanticCache.audit에 넘겨야 함
+    """
+    
+    def __init__(self, answer, prompt, similarity, audit):
+        self.answer = answer
+        self.prompt = prompt
+        self.similarity = similarity
+        self.audit = audit
+
+
+class _Entry:
+    def __init__(self, prompt, answer, words, grams, bucket_keys, expires_at):
+        self.prompt = prompt
+        self.answer = answer
+        self.words = words
+        self.grams = grams
+        self.bucket_keys = bucket_keys
+        self.expires_at = expires_at
+
+
+class SemanticCache:
+    """MinHash + LSH로 비슷한 질문을 찾는 스레드 안전 캐시 (크기 제한 LRU + TTL)
+
+    Args:
+        maxsize: 최대 항목 수 (넘으면 가장 오래 쓰이지 않은 항목부터 제거)
+        ttl: 항목 유지 시간(초)
+        threshold: 이 이상 Jaccard 유사도인 질문만 같은 질문으로 봄
+        audit_rate: 적중 중 새로 실행해 결과를 비교할 비율 (0이면 확인하지 않음)
+        audit_min_similarity: 확인할 때 두 응답의 유사도가 이보다 낮으면 잘못된 적중으로 기록
+        bands, rows: LSH 밴드 수와 밴드당 해시 수 (서명 길이는 bands * rows)
+    """
+    
+    def __init__(self, maxsize=512, ttl=300, threshold=0.85, audit_rate=0.05, audit_min_similarity=0.5,
+                 bands=16, rows=2):
+        if maxsize <= 0:
+            raise ValueError("maxsize는 1 이상이어야 합니다.")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        self.audit_rate = audit_rate
+        self.audit_min_similarity = audit_min_similarity
+        self.bands = bands
+        self.rows = rows
+        seeds = random.Random(0)
+        self._coefficients = [
+            (seeds.randrange(1, _PRIME), seeds.randrange(0, _PRIME)) for _ in range(bands * rows)
+        ]
+        self._entries = OrderedDict()  # 항목 번호 -> _Entry
+        self._buckets = {}             # (범위, 숫자, 부정 표현 수, 밴드 번호, 밴드 해시) -> 항목 번호 집합
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.audits = 0
+        self.false_hits = 0
+        self.recent_false_hits = deque(maxlen=20)
+    
+    def lookup(self, prompt, scope=''):
+        """비슷한 질문의 응답 (SemanticHit) 또는 None
+
+        scope: 같은 범위(모델, 도구 목록, 이전 대화 등)에 저장된 항목만 찾음
+        """
+        with metrics.span('semantic_cache.lookup') as span:
+            hit = self._lookup(prompt, scope)
+            result = 'miss' if hit is None else ('audit' if hit.audit else 'hit')
+            span.set('result', result)
+        metrics.incr('cache_requests', cache='semantic', result=result)
+        if hit is not None:
+            metrics.observe('semantic_cache_similarity', hit.similarity)
+        return hit
+    
+    def set(self, prompt, answer, scope=''):
+        """응답 저장 (정규화한 질문이 비어 있으면 저장하지 않음)"""
+        key = self._key(prompt, scope)
+        if key is None:
+            return
+        words, grams, bucket_keys = key
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            # 같은 질문(정규화 기준)이 이미 있으면 새 응답으로 바꿈
+            for entry_id in self._candidates(bucket_keys):
+                entry = self._entries[entry_id]
+                if entry.grams == grams:
+                    self._remove(entry_id)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = _Entry(prompt, answer, words, grams, bucket_keys, expires_at)
+            for bucket_key in bucket_keys:
+                self._buckets.setdefault(bucket_key, set()).add(entry_id)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+    
+    def audit(self, hit, prompt, answer, scope=''):
+        """audit=True인 적중에 대해 새로 실행한 응답과 캐시된 응답을 비교 (같은 답이면 True)
+
+        다르면 잘못된 적중으로 기록하고 새 응답을 이 질문의 항목으로 저장합니다.
+        """
+        similarity = jaccard(shingles(' '.join(hit.answer.lower().split())), shingles(' '.join(answer.lower().split())))
+        consistent = similarity >= self.audit_min_similarity
+        with self._lock:
+            self.audits += 1
+            if not consistent:
+                self.false_hits += 1
+                self.recent_false_hits.append({
+                    'prompt': prompt,
+                    'cached_prompt': hit.prompt,
+                    'similarity': round(hit.similarity, 3),
+                    'answer_similarity': round(similarity, 3),
+                })
+        metrics.incr('semantic_cache_audits', result='ok' if consistent else 'false_hit')
+        if not consistent:
+            self.set(prompt, answer, scope)
+        return consistent
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+    
+    def stats(self):
+        """적중률, 잘못된 적중 비율 등 캐시 통계 반환"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'threshold': self.threshold,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'audits': self.audits,
+                'false_hits': self.false_hits,
+                'false_hit_rate': self.false_hits / self.audits if self.audits else 0.0,
+                'recent_false_hits': list(self.recent_false_hits),
+            }
+    
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+    
+    def _lookup(self, prompt, scope):
+        key = self._key(prompt, scope)
+        if key is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        words, grams, bucket_keys = key
+        now = time.time()
+        with self._lock:
+            best_id, best_similarity = None, 0.0
+            for entry_id in self._candidates(bucket_keys):
+                entry = self._entries[entry_id]
+                if entry.expires_at <= now:
+                    self._remove(entry_id)
+                    self.expirations += 1
+                    continue
+                # MinHash는 후보를 찾는 데만 쓰고 판단은 실제 유사도로 함
+                similarity = jaccard(grams, entry.grams)
+                if similarity > best_similarity and same_word_order(words, entry.words):
+                    best_id, best_similarity = entry_id, similarity
+            if best_id is None or best_similarity < self.threshold:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_id)
+            entry = self._entries[best_id]
+            # 글자까지 똑같은 질문은 확인할 필요가 없음 (정규화 결과만 같은 질문은 확인 대상)
+            audit = entry.prompt != prompt and random.random() < self.audit_rate
+            if not audit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return SemanticHit(entry.answer, entry.prompt, best_similarity, audit)
+    
+    def _key(self, prompt, scope):
+        """(정규화한 단어 목록, n-gram 집합, LSH 버킷 키 목록) 또는 None"""
+        normalized = normalize_question(prompt)
+        if not normalized:
+            return None
+        words = tuple(normalized.split())
+        grams = shingles(normalized)
+        # 숫자가 다른 질문("2020년 인구" / "2021년 인구")은 유사도가 높아도 다른 질문이므로 버킷을 나눔
+        numbers = tuple(_NUMBER_RE.findall(prompt))
+        # 부정 표현 수가 다른 질문("설치가 돼요" / "설치가 안 돼요")도 마찬가지
+        negations = len(_NEGATION_RE.findall(prompt.lower()))
+        signature = self._signature(grams)
+        bucket_keys = [
+            (scope, numbers, negations, band, hash(signature[band * self.rows:(band + 1) * self.rows]))
+            for band in range(self.bands)
+        ]
+        return words, grams, bucket_keys
+    
+    def _signature(self, grams):
+        hashes = [zlib.crc32(gram.encode('utf-8')) for gram in grams]
+        return tuple(
+            min((a * value + b) % _PRIME for value in hashes) & _MAX_HASH
+            for a, b in self._coefficients
+        )
+    
+    def _candidates(self, bucket_keys):
+        # 호출 측에서 self._lock을 잡고 있어야 함
+        candidates = set()
+        for bucket_key in bucket_keys:
+            candidates.update(self._buckets.get(bucket_key, ()))
+        return candidates
+    
+    def _remove(self, entry_id):
+        # 호출 측에서 self._lock을 잡고 있어야 함
+        entry = self._entries.pop(entry_id)
+        for bucket_key in entry.bucket_keys:
+            bucket = self._buckets.get(bucket_key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[bucket_key]
+
+
+class SemanticCachedAgent:
+    """run 앞에 SemanticCache를 두는 에이전트 래퍼 (CodeAgent용, 나머지 속성은 원래 에이전트로 전달)"""
+    
+    def __init__(self, agent, semantic_cache):
+        self.agent = agent
+        self.semantic_cache = semantic_cache
+    
+    def run(self, prompt, *args, **kwargs):
+        # gemini_agent가 이 모듈을 불러오므로 순환 import를 피해 여기서 불러옴
+        from gemini_agent import is_failed_tool_result
+        if args or kwargs:
+            # 스트리밍, reset=False 등 옵션이 있는 실행은 결과가 달라질 수 있으므로 캐시하지 않음
+            return self.agent.run(prompt, *args, **kwargs)
+        hit = self.semantic_cache.lookup(prompt)
+        if hit is not None and not hit.audit:
+            return hit.answer
+        result = self.agent.run(prompt)
+        # 도구 실패 메시지는 일시적인 오류일 수 있으므로 GeminiAgent._cache_store처럼 저장하지 않음
+        if isinstance(result, str) and not is_failed_tool_result(result):
+            if hit is not None:
+                self.semantic_cache.audit(hit, prompt, result)
+            else:
+                self.semantic_cache.set(prompt, result)
+        return result
+    
+    def __getattr__(self, name):
+        return getattr(self.agent, name)
+
+
+def create_semantic_cache():
+    """Config 설정에 따라 SemanticCache 생성 (크기가 0이면 None)"""
+    if Config.SEMANTIC_CACHE_SIZE <= 0:
+        return None
+    return SemanticCache(
+        maxsize=Config.SEMANTIC_CACHE_SIZE,
+        ttl=Config.SEMANTIC_CACHE_TTL,
+        threshold=Config.SEMANTIC_CACHE_THRESHOLD,
+        audit_rate=Config.SEMANTIC_CACHE_AUDIT_RATE,
+        audit_min_similarity=Config.SEMANTIC_CACHE_AUDIT_MIN_SIMILARITY,
+    )
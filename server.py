@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+헤드리스 HTTP 서버
+계산/검색 에이전트를 JSON 엔드포인트로 제공합니다. 요청은 JobRunner의 제한된 대기열에
+들어가고 정해진 수의 워커가 처리하며, 대기열이 가득 차면 바로 429로 응답합니다.
+
+    python server.py --port 8000 --workers 8 --max-queue 100
+
+엔드포인트:
+    GET  /health                  상태와 대기열 통계
+    GET  /agents                  사용할 수 있는 에이전트 목록
+    GET  /metrics                 Prometheus 지표 (METRICS_ENABLED=true일 때)
+    POST /agents/<이름>/run       {"prompt": "...", "timeout": 60}
+    POST /agents/<이름>/batch     {"prompts": ["...", "..."], "timeout": 60}
+"""
+
+import argparse
+import json
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import agent_registry
+import key_pool
+import metrics
+import rate_limit
+from config import Config
+from job_runner import JobRunner, QueueFullError, DONE, FAILED
+
+_AGENT_PATH_RE = re.compile(r'^/agents/(?P<name>[\w-]+)/(?P<action>run|batch)$')
+
+
+class HTTPError(Exception):
+    """JSON 오류 응답으로 바꿀 예외"""
+    
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+
+def job_response(job):
+    """끝났거나 시간 초과된 Job을 응답용 dict로 변환"""
+    if job.status == DONE:
+        return {'status': job.status, 'result': job.text}
+    if job.status == FAILED:
+        return {'status': job.status, 'error': job.error}
+    return {'status': 'timeout', 'error': "응답 시간이 초과되었습니다."}
+
+
+class AgentRequestHandler(BaseHTTPRequestHandler):
+    """에이전트 JSON API 핸들러 (server.job_runner, server.request_timeout, server.max_batch 사용)"""
+    
+    protocol_version = 'HTTP/1.1'
+    server_version = 'SmolAgentsServer/1.0'
+    
+    def do_GET(self):
+        self._dispatch(self._handle_get)
+    
+    def do_POST(self):
+        self._dispatch(self._handle_post)
+    
+    def _dispatch(self, handler):
+        try:
+            response = handler()
+            if response is not None:  # None이면 핸들러가 직접 응답을 보냄
+                self._send_json(*response)
+        except HTTPError as e:
+            self._send_error_json(e.status, e.message, e.headers)
+        except Exception as e:
+            self._send_error_json(500, f"오류가 발생했습니다: {str(e)}")
+    
+    def _send_error_json(self, status, message, headers=None):
+        # 본문을 읽기 전에 실패했을 수 있으므로 (404, 413 등) 연결을 닫아
+        # 남은 본문이 keep-alive 연결의 다음 요청으로 해석되지 않게 함
+        self.close_connection = True
+        self._send_json(status, {'error': message}, {**(headers or {}), 'Connection': 'close'})
+    
+    def _handle_get(self):
+        if self.path == '/health':
+            # 만들어진 에이전트별 LLM 우회(pre-router) 적중률
+            prerouter = {
+                name: agent.prerouter.stats()
+                for name in agent_registry.loaded_agents()
+                for agent in [agent_registry.get_agent(name)]
+                if getattr(agent, 'prerouter', None) is not None
+            }
+            # 만들어진 에이전트별 비슷한 질문 캐시 적중률과 잘못된 적중 확인 결과
+            semantic_cache = {
+                name: agent.semantic_cache.stats()
+                for name in agent_registry.loaded_agents()
+                for agent in [agent_registry.get_agent(name)]
+                if getattr(agent, 'semantic_cache', None) is not None
+            }
+            return 200, {
+                'status': 'ok',
+                **self.server.job_runner.stats(),
+                'prerouter': prerouter,
+                'semantic_cache': semantic_cache,
+                'llm_limits': rate_limit.limiter_stats(),  # 제공자별 동시 호출 창과 429 횟수
+                'api_keys': key_pool.key_pool_stats(),     # 키별 사용 현황 (여러 키를 쓸 때)
+            }
+        if self.path == '/agents':
+            return 200, {'agents': list(agent_registry.AGENT_MODULES)}
+        if self.path == '/metrics':
+            if not metrics.enabled():
+                raise HTTPError(404, "지표 수집이 꺼져 있습니다 (METRICS_ENABLED=true).")
+            self._send_text(200, metrics.render_prometheus(), metrics.PROMETHEUS_CONTENT_TYPE)
+            return None
+        raise HTTPError(404, "찾을 수 없는 경로입니다.")
+    
+    def _handle_post(self):
+        match = _AGENT_PATH_RE.match(self.path)
+        if match is None:
+            raise HTTPError(404, "찾을 수 없는 경로입니다.")
+        name = match.group('name')
+        if name not in agent_registry.AGENT_MODULES:
+            raise HTTPError(404, f"알 수 없는 에이전트입니다: {name}")
+        
+        body = self._read_json()
+        timeout = self._timeout(body)
+        if match.group('action') == 'run':
+            prompt = body.get('prompt')
+            if not isinstance(prompt, str) or not prompt.strip():
+                raise HTTPError(400, "prompt 문자열이 필요합니다.")
+            job = self._submit(name, [prompt])[0]
+            self._wait([job], timeout)
+            status = {DONE: 200, FAILED: 500}.get(job.status, 504)
+            return status, job_response(job)
+        
+        prompts = body.get('prompts')
+        if not isinstance(prompts, list) or not prompts or not all(isinstance(p, str) for p in prompts):
+            raise HTTPError(400, "prompts 문자열 목록이 필요합니다.")
+        if len(prompts) > self.server.max_batch:
+            raise HTTPError(413, f"한 번에 최대 {self.server.max_batch}개까지 요청할 수 있습니다.")
+        jobs = self._submit(name, prompts)
+        self._wait(jobs, timeout)
+        return 200, {'results': [job_response(job) for job in jobs]}
+    
+    def _submit(self, name, prompts):
+        try:
+            return self.server.job_runner.submit_many(name, prompts)
+        except QueueFullError as e:
+            raise HTTPError(429, str(e), {'Retry-After': '1'}) from None
+    
+    @staticmethod
+    def _wait(jobs, timeout):
+        # 시간 안에 끝나지 않은 작업은 취소하여 워커를 계속 붙잡지 않게 함
+        # 모든 작업이 같은 마감 시각을 쓰므로 배치 전체를 기다리는 시간도 timeout을 넘지 않음
+        deadline = time.monotonic() + timeout
+        for job in jobs:
+            job.wait(max(0.0, deadline - time.monotonic()))
+        for job in jobs:
+            if not job.finished:
+                job.cancel()
+    
+    def _timeout(self, body):
+        timeout = body.get('timeout', self.server.request_timeout)
+        if not isinstance(timeout, (int, float)) or isinstance(timeout, bool) or timeout <= 0:
+            raise HTTPError(400, "timeout은 양수여야 합니다.")
+        return min(timeout, self.server.request_timeout)
+    
+    def _read_json(self):
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            raise HTTPError(400, "잘못된 Content-Length입니다.") from None
+        if length < 0:
+            raise HTTPError(400, "잘못된 Content-Length입니다.")
+        if length > Config.SERVER_MAX_BODY:
+            raise HTTPError(413, "요청 본문이 너무 큽니다.")
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            raise HTTPError(400, "JSON 형식이 아닙니다.") from None
+        if not isinstance(body, dict):
+            raise HTTPError(400, "JSON 객체가 필요합니다.")
+        return body
+    
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body, ensure_ascii=False)
+        self._send_text(status, data, 'application/json; charset=utf-8', headers)
+    
+    def _send_text(self, status, text, content_type, headers=None):
+        data = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class AgentServer(ThreadingHTTPServer):
+    """요청마다 스레드로 받고 에이전트 실행은 JobRunner 워커에 맡기는 서버"""
+    
+    daemon_threads = True
+    
+    def __init__(self, address, workers=None, max_queue=None, timeout=None, max_batch=None, quiet=False):
+        super().__init__(address, AgentRequestHandler)
+        self.job_runner = JobRunner(
+            max_workers=workers or Config.SERVER_WORKERS,
+            max_pending=Config.SERVER_MAX_QUEUE if max_queue is None else max_queue,
+        )
+        self.request_timeout = timeout or Config.SERVER_TIMEOUT
+        self.max_batch = max_batch or Config.SERVER_MAX_BATCH
+        self.quiet = quiet
+    
+    def server_close(self):
+        super().server_close()
+        self.job_runner.shutdown(wait=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="에이전트 HTTP 서버")
+    parser.add_argument('--host', default=Config.SERVER_HOST)
+    parser.add_argument('--port', type=int, default=Config.SERVER_PORT)
+    parser.add_argument('--workers', type=int, default=Config.SERVER_WORKERS, help="동시에 실행할 에이전트 작업 수")
+    parser.add_argument('--max-queue', type=int, default=Config.SERVER_MAX_QUEUE, help="대기 작업 최대 개수 (넘으면 429)")
+    parser.add_argument('--timeout', type=float, default=Config.SERVER_TIMEOUT, help="요청당 최대 대기 시간(초)")
+    parser.add_argument('--preload', action='store_true', help="시작할 때 모든 에이전트를 미리 생성")
+    parser.add_argument('--quiet', action='store_true', help="요청 로그 출력 안 함")
+    args = parser.parse_args()
+    
+    if args.preload:
+        for name in agent_registry.AGENT_MODULES:
+            agent_registry.get_agent(name)
+    
+    server = AgentServer((args.host, args.port), workers=args.workers, max_queue=args.max_queue,
+                         timeout=args.timeout, quiet=args.quiet)
+    print(f"🚀 에이전트 서버가 http://{args.host}:{args.port} 에서 시작되었습니다.")
+    print(f"   워커 {args.workers}개, 대기열 최대 {args.max_queue}개")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 서버를 종료합니다.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
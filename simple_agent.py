@@ -1,14 +1,16 @@
 import os
 from dotenv import load_dotenv
-from smolagents import CodeAgent, InferenceClientModel
-from smolagents.tools import tool
 from config import Config
-import re
+import agent_registry
+import metrics
+from prerouter import PreroutedAgent, create_prerouter
+from semantic_cache import SemanticCachedAgent, create_semantic_cache
+import safe_eval
+from math_extract import find_math_expressions
 
 # 환경 변수 로드
 load_dotenv()
 
-@tool
 def calculate(expression: str) -> str:
     """수학 표현식을 계산하는 도구
     
@@ -18,18 +20,18 @@ def calculate(expression: str) -> str:
     Returns:
         계산 결과 문자열
     """
-    try:
-        # 안전한 수학 표현식만 허용
-        allowed_chars = set('0123456789+-*/(). ')
-        if not all(c in allowed_chars for c in expression):
+    with metrics.span('tool.calculate'):
+        try:
+            # AST로 해석한 안전한 수학 표현식만 계산 (이름, 함수 호출 등은 거부)
+            plan = safe_eval.compile_expression(expression)
+            if plan.variables:
+                return "Error: 안전하지 않은 표현식입니다."
+            return f"계산 결과: {plan()}"
+        except safe_eval.UnsafeExpressionError:
             return "Error: 안전하지 않은 표현식입니다."
-        
-        result = eval(expression)
-        return f"계산 결과: {result}"
-    except Exception as e:
-        return f"계산 오류: {str(e)}"
+        except Exception as e:
+            return f"계산 오류: {str(e)}"
 
-@tool
 def extract_math_expression(text: str) -> str:
     """텍스트에서 수학 표현식을 추출하는 도구
     
@@ -39,41 +41,52 @@ def extract_math_expression(text: str) -> str:
     Returns:
         발견된 수학 표현식들
     """
-    # 간단한 수학 표현식 패턴 매칭
-    patterns = [
-        r'\d+\s*[\+\-\*\/]\s*\d+',  # 기본 연산
-        r'\(\s*\d+\s*[\+\-\*\/]\s*\d+\s*\)',  # 괄호가 있는 연산
-        r'\d+\s*\*\s*\d+\s*\+\s*\d+',  # 복합 연산
-    ]
-    
-    for pattern in patterns:
-        matches = re.findall(pattern, text)
+    with metrics.span('tool.extract_math_expression'):
+        # 한 번의 스캔으로 괄호가 중첩된 식까지 가장 긴 수학 표현식을 모두 찾음
+        matches = find_math_expressions(text)
         if matches:
             return f"발견된 수학 표현식: {', '.join(matches)}"
-    
-    return "텍스트에서 수학 표현식을 찾을 수 없습니다."
+        
+        return "텍스트에서 수학 표현식을 찾을 수 없습니다."
 
-# 도구들 정의
+# 도구들 정의 (CodeAgent용 smolagents 도구 객체는 에이전트를 만들 때 감쌈)
 tools = [calculate, extract_math_expression]
 
-# 에이전트 생성
-config = Config.get_model_config()
-if config and config['provider'] == 'gemini':
-    # Gemini는 직접 사용 (SmolAgents가 공식 지원하지 않을 수 있음)
-    from gemini_agent import create_gemini_agent
-    agent = create_gemini_agent(tools=tools)
-else:
-    # OpenAI 또는 기본 모델 사용
-    model = InferenceClientModel(model_id=config['model'] if config else "meta-llama/Llama-2-7b-chat-hf")
-    agent = CodeAgent(
-        tools=tools,
-        model=model
-    )
+def create_agent():
+    """설정된 모델에 맞는 에이전트 생성 (무거운 라이브러리는 여기서 처음 import)"""
+    # "2 + 3 * 4를 계산해줘", "서울 날씨" 같은 질문은 LLM 없이 바로 도구로 처리
+    prerouter = create_prerouter(tools)
+    config = Config.get_model_config()
+    if config and config['provider'] == 'gemini':
+        # Gemini는 직접 사용 (SmolAgents가 공식 지원하지 않을 수 있음)
+        from gemini_agent import create_gemini_agent
+        return create_gemini_agent(tools=tools, prerouter=prerouter)
+    else:
+        # OpenAI 또는 기본 모델 사용
+        from smolagents import CodeAgent, InferenceClientModel, tool
+        model = InferenceClientModel(model_id=config['model'] if config else "meta-llama/Llama-2-7b-chat-hf")
+        agent = CodeAgent(
+            tools=[tool(function) for function in tools],
+            model=model
+        )
+        # 표현만 다른 비슷한 질문은 CodeAgent를 실행하지 않고 캐시된 응답 반환
+        semantic_cache = create_semantic_cache()
+        if semantic_cache is not None:
+            agent = SemanticCachedAgent(agent, semantic_cache)
+        return PreroutedAgent(agent, prerouter) if prerouter else agent
+
+def __getattr__(name):
+    # 에이전트는 처음 사용할 때 만들고 프로세스 전체에서 재사용
+    if name == 'agent':
+        return agent_registry.get_agent('calculator')
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def main():
     print("🤖 계산 도우미 에이전트가 시작되었습니다!")
     print("종료하려면 'quit' 또는 'exit'를 입력하세요.\n")
     
+    agent = agent_registry.get_agent('calculator')
+    
     while True:
         user_input = input("질문을 입력하세요: ")
         
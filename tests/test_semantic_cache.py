@@ -0,0 +1,92 @@
+"""
+semantic_cache 테스트: 표현만 다른 질문은 적중하고, 뜻이 반대이거나 다른 질문은 적중하지 않아야 함
+"""
+
+import pytest
+
+from semantic_cache import SemanticCache, SemanticCachedAgent
+
+
+def make_cache():
+    # 확인(audit)을 끄고 기본 기준값으로 적중 여부만 봄
+    return SemanticCache(audit_rate=0)
+
+
+@pytest.mark.parametrize('cached, asked', [
+    ("파이썬이 뭐야?", "파이썬이란 무엇인가요?"),
+    ("What is Python?", "tell me about python"),
+    ("서울 날씨", "서울 날씨 알려줘"),
+])
+def test_paraphrase_hits(cached, asked):
+    cache = make_cache()
+    cache.set(cached, "answer")
+    hit = cache.lookup(asked)
+    assert hit is not None
+    assert hit.answer == "answer"
+
+
+@pytest.mark.parametrize('cached, asked', [
+    # 부정 표현만 다른 질문
+    ("Python is fast?", "Python is not fast?"),
+    ("파이썬 설치가 안 돼요", "파이썬 설치가 돼요"),
+    ("파이썬 설치가 돼요", "파이썬 설치가 안 돼요"),
+    # 한 단어가 더해져 뜻이 바뀐 질문
+    ("파이썬 리스트 정렬 방법", "파이썬 리스트 역순 정렬 방법"),
+    # 숫자나 대상이 다른 질문
+    ("2020년 한국 인구", "2021년 한국 인구"),
+    ("서울 날씨", "부산 날씨"),
+    ("파이썬이 뭐야?", "자바가 뭐야?"),
+    # 단어 순서만 바뀐 질문
+    ("convert celsius to fahrenheit", "convert fahrenheit to celsius"),
+    ("is python faster than java", "is java faster than python"),
+])
+def test_different_questions_miss(cached, asked):
+    cache = make_cache()
+    cache.set(cached, "answer")
+    assert cache.lookup(asked) is None
+
+
+def test_eviction_by_size_and_age(monkeypatch):
+    cache = SemanticCache(maxsize=2, ttl=10, audit_rate=0)
+    now = [1000.0]
+    monkeypatch.setattr('semantic_cache.time.time', lambda: now[0])
+    cache.set("사과란", "1")
+    cache.set("바나나란", "2")
+    cache.set("체리란", "3")
+    assert len(cache) == 2
+    assert cache.lookup("사과란") is None
+    
+    now[0] += 11
+    assert cache.lookup("체리란") is None
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['expirations'] == 1
+
+
+def test_audit_records_false_hit():
+    cache = SemanticCache(audit_rate=1.0)
+    cache.set("파이썬이 뭐야?", "파이썬은 프로그래밍 언어입니다.")
+    hit = cache.lookup("파이썬이란 무엇인가요?")
+    assert hit is not None and hit.audit
+    
+    assert not cache.audit(hit, "파이썬이란 무엇인가요?", "전혀 다른 답")
+    stats = cache.stats()
+    assert stats['false_hits'] == 1
+    assert stats['recent_false_hits'][0]['cached_prompt'] == "파이썬이 뭐야?"
+
+
+class FakeAgent:
+    def __init__(self, results):
+        self.results = list(results)
+        self.calls = 0
+    
+    def run(self, prompt):
+        self.calls += 1
+        return self.results.pop(0)
+
+
+def test_cached_agent_skips_failed_tool_results():
+    agent = SemanticCachedAgent(FakeAgent(["도구 'get_weather' 실행 시간이 초과되었습니다.", "맑음"]), make_cache())
+    assert agent.run("서울 날씨") != "맑음"
+    assert agent.run("서울 날씨") == "맑음"
+    assert agent.run("서울 날씨") == "맑음"
+    assert agent.agent.calls == 2
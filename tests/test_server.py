@@ -0,0 +1,69 @@
+"""
+server 테스트: keep-alive 연결에서 오류 응답 뒤에 남은 본문이 다음 요청으로 해석되지 않아야 함
+"""
+
+import http.client
+import socket
+import threading
+
+import pytest
+
+from server import AgentServer
+
+
+@pytest.fixture
+def server():
+    server = AgentServer(('127.0.0.1', 0), workers=1, max_queue=1, timeout=1, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def read_until_closed(sock):
+    data = b''
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            return data
+        data += chunk
+
+
+def test_keep_alive_between_successful_requests(server):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=5)
+    for _ in range(2):
+        conn.request('GET', '/agents')
+        response = conn.getresponse()
+        assert response.status == 200
+        response.read()
+    conn.close()
+
+
+@pytest.mark.parametrize('path', ['/agents/nope/run', '/unknown'])
+def test_unread_body_is_not_parsed_as_next_request(server, path):
+    body = b'{"prompt": "hi"}'
+    pipelined = (
+        f'POST {path} HTTP/1.1\r\nHost: test\r\nContent-Type: application/json\r\n'
+        f'Content-Length: {len(body)}\r\n\r\n'
+    ).encode() + body + b'GET /agents HTTP/1.1\r\nHost: test\r\n\r\n'
+    
+    with socket.create_connection(server.server_address, timeout=5) as sock:
+        sock.sendall(pipelined)
+        data = read_until_closed(sock)
+    
+    assert data.startswith(b'HTTP/1.1 404')
+    assert b'Connection: close' in data
+    assert b'Bad request syntax' not in data
+    # 연결을 닫았으므로 두 번째 요청에는 응답하지 않음 (클라이언트가 새 연결로 다시 보냄)
+    assert data.count(b'HTTP/1.1 ') == 1
+
+
+def test_negative_content_length_is_rejected(server):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=5)
+    conn.putrequest('POST', '/agents/search/run')
+    conn.putheader('Content-Length', '-1')
+    conn.endheaders()
+    response = conn.getresponse()
+    assert response.status == 400
+    conn.close()
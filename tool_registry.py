@@ -0,0 +1,80 @@
+"""
+도구 레지스트리
+도구 목록이 바뀔 때 한 번만 이름 -> 호출 함수 매핑과 시스템 프롬프트를 만들어 둡니다.
+"""
+
+import hashlib
+import inspect
+import re
+
+SYSTEM_PROMPT_HEADER = """
+당신은 도움이 되는 AI 어시스턴트입니다.
+
+사용 가능한 도구들:
+"""
+
+SYSTEM_PROMPT_FOOTER = """
+사용자의 질문에 답변할 때, 필요하면 적절한 도구를 사용하세요.
+도구를 사용해야 할 때는 다음 형식으로 답변하세요:
+TOOL_USE: tool_name
+INPUT: 도구에 전달할 입력
+
+여러 도구가 필요하거나 같은 도구를 다른 입력으로 여러 번 써야 하면
+TOOL_USE/INPUT 쌍을 필요한 만큼 이어서 한 번에 쓰세요. 모든 도구는 동시에 실행됩니다.
+
+그렇지 않으면 직접 답변하세요.
+"""
+
+_DOC_SECTION_RE = re.compile(r'\n\s*(?:Args|Returns):')
+
+
+def get_tool_name(tool):
+    """@tool 데코레이터 도구는 name 속성, 일반 함수는 __name__ 사용"""
+    return getattr(tool, 'name', None) or tool.__name__
+
+
+def get_tool_description(tool):
+    description = getattr(tool, 'description', None)
+    if description:
+        return description
+    doc = inspect.getdoc(tool)
+    if not doc:
+        return '설명 없음'
+    # 일반 함수는 @tool 데코레이터와 같이 Args:/Returns: 앞의 설명 부분만 사용
+    return _DOC_SECTION_RE.split(doc, maxsplit=1)[0].strip()
+
+
+class ToolRegistry:
+    """도구 이름으로 바로 호출할 수 있도록 미리 계산해 둔 불변 레지스트리"""
+    
+    def __init__(self, tools=None):
+        self.tools = tuple(tools or ())
+        self._calls = {}
+        self._lines = {}
+        for tool in self.tools:
+            name = get_tool_name(tool)
+            # @tool 데코레이터로 만들어진 도구는 forward를 직접 호출
+            self._calls[name] = tool.forward if hasattr(tool, 'forward') else tool
+            self._lines[name] = f"- {name}: {get_tool_description(tool)}\n"
+        
+        self.system_prompt = SYSTEM_PROMPT_HEADER + ''.join(self._lines.values()) + SYSTEM_PROMPT_FOOTER
+        # 캐시 키 등에 쓰이는 시스템 프롬프트 요약값
+        self.fingerprint = hashlib.sha256(self.system_prompt.encode('utf-8')).hexdigest()
+    
+    @property
+    def names(self):
+        return list(self._calls)
+    
+    def __contains__(self, name):
+        return name in self._calls
+    
+    def __len__(self):
+        return len(self._calls)
+    
+    def get(self, name):
+        """도구 호출 함수 반환 (없으면 None)"""
+        return self._calls.get(name)
+    
+    def call(self, name, tool_input):
+        """이름으로 도구 실행 (없는 도구면 KeyError)"""
+        return self._calls[name](tool_input)
@@ -0,0 +1,82 @@
+"""
+질문과 관련 있는 도구 고르기
+도구 이름과 설명(docstring 전체)으로 TF-IDF 색인을 만들어 두고, 질문마다 관련도가 높은
+상위 k개 도구만 시스템 프롬프트에 넣습니다. 관련도가 낮아 확신할 수 없으면 전체 도구를 사용합니다.
+한글은 조사가 붙어도 맞도록 글자 2-gram으로, 영문/숫자는 단어 단위로 색인합니다.
+"""
+
+import inspect
+import math
+import re
+from collections import Counter
+
+from tool_registry import get_tool_description, get_tool_name
+
+_TOKEN_RE = re.compile(r'[가-힣]+|[a-z]+|[0-9]+')
+
+
+def tokenize(text):
+    """색인/검색용 토큰 목록"""
+    tokens = []
+    for word in _TOKEN_RE.findall(text.lower().replace('_', ' ')):
+        if '가' <= word[0] <= '힣' and len(word) > 1:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def estimate_tokens(text):
+    """LLM 입력 토큰 수 어림값 (UTF-8 4바이트당 1토큰)"""
+    return len(text.encode('utf-8')) // 4
+
+
+def _tool_document(tool):
+    name = get_tool_name(tool)
+    doc = inspect.getdoc(tool) or getattr(tool, 'description', None) or get_tool_description(tool)
+    # 이름은 설명보다 중요하므로 두 번 넣어 가중치를 높임
+    return f"{name} {name} {doc}"
+
+
+class ToolSelector:
+    """도구 설명 TF-IDF 색인으로 질문과 관련 있는 도구를 고르는 선택기
+
+    Args:
+        tools: 도구 목록
+        top_k: 고를 최대 도구 수
+        min_score: 가장 관련 있는 도구의 점수(코사인 유사도)가 이보다 낮으면 전체 도구 사용
+    """
+    
+    def __init__(self, tools, top_k=2, min_score=0.1):
+        self.tools = tuple(tools)
+        self.top_k = top_k
+        self.min_score = min_score
+        
+        documents = [Counter(tokenize(_tool_document(tool))) for tool in self.tools]
+        document_frequency = Counter(term for document in documents for term in document)
+        count = len(documents)
+        # 모든 도구에 나오는 단어("도구", "사용" 등)는 가중치 0
+        self._idf = {term: math.log(count / df) for term, df in document_frequency.items()}
+        self._vectors = [self._weigh(document) for document in documents]
+    
+    def _weigh(self, counts):
+        vector = {term: (1 + math.log(tf)) * self._idf.get(term, 0.0) for term, tf in counts.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        return {term: weight / norm for term, weight in vector.items() if weight} if norm else {}
+    
+    def scores(self, prompt):
+        """도구별 관련도 점수 목록 (도구 순서와 같음)"""
+        query = self._weigh(Counter(tokenize(prompt)))
+        return [sum(weight * vector.get(term, 0.0) for term, weight in query.items()) for vector in self._vectors]
+    
+    def select(self, prompt):
+        """(고른 도구 튜플, 확신 여부) 반환 (확신하지 못하면 전체 도구)"""
+        if len(self.tools) <= self.top_k:
+            return self.tools, False
+        scores = self.scores(prompt)
+        ranked = sorted(range(len(self.tools)), key=lambda i: scores[i], reverse=True)
+        if scores[ranked[0]] < self.min_score:
+            return self.tools, False
+        chosen = {i for i in ranked[:self.top_k] if scores[i] > 0}
+        # 원래 도구 순서를 유지하여 같은 조합이면 같은 시스템 프롬프트가 되도록 함
+        return tuple(tool for i, tool in enumerate(self.tools) if i in chosen), True
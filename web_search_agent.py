@@ -1,15 +1,77 @@
+import contextvars
 import os
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from smolagents import CodeAgent, InferenceClientModel
-from smolagents.tools import tool
 from config import Config
+import agent_registry
+import metrics
+from prerouter import PreroutedAgent, create_prerouter
+from semantic_cache import SemanticCachedAgent, create_semantic_cache
+from cache import LRUTTLCache, SingleFlight
+from glossary import detect_target_lang, get_glossary
+from http_client import get_http_client
 import json
 
 # 환경 변수 로드
 load_dotenv()
 
-@tool
+SEARCH_NO_RESULT = "검색 결과를 찾을 수 없습니다."
+
+# 검색 결과 캐시 (정규화된 검색어 -> 결과 문자열)
+search_cache = LRUTTLCache(maxsize=Config.SEARCH_CACHE_SIZE, ttl=Config.SEARCH_CACHE_TTL)
+# 같은 검색어로 동시에 들어온 요청은 DuckDuckGo 요청 하나로 합침
+search_flight = SingleFlight()
+
+def normalize_query(query):
+    """대소문자와 공백 차이를 없앤 검색어"""
+    return ' '.join(query.casefold().split())
+
+def get_search_cache_stats():
+    """검색 캐시 통계 (TTL 조정용)"""
+    stats = search_cache.stats()
+    stats['upstream_requests'] = search_flight.executions
+    stats['coalesced'] = search_flight.coalesced
+    return stats
+
+def _search_duckduckgo(query):
+    """DuckDuckGo Instant Answer API 호출 (오류는 예외로 전달)"""
+    url = Config.SEARCH_API_URL
+    params = {
+        'q': query,
+        'format': 'json',
+        'no_html': '1',
+        'skip_disambig': '1'
+    }
+    
+    response = get_http_client().get(url, params=params)
+    data = response.json()
+    
+    if data.get('Abstract'):
+        return f"검색 결과: {data['Abstract']}"
+    elif data.get('Answer'):
+        return f"답변: {data['Answer']}"
+    elif data.get('RelatedTopics'):
+        topics = data['RelatedTopics'][:3]  # 처음 3개만
+        results = []
+        for topic in topics:
+            if isinstance(topic, dict) and topic.get('Text'):
+                results.append(topic['Text'])
+        if results:
+            return f"관련 정보:\n" + "\n".join(f"- {result}" for result in results)
+    
+    return SEARCH_NO_RESULT
+
+def _cached_search(key, query):
+    # 앞선 요청이 방금 캐시를 채웠을 수 있으므로 다시 확인
+    cached = search_cache.peek(key)
+    if cached is not None:
+        return cached
+    result = _search_duckduckgo(query)
+    # 결과 없음도 짧게 캐시하여 같은 검색어로 반복 요청하지 않도록 함
+    ttl = Config.SEARCH_NEGATIVE_CACHE_TTL if result == SEARCH_NO_RESULT else None
+    search_cache.set(key, result, ttl=ttl)
+    return result
+
 def search_web(query: str) -> str:
     """웹에서 정보를 검색하는 도구 (DuckDuckGo API 사용)
     
@@ -19,38 +81,110 @@ def search_web(query: str) -> str:
     Returns:
         검색 결과 문자열
     """
-    try:
-        # DuckDuckGo Instant Answer API 사용
-        url = "https://api.duckduckgo.com/"
-        params = {
-            'q': query,
-            'format': 'json',
-            'no_html': '1',
-            'skip_disambig': '1'
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
-        
-        if data.get('Abstract'):
-            return f"검색 결과: {data['Abstract']}"
-        elif data.get('Answer'):
-            return f"답변: {data['Answer']}"
-        elif data.get('RelatedTopics'):
-            topics = data['RelatedTopics'][:3]  # 처음 3개만
-            results = []
-            for topic in topics:
-                if isinstance(topic, dict) and topic.get('Text'):
-                    results.append(topic['Text'])
-            if results:
-                return f"관련 정보:\n" + "\n".join(f"- {result}" for result in results)
+    with metrics.span('tool.search_web'):
+        try:
+            key = normalize_query(query)
+            cached = search_cache.get(key)
+            metrics.incr('cache_requests', cache='search', result='miss' if cached is None else 'hit')
+            if cached is not None:
+                return cached
+            return search_flight.do(key, lambda: _cached_search(key, query))
         
-        return "검색 결과를 찾을 수 없습니다."
+        except Exception as e:
+            return f"검색 중 오류가 발생했습니다: {str(e)}"
+
+TEMPERATURE_UNITS = {'metric': '°C', 'imperial': '°F', 'standard': 'K'}
+
+# 도시별 날씨 캐시 (만료된 값도 업스트림 제한 시 대체 값으로 쓰기 위해 남겨 둠)
+weather_cache = LRUTTLCache(maxsize=Config.WEATHER_CACHE_SIZE, ttl=Config.WEATHER_CACHE_TTL, keep_stale=True)
+weather_flight = SingleFlight()
+
+class WeatherUnavailable(Exception):
+    """OpenWeatherMap이 요청을 제한(429)하거나 일시적으로 응답하지 못하는 경우"""
+
+class WeatherNotFound(Exception):
+    """도시를 찾을 수 없거나(404) API 키가 잘못된(401) 경우 (캐시하지 않음)"""
+
+def _weather_cache_key(city, units, lang):
+    return (normalize_query(city), units, lang)
+
+def _fetch_weather(city, api_key, units, lang):
+    """OpenWeatherMap에서 도시 하나의 날씨 조회 (캐시에 넣을 값: 설명, 온도, 습도)"""
+    url = Config.WEATHER_API_URL
+    params = {
+        'q': city,
+        'appid': api_key,
+        'units': units,
+        'lang': lang
+    }
+    
+    response = get_http_client().get(url, params=params)
+    if response.status_code == 429 or response.status_code >= 500:
+        raise WeatherUnavailable(f"HTTP {response.status_code}")
+    if response.status_code != 200:
+        raise WeatherNotFound(f"HTTP {response.status_code}")
+    data = response.json()
+    return {
+        'description': data['weather'][0]['description'],
+        'temp': data['main']['temp'],
+        'humidity': data['main']['humidity'],
+    }
+
+def _format_weather(city, weather, units):
+    # 캐시 키는 정규화한 도시 이름이므로 문장은 조회할 때 호출한 쪽의 도시 이름으로 만듦
+    unit = TEMPERATURE_UNITS.get(units, '°C')
+    return f"{city}의 날씨: {weather['description']}, 온도: {weather['temp']}{unit}, 습도: {weather['humidity']}%"
+
+def _cached_weather(key, city, api_key, units, lang):
+    cached = weather_cache.peek(key)
+    if cached is not None:
+        return cached
+    try:
+        result = _fetch_weather(city, api_key, units, lang)
+    except WeatherUnavailable:
+        # 요청 제한 중에는 만료된 값이라도 있으면 그대로 사용
+        stale = weather_cache.get_stale(key)
+        if stale is not None:
+            return stale
+        raise
+    weather_cache.set(key, result)
+    return result
+
+def lookup_weather(city, units='metric', lang='kr'):
+    """캐시를 거쳐 도시 하나의 날씨 문자열 반환"""
+    try:
+        # OpenWeatherMap API 키가 있다면 사용, 없으면 기본 정보 제공
+        api_key = os.getenv('OPENWEATHER_API_KEY')
         
+        if api_key:
+            key = _weather_cache_key(city, units, lang)
+            weather = weather_cache.get(key)
+            metrics.incr('cache_requests', cache='weather', result='miss' if weather is None else 'hit')
+            if weather is None:
+                weather = weather_flight.do(key, lambda: _cached_weather(key, city, api_key, units, lang))
+            return _format_weather(city, weather, units)
+        else:
+            return f"{city}의 날씨 정보를 확인하려면 OpenWeatherMap API 키가 필요합니다."
+    
+    except WeatherNotFound:
+        return f"{city}의 날씨 정보를 가져올 수 없습니다."
     except Exception as e:
-        return f"검색 중 오류가 발생했습니다: {str(e)}"
+        return f"날씨 정보 조회 중 오류가 발생했습니다: {str(e)}"
+
+def lookup_weather_many(cities, units='metric', lang='kr', max_workers=None):
+    """여러 도시의 날씨를 동시에 조회하여 입력 순서대로 반환"""
+    cities = [city.strip() for city in cities if city.strip()]
+    if not cities:
+        return []
+    max_workers = max_workers or Config.WEATHER_MAX_WORKERS
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(cities))) as executor:
+        # 도시별 측정 구간이 호출한 쪽 구간 아래에 이어지도록 현재 컨텍스트에서 실행
+        futures = [
+            executor.submit(contextvars.copy_context().run, lookup_weather, city, units, lang)
+            for city in cities
+        ]
+        return [future.result() for future in futures]
 
-@tool
 def get_weather_info(city: str) -> str:
     """도시의 날씨 정보를 가져오는 도구 (OpenWeatherMap API 사용)
     
@@ -60,82 +194,83 @@ def get_weather_info(city: str) -> str:
     Returns:
         날씨 정보 문자열
     """
-    try:
-        # OpenWeatherMap API 키가 있다면 사용, 없으면 기본 정보 제공
-        api_key = os.getenv('OPENWEATHER_API_KEY')
-        
-        if api_key:
-            url = f"http://api.openweathermap.org/data/2.5/weather"
-            params = {
-                'q': city,
-                'appid': api_key,
-                'units': 'metric',
-                'lang': 'kr'
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            data = response.json()
-            
-            if response.status_code == 200:
-                temp = data['main']['temp']
-                humidity = data['main']['humidity']
-                description = data['weather'][0]['description']
-                return f"{city}의 날씨: {description}, 온도: {temp}°C, 습도: {humidity}%"
-            else:
-                return f"{city}의 날씨 정보를 가져올 수 없습니다."
-        else:
-            return f"{city}의 날씨 정보를 확인하려면 OpenWeatherMap API 키가 필요합니다."
-            
-    except Exception as e:
-        return f"날씨 정보 조회 중 오류가 발생했습니다: {str(e)}"
+    with metrics.span('tool.get_weather_info'):
+        return lookup_weather(city)
+
+def get_weather_info_many(cities: str) -> str:
+    """여러 도시의 날씨 정보를 한 번에 가져오는 도구 (OpenWeatherMap API 사용)
+    
+    Args:
+        cities: 쉼표로 구분한 도시 이름 목록 (예: "서울, 부산, 제주")
+    
+    Returns:
+        도시별 날씨 정보 문자열 (한 줄에 한 도시)
+    """
+    with metrics.span('tool.get_weather_info_many'):
+        results = lookup_weather_many(cities.split(','))
+        if not results:
+            return "날씨를 조회할 도시 이름이 없습니다."
+        return "\n".join(results)
 
-@tool
-def translate_text(text: str, target_lang: str = 'en') -> str:
-    """텍스트를 번역하는 도구 (Google Translate API 대체)
+def translate_text(text: str, target_lang: str = 'auto') -> str:
+    """텍스트를 번역하는 도구 (용어집 기반, Google Translate API 대체)
     
     Args:
-        text: 번역할 텍스트
-        target_lang: 목표 언어 (기본값: 'en')
+        text: 번역할 텍스트 (문장 안의 용어집 구절만 번역됨)
+        target_lang: 목표 언어 ('en', 'ko' 등, 기본값 'auto': 한글이 있으면 'en'을 먼저, 없으면 'ko'를 먼저 시도)
     
     Returns:
         번역 결과 문자열
     """
-    try:
-        # 간단한 번역 예시 (실제로는 Google Translate API나 다른 번역 서비스 사용)
-        translations = {
-            'hello': '안녕하세요',
-            'goodbye': '안녕히 가세요',
-            'thank you': '감사합니다',
-            'how are you': '어떻게 지내세요',
-            '안녕하세요': 'hello',
-            '감사합니다': 'thank you'
-        }
-        
-        text_lower = text.lower()
-        if text_lower in translations:
-            return f"번역 결과: {translations[text_lower]}"
-        else:
-            return f"'{text}'의 번역을 찾을 수 없습니다. (제한된 단어만 지원)"
+    with metrics.span('tool.translate_text'):
+        try:
+            if target_lang == 'auto':
+                # 한글이 섞인 요청("hello를 번역해줘")도 있으므로 다른 방향도 시도
+                first = detect_target_lang(text)
+                candidates = [first, 'ko' if first == 'en' else 'en']
+            else:
+                candidates = [target_lang]
             
-    except Exception as e:
-        return f"번역 중 오류가 발생했습니다: {str(e)}"
-
-# 도구들 정의
-tools = [search_web, get_weather_info, translate_text]
-
-# 에이전트 생성
-config = Config.get_model_config()
-if config and config['provider'] == 'gemini':
-    # Gemini는 직접 사용
-    from gemini_agent import create_gemini_agent
-    agent = create_gemini_agent(tools=tools)
-else:
-    # OpenAI 또는 기본 모델 사용
-    model = InferenceClientModel(model_id=config['model'] if config else "meta-llama/Llama-2-7b-chat-hf")
-    agent = CodeAgent(
-        tools=tools,
-        model=model
-    )
+            for lang in candidates:
+                translated, matched = get_glossary().translate(text, lang)
+                if matched:
+                    return f"번역 결과: {translated}"
+            return f"'{text}'의 번역을 찾을 수 없습니다. (용어집에 있는 구절만 지원)"
+        
+        except Exception as e:
+            return f"번역 중 오류가 발생했습니다: {str(e)}"
+
+# 도구들 정의 (CodeAgent용 smolagents 도구 객체는 에이전트를 만들 때 감쌈)
+tools = [search_web, get_weather_info, get_weather_info_many, translate_text]
+
+def create_agent():
+    """설정된 모델에 맞는 에이전트 생성 (무거운 라이브러리는 여기서 처음 import)"""
+    # "2 + 3 * 4를 계산해줘", "서울 날씨" 같은 질문은 LLM 없이 바로 도구로 처리
+    prerouter = create_prerouter(tools)
+    config = Config.get_model_config()
+    if config and config['provider'] == 'gemini':
+        # Gemini는 직접 사용
+        from gemini_agent import create_gemini_agent
+        return create_gemini_agent(tools=tools, prerouter=prerouter)
+    else:
+        # OpenAI 또는 기본 모델 사용
+        from smolagents import CodeAgent, InferenceClientModel, tool
+        model = InferenceClientModel(model_id=config['model'] if config else "meta-llama/Llama-2-7b-chat-hf")
+        agent = CodeAgent(
+            tools=[tool(function) for function in tools],
+            model=model
+        )
+        # 표현만 다른 비슷한 질문은 CodeAgent를 실행하지 않고 캐시된 응답 반환
+        semantic_cache = create_semantic_cache()
+        if semantic_cache is not None:
+            agent = SemanticCachedAgent(agent, semantic_cache)
+        return PreroutedAgent(agent, prerouter) if prerouter else agent
+
+def __getattr__(name):
+    # 에이전트는 처음 사용할 때 만들고 프로세스 전체에서 재사용
+    if name == 'agent':
+        return agent_registry.get_agent('search')
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def main():
     print("🔍 정보 검색 도우미 에이전트가 시작되었습니다!")
@@ -145,6 +280,8 @@ def main():
     print("- 번역: 'hello' 같은 단어 번역")
     print("종료하려면 'quit' 또는 'exit'를 입력하세요.\n")
     
+    agent = agent_registry.get_agent('search')
+    
     while True:
         user_input = input("질문을 입력하세요: ")
         